@@ -0,0 +1,245 @@
+import os
+import re
+import glob
+import json
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from models.entities import classificar_status
+
+logger = logging.getLogger(__name__)
+
+PASTA_SHEETS = "sheets"
+CACHE_PADRAO = os.path.join("state", "analytics")
+
+# Mudou o formato do DataFrame tipado? Sobe a versão e os caches antigos deixam de valer
+VERSAO_CACHE = 2
+
+TIPO_RESULTADOS = "resultados"    # resultados_unisys_*.csv (main.py)
+TIPO_CONSULTAS = "consultas"      # resultados_consultas.csv (debug_nfe.py)
+TIPO_IGNORADO = "ignorado"        # arquivos que não são saída de execução (ex.: JSON de entrada salvo como .csv)
+
+_DATA_ARQUIVO = re.compile(r'(\d{8}_\d{6})')
+_FORMATO_DATA = '%d/%m/%Y %H:%M:%S'
+
+COLUNAS_RESULTADOS = ['arquivo', 'execucao', 'chave', 'location_id', 'status', 'desfecho', 'reprocessado',
+                      'status_confirmado', 'motivo', 'data_consulta', 'data_processamento', 'valor_total',
+                      'tempo_pesquisa', 'tempo_extracao', 'tempo_reprocesso', 'tempo_total']
+FASES = ('pesquisa', 'extracao', 'reprocesso', 'total')
+COLUNAS_CONSULTAS = ['arquivo', 'chave', 'protocolo', 'obtido', 'origem', 'data_consulta']
+
+
+def _assinatura(caminho: str) -> Tuple[str, int, int]:
+    info = os.stat(caminho)
+    return os.path.abspath(caminho), info.st_mtime_ns, info.st_size
+
+
+def _tipo_arquivo(caminho: str) -> str:
+    """O tipo vem do cabeçalho: há resultados_unisys_*.csv no formato de consulta e até JSON"""
+    with open(caminho, 'r', encoding='utf-8-sig', errors='replace') as arquivo:
+        cabecalho = arquivo.readline()
+    if cabecalho.startswith('chave_acesso'):
+        return TIPO_RESULTADOS
+    if cabecalho.startswith('Nota_Fiscal'):
+        return TIPO_CONSULTAS
+    return TIPO_IGNORADO
+
+
+def _execucao(caminho: str) -> Optional[datetime]:
+    achado = _DATA_ARQUIVO.search(os.path.basename(caminho))
+    return datetime.strptime(achado.group(1), '%Y%m%d_%H%M%S') if achado else None
+
+
+def _datas(serie: pd.Series) -> pd.Series:
+    return pd.to_datetime(serie, format=_FORMATO_DATA, errors='coerce')
+
+
+def _moeda(serie: pd.Series) -> pd.Series:
+    """'R$ 1.234,56' -> 1234.56"""
+    texto = serie.str.replace(r'[^\d,.-]', '', regex=True).str.replace('.', '', regex=False)
+    return pd.to_numeric(texto.str.replace(',', '.', regex=False), errors='coerce')
+
+
+def _desfechos(status: pd.Series) -> pd.Series:
+    """classificar_status aplicado uma vez por texto distinto, não por linha"""
+    categorias = status.astype('category')
+    nomes = [classificar_status(texto).name for texto in categorias.cat.categories]
+    return categorias.cat.rename_categories(nomes).astype(str).astype('category')
+
+
+def _ler_resultados(caminho: str) -> pd.DataFrame:
+    bruto = pd.read_csv(caminho, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    coluna = lambda nome: bruto[nome] if nome in bruto else pd.Series('', index=bruto.index)  # noqa: E731
+
+    motivo = coluna('observacao_completa').where(coluna('observacao_completa') != '', coluna('observacao'))
+    df = pd.DataFrame({
+        'chave': coluna('chave_acesso'),
+        'location_id': coluna('location_id').astype('category'),
+        'status': coluna('status').str.strip().astype('category'),
+        'reprocessado': coluna('reprocessado').eq('Sim'),
+        'status_confirmado': coluna('status_confirmado').astype('category'),
+        'motivo': motivo.str.strip().astype('category'),
+        'data_consulta': _datas(coluna('data_consulta')),
+        'data_processamento': _datas(coluna('data_processamento')),
+        'valor_total': _moeda(coluna('valor_total')),
+    })
+    # Tempos por fase (tempo_<fase>_s): só nos arquivos gravados depois do planejador
+    for fase in FASES:
+        df[f'tempo_{fase}'] = pd.to_numeric(coluna(f'tempo_{fase}_s'), errors='coerce')
+    df['desfecho'] = _desfechos(df['status'])
+    df['execucao'] = _execucao(caminho) or df['data_consulta'].min()
+    df['arquivo'] = os.path.basename(caminho)
+    return df[COLUNAS_RESULTADOS]
+
+
+def _ler_consultas(caminho: str) -> pd.DataFrame:
+    bruto = pd.read_csv(caminho, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    protocolo = bruto['Protocolo'].str.strip()
+    df = pd.DataFrame({
+        'chave': bruto['Nota_Fiscal'],
+        'protocolo': protocolo,
+        'obtido': protocolo.str.fullmatch(r'\d{10,}'),
+        'origem': bruto['Arquivo_XML'].where(bruto['Arquivo_XML'].isin(['CACHE', 'DEPOSITO', 'N/A']), 'XML')
+                                      .astype('category'),
+        'data_consulta': _datas(bruto['Data_Consulta']),
+    })
+    df['arquivo'] = os.path.basename(caminho)
+    return df[COLUNAS_CONSULTAS]
+
+
+_LEITORES = {TIPO_RESULTADOS: _ler_resultados, TIPO_CONSULTAS: _ler_consultas}
+
+
+@dataclass
+class Historico:
+    """Todas as saídas de execução já tipadas, prontas para agregação"""
+    resultados: pd.DataFrame
+    consultas: pd.DataFrame
+    arquivos: int
+    relidos: int
+    segundos: float
+
+
+class HistoryCache:
+    """Lê sheets/*.csv guardando o DataFrame tipado de cada arquivo em state/analytics/
+
+    A entrada do cache vale enquanto caminho, mtime e tamanho do CSV forem os mesmos;
+    só os arquivos novos ou alterados são interpretados de novo. O histórico completo
+    (concatenado) também fica em cache, para a consulta sem mudanças ser uma leitura só.
+    """
+
+    def __init__(self, pasta: str = PASTA_SHEETS, cache_dir: str = CACHE_PADRAO):
+        self.pasta = pasta
+        self.cache_dir = cache_dir
+        self.manifesto_path = os.path.join(cache_dir, "manifesto.json")
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifesto: Dict[str, Dict] = self._carregar_manifesto()
+
+    def _carregar_manifesto(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifesto_path, 'r', encoding='utf-8') as arquivo:
+                manifesto = json.load(arquivo)
+        except (OSError, ValueError):
+            return {}
+        return manifesto if manifesto.get('versao') == VERSAO_CACHE else {}
+
+    def _salvar_manifesto(self):
+        self.manifesto['versao'] = VERSAO_CACHE
+        temporario = self.manifesto_path + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.manifesto, arquivo, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.manifesto_path)
+
+    def _cache_arquivo(self, nome: str) -> str:
+        return os.path.join(self.cache_dir, nome + ".pkl")
+
+    def _ler_arquivo(self, caminho: str, assinatura: Tuple[str, int, int]) -> Tuple[str, Optional[pd.DataFrame], bool]:
+        """(tipo, DataFrame, relido?) de um CSV, pelo cache quando a assinatura confere"""
+        arquivos = self.manifesto.setdefault('arquivos', {})
+        entrada = arquivos.get(assinatura[0])
+        if entrada and (entrada['mtime_ns'], entrada['tamanho']) == assinatura[1:]:
+            if entrada['tipo'] == TIPO_IGNORADO:
+                return TIPO_IGNORADO, None, False
+            try:
+                return entrada['tipo'], pd.read_pickle(self._cache_arquivo(entrada['cache'])), False
+            except (OSError, ValueError, EOFError) as e:
+                logger.warning("⚠️  Cache de %s ilegível, relendo o CSV: %s", caminho, e)
+
+        tipo = _tipo_arquivo(caminho)
+        df = None
+        nome = hashlib.sha1(assinatura[0].encode()).hexdigest()
+        if tipo == TIPO_IGNORADO:
+            logger.info("⏭️  %s não é saída de execução, ignorado", caminho)
+        else:
+            try:
+                df = _LEITORES[tipo](caminho)
+            except (ValueError, KeyError, pd.errors.ParserError) as e:
+                logger.warning("⚠️  %s ilegível, ignorado: %s", caminho, e)
+                tipo = TIPO_IGNORADO
+            else:
+                df.to_pickle(self._cache_arquivo(nome))
+        arquivos[assinatura[0]] = {"mtime_ns": assinatura[1], "tamanho": assinatura[2], "tipo": tipo, "cache": nome}
+        return tipo, df, True
+
+    def carregar(self) -> Historico:
+        inicio = time.perf_counter()
+        caminhos = sorted(glob.glob(os.path.join(self.pasta, "*.csv")))
+        assinaturas = [_assinatura(caminho) for caminho in caminhos]
+        digest = hashlib.sha1(repr((VERSAO_CACHE, assinaturas)).encode()).hexdigest()[:16]
+
+        # Nada mudou desde a última consulta: o histórico inteiro sai de um único arquivo
+        if self.manifesto.get('completo') == digest:
+            try:
+                resultados, consultas = pd.read_pickle(self._cache_arquivo("historico"))
+                return Historico(resultados, consultas, len(caminhos), 0, time.perf_counter() - inicio)
+            except (OSError, ValueError, EOFError):
+                pass
+
+        partes: Dict[str, List[pd.DataFrame]] = {TIPO_RESULTADOS: [], TIPO_CONSULTAS: []}
+        relidos = 0
+        for caminho, assinatura in zip(caminhos, assinaturas):
+            tipo, df, relido = self._ler_arquivo(caminho, assinatura)
+            relidos += relido
+            if df is not None and not df.empty:
+                partes[tipo].append(df)
+
+        # Arquivos apagados de sheets/ saem do manifesto e do cache
+        vigentes = {assinatura[0] for assinatura in assinaturas}
+        for caminho in [c for c in self.manifesto.get('arquivos', {}) if c not in vigentes]:
+            entrada = self.manifesto['arquivos'].pop(caminho)
+            try:
+                os.remove(self._cache_arquivo(entrada['cache']))
+            except OSError:
+                pass
+
+        resultados = self._concatenar(partes[TIPO_RESULTADOS], COLUNAS_RESULTADOS)
+        consultas = self._concatenar(partes[TIPO_CONSULTAS], COLUNAS_CONSULTAS)
+        pd.to_pickle((resultados, consultas), self._cache_arquivo("historico"))
+        self.manifesto['completo'] = digest
+        self._salvar_manifesto()
+        segundos = time.perf_counter() - inicio
+        logger.info("📚 Histórico: %s arquivo(s), %s relido(s), %s resultado(s) e %s consulta(s) em %.2fs",
+                    len(caminhos), relidos, len(resultados), len(consultas), segundos)
+        return Historico(resultados, consultas, len(caminhos), relidos, segundos)
+
+    @staticmethod
+    def _concatenar(partes: List[pd.DataFrame], colunas: List[str]) -> pd.DataFrame:
+        if not partes:
+            return pd.DataFrame(columns=colunas)
+        df = pd.concat(partes, ignore_index=True)
+        # Categorias diferentes entre arquivos viram object no concat; volta a category
+        for coluna in ('arquivo', 'location_id', 'status', 'desfecho', 'status_confirmado', 'motivo', 'origem'):
+            if coluna in df:
+                df[coluna] = df[coluna].astype('category')
+        return df
+
+
+def carregar_historico(pasta: str = PASTA_SHEETS, cache_dir: str = CACHE_PADRAO) -> Historico:
+    return HistoryCache(pasta, cache_dir).carregar()
+
@@ -0,0 +1,153 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from analytics.history import carregar_historico
+
+logger = logging.getLogger(__name__)
+
+# Sem histórico de tempos: valores típicos medidos no eFormseMonitor (segundos)
+TEMPOS_PADRAO = {'pesquisa': 6.0, 'extracao': 2.0, 'reprocesso': 10.0}
+PAUSA_ENTRE_NOTAS = 0.5  # espera média por token no limitador de taxa (utils/rate_control)
+LOGIN_S = 25.0  # abrir navegador + login duplo até a tela de pesquisa
+LOGIN_EXTRA_S = 5.0  # cada sessão a mais disputa CPU/rede com as outras durante o login
+
+# Mínimo de notas com tempo medido para confiar na média de um local
+_MINIMO_AMOSTRAS = 5
+
+
+@dataclass
+class PerfilLocal:
+    """Taxas de desfecho e tempos médios de um location_id (ou do histórico inteiro)"""
+    notas: int
+    p_rejeitada: float
+    p_reprocesso: float
+    p_nao_encontrada: float
+    tempos: Dict[str, float]
+
+    @property
+    def esperado(self) -> float:
+        """Duração esperada de uma nota: pesquisa + extração + reprocesso quando houver + pausa"""
+        return (self.tempos['pesquisa'] + self.tempos['extracao'] + self.p_reprocesso * self.tempos['reprocesso']
+                + PAUSA_ENTRE_NOTAS)
+
+
+def _perfil(grupo: pd.DataFrame, reserva: Optional[PerfilLocal] = None) -> PerfilLocal:
+    tempos = {}
+    for fase, padrao in TEMPOS_PADRAO.items():
+        medidos = grupo[f'tempo_{fase}'].dropna()
+        if len(medidos) >= _MINIMO_AMOSTRAS:
+            tempos[fase] = float(medidos.mean())
+        else:
+            tempos[fase] = reserva.tempos[fase] if reserva else padrao
+    total = len(grupo)
+    if total == 0 and reserva:
+        return PerfilLocal(0, reserva.p_rejeitada, reserva.p_reprocesso, reserva.p_nao_encontrada, tempos)
+    return PerfilLocal(
+        notas=total,
+        p_rejeitada=float((grupo['desfecho'].isin(['REJEITADO', 'REPROCESSADO']) | grupo['reprocessado']).mean())
+        if total else 0.0,
+        p_reprocesso=float(grupo['reprocessado'].mean()) if total else 0.0,
+        p_nao_encontrada=float((grupo['desfecho'] == 'NAO_ENCONTRADA').mean()) if total else 0.0,
+        tempos=tempos,
+    )
+
+
+def perfis_historicos(resultados: pd.DataFrame) -> Dict[str, PerfilLocal]:
+    """location_id -> perfil; a chave '' guarda o perfil geral, usado para locais sem histórico"""
+    geral = _perfil(resultados)
+    perfis = {'': geral}
+    for local, grupo in resultados.groupby('location_id', observed=True):
+        perfis[str(local)] = _perfil(grupo, geral)
+    return perfis
+
+
+def speedup(workers: int, eficiencia: float) -> float:
+    """Ganho de N sessões em paralelo: cada sessão extra rende `eficiencia` da anterior (servidor compartilhado)"""
+    return sum(eficiencia ** k for k in range(workers))
+
+
+@dataclass
+class PlanoExecucao:
+    """Ordem das notas, duração esperada de cada uma e estimativa por número de sessões"""
+    notas: List[Dict]
+    esperado: Dict[str, float]
+    estimativas: Dict[int, float]
+    workers: int
+    eficiencia: float
+    perfis: Dict[str, PerfilLocal] = field(repr=False, default_factory=dict)
+    com_historico: bool = False
+
+    def resumo(self) -> str:
+        linhas = [f"🧮 PLANO: {len(self.notas)} nota(s), "
+                  f"{'tempos do histórico' if self.com_historico else 'tempos padrão (sem histórico medido)'}"]
+        for workers, segundos in self.estimativas.items():
+            marca = "  ⬅️ recomendado" if workers == self.workers else ""
+            linhas.append(f"   {workers} sessão(ões): ~{_formatar(segundos)}{marca}")
+        geral = self.perfis.get('')
+        if geral:
+            linhas.append(f"   Histórico: {geral.p_rejeitada:.0%} rejeitadas, {geral.p_reprocesso:.0%} reprocessadas, "
+                          f"{geral.p_nao_encontrada:.0%} não encontradas")
+        return "\n".join(linhas)
+
+
+def _formatar(segundos: float) -> str:
+    horas, resto = divmod(int(segundos), 3600)
+    return f"{horas}h{resto // 60:02d}min" if horas else f"{resto // 60}min{resto % 60:02d}s"
+
+
+def planejar(notas: List[Dict], config, resultados: Optional[pd.DataFrame] = None) -> PlanoExecucao:
+    """Estima a duração do lote para 1..config.max_workers sessões e escolhe quantas usar
+
+    Recomenda a menor quantidade de sessões a partir da qual mais uma não reduz o tempo
+    em pelo menos config.ganho_minimo. As notas mais demoradas (locais que costumam
+    pedir reprocesso) vão primeiro, para as sessões terminarem juntas.
+    """
+    if resultados is None:
+        resultados = carregar_historico().resultados
+    perfis = perfis_historicos(resultados)
+    geral = perfis['']
+
+    esperado = {nota['chave']: perfis.get(str(nota.get('location_id', '')), geral).esperado for nota in notas}
+    trabalho = sum(esperado[nota['chave']] for nota in notas)
+
+    estimativas = {}
+    for workers in range(1, max(1, config.max_workers) + 1):
+        estimativas[workers] = LOGIN_S + LOGIN_EXTRA_S * (workers - 1) + trabalho / speedup(workers, config.eficiencia)
+
+    recomendado = 1
+    for workers in range(2, len(estimativas) + 1):
+        if workers > len(notas) or estimativas[workers] > estimativas[recomendado] * (1 - config.ganho_minimo):
+            break
+        recomendado = workers
+
+    ordenadas = sorted(notas, key=lambda nota: esperado[nota['chave']], reverse=True) if recomendado > 1 else list(notas)
+    com_historico = bool(resultados['tempo_total'].notna().sum() >= _MINIMO_AMOSTRAS) if not resultados.empty else False
+    return PlanoExecucao(ordenadas, esperado, estimativas, recomendado, config.eficiencia, perfis, com_historico)
+
+
+class EstimativaAoVivo:
+    """Tempo restante refinado a cada nota: o esperado que falta, corrigido pela razão real/esperado até agora"""
+
+    def __init__(self, plano: PlanoExecucao, workers: int = 1):
+        self.plano = plano
+        self.workers = workers
+        self.restante_esperado = sum(plano.esperado.get(nota['chave'], 0.0) for nota in plano.notas)
+        self.soma_esperada = 0.0
+        self.soma_real = 0.0
+
+    def concluir(self, chave: str, tempos: Dict[str, float]):
+        esperado = self.plano.esperado.get(chave, 0.0)
+        self.restante_esperado = max(0.0, self.restante_esperado - esperado)
+        if tempos.get('total'):
+            self.soma_esperada += esperado - PAUSA_ENTRE_NOTAS
+            self.soma_real += tempos['total']
+
+    @property
+    def fator(self) -> float:
+        return self.soma_real / self.soma_esperada if self.soma_esperada > 0 else 1.0
+
+    def restante(self) -> float:
+        return self.restante_esperado * self.fator / speedup(self.workers, self.plano.eficiencia)
@@ -0,0 +1,103 @@
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from analytics.history import Historico
+
+REJEITADO = "REJEITADO"
+
+
+def filtrar_periodo(df: pd.DataFrame, dias: Optional[int]) -> pd.DataFrame:
+    """Só as linhas dos últimos `dias` (pela data da consulta); None = histórico inteiro"""
+    if not dias or df.empty:
+        return df
+    return df[df['data_consulta'] >= datetime.now() - timedelta(days=dias)]
+
+
+def top_motivos(resultados: pd.DataFrame, n: int = 10) -> pd.DataFrame:
+    """Motivos de rejeição mais frequentes: ocorrências, notas distintas e locais afetados"""
+    rejeitados = resultados[resultados['desfecho'] == REJEITADO]
+    tabela = rejeitados.groupby('motivo', observed=True).agg(
+        ocorrencias=('chave', 'size'),
+        notas=('chave', 'nunique'),
+        locais=('location_id', 'nunique'),
+        ultima=('data_consulta', 'max'),
+    )
+    return tabela.sort_values('ocorrencias', ascending=False).head(n)
+
+
+def rejeicoes_por_local(resultados: pd.DataFrame) -> pd.DataFrame:
+    """Por location_id: notas consultadas, rejeitadas e a taxa de rejeição"""
+    tabela = resultados.assign(rejeitada=resultados['desfecho'] == REJEITADO).groupby(
+        'location_id', observed=True).agg(
+        consultas=('chave', 'size'),
+        notas=('chave', 'nunique'),
+        rejeicoes=('rejeitada', 'sum'),
+    )
+    tabela['taxa_rejeicao'] = (tabela['rejeicoes'] / tabela['consultas']).round(3)
+    return tabela.sort_values('rejeicoes', ascending=False)
+
+
+def sucesso_reprocesso_por_motivo(resultados: pd.DataFrame) -> pd.DataFrame:
+    """Taxa de sucesso do reprocesso por motivo de rejeição
+
+    Conta como sucesso a confirmação do verificador ('✅ ...') ou, sem resposta definitiva
+    dele, a próxima consulta da mesma chave (em execução posterior) não estar mais rejeitada.
+    """
+    ordenado = resultados.sort_values(['chave', 'data_consulta'])
+    proximo = ordenado.groupby('chave', observed=True)['desfecho'].shift(-1)
+    reprocessados = ordenado.assign(proximo=proximo)[ordenado['reprocessado']]
+
+    confirmado = reprocessados['status_confirmado'].astype(str)
+    # Sem resposta definitiva do verificador (vazio, não confirmado, não verificado): vale a próxima consulta
+    definitivo = confirmado.str.match(r'^(✅|🚫)')
+    sucesso = confirmado.str.startswith('✅') | (~definitivo & reprocessados['proximo'].notna()
+                                                & reprocessados['proximo'].ne(REJEITADO))
+    conhecido = definitivo | reprocessados['proximo'].notna()
+
+    tabela = reprocessados.assign(sucesso=sucesso, conhecido=conhecido).groupby('motivo', observed=True).agg(
+        reprocessos=('chave', 'size'),
+        com_desfecho=('conhecido', 'sum'),
+        sucessos=('sucesso', 'sum'),
+    )
+    tabela['taxa_sucesso'] = (tabela['sucessos'] / tabela['com_desfecho'].where(tabela['com_desfecho'] > 0)).round(3)
+    return tabela.sort_values('reprocessos', ascending=False)
+
+
+def consultas_por_dia(consultas: pd.DataFrame) -> pd.DataFrame:
+    """Consultas de protocolo (debug_nfe) por dia e origem: portal, cache ou depósito"""
+    if consultas.empty:
+        return pd.DataFrame(columns=['consultas', 'protocolos'])
+    dia = consultas['data_consulta'].dt.date.rename('dia')
+    return consultas.groupby([dia, 'origem'], observed=True).agg(
+        consultas=('chave', 'size'),
+        protocolos=('obtido', 'sum'),
+    )
+
+
+RELATORIOS: Dict[str, Callable[[Historico], pd.DataFrame]] = {
+    'motivos': lambda h: top_motivos(h.resultados),
+    'locais': lambda h: rejeicoes_por_local(h.resultados),
+    'reprocesso': lambda h: sucesso_reprocesso_por_motivo(h.resultados),
+    'consultas': lambda h: consultas_por_dia(h.consultas),
+}
+
+
+def gerar(historico: Historico, nomes, dias: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Executa os relatórios pedidos sobre o período escolhido"""
+    periodo = Historico(filtrar_periodo(historico.resultados, dias), filtrar_periodo(historico.consultas, dias),
+                        historico.arquivos, historico.relidos, historico.segundos)
+    return {nome: RELATORIOS[nome](periodo) for nome in nomes}
+
+
+def exportar(tabelas: Dict[str, pd.DataFrame], pasta: str) -> Dict[str, str]:
+    """Um CSV por relatório em `pasta`; devolve nome -> caminho"""
+    os.makedirs(pasta, exist_ok=True)
+    carimbo = datetime.now().strftime('%Y%m%d_%H%M%S')
+    caminhos = {}
+    for nome, tabela in tabelas.items():
+        caminhos[nome] = os.path.join(pasta, f"analise_{nome}_{carimbo}.csv")
+        tabela.to_csv(caminhos[nome], encoding='utf-8-sig')
+    return caminhos
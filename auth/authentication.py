@@ -1,54 +1,78 @@
 import time
 import logging
-from playwright.sync_api import Page, TimeoutError
-from typing import Optional
+from contextlib import closing
+from typing import TYPE_CHECKING, Optional
 from datetime import datetime, timedelta
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+from scrapers.data_scraper import DataScraper, GRID_ROWS_SELECTOR, dados_da_linha
+from utils.deadline import PrazoEsgotado
+from utils.helpers import timeout_playwright
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+# Handlers e níveis são configurados por utils.logging_config.setup_logging
 logger = logging.getLogger(__name__)
 
+# Mensagem do monitor quando recusa a conta ("Usuário ou senha inválidos", "Senha incorreta", "Usuário bloqueado")
+LOGIN_RECUSADO_SELECTOR = r"text=/(usu[aá]rio|senha|login|conta)[^\n]{0,40}(inv[aá]lid|incorret|bloquead)/i"
+
 class AuthManager:
-    def __init__(self, page: Page):
+    def __init__(self, page: "Page", timeout: int = 30000, backend_grid: str = "handles"):
         self.page = page
-        self.timeout = 30000
+        self.timeout = timeout
+        self.backend_grid = backend_grid  # DataScraper.backend usado em extract_invoice_data
+        self.prazo = None  # utils.deadline.Prazo da fase em andamento (None fora de uma nota)
+    
+    def _espera(self, teto_ms: Optional[int] = None) -> int:
+        """Timeout de uma espera: o teto (padrão self.timeout), limitado ao que resta do prazo da fase"""
+        teto = self.timeout if teto_ms is None else teto_ms
+        return self.prazo.timeout_ms(teto) if self.prazo else teto
+    
+    def _conferir_prazo(self):
+        """Depois de uma espera que falhou: se foi o prazo da fase que a encurtou, PrazoEsgotado (nota volta à fila)"""
+        if self.prazo:
+            self.prazo.conferir()
     
     def wait_and_click(self, selector: str, description: str = ""):
         """Espera elemento e clica com debug"""
         try:
-            logger.info(f"🖱️ Clicando em: {description}")
-            self.page.wait_for_selector(selector, timeout=self.timeout)
+            logger.debug("🖱️ Clicando em: %s", description)
+            self.page.wait_for_selector(selector, timeout=self._espera())
             self.page.click(selector)
             time.sleep(1)
             return True
-        except TimeoutError:
-            logger.error(f"❌ Não encontrei: {description} - Seletor: {selector}")
+        except timeout_playwright():
+            self._conferir_prazo()
+            logger.error("❌ Não encontrei: %s - Seletor: %s", description, selector)
             return False
     
     def wait_and_fill(self, selector: str, text: str, description: str = ""):
         """Espera elemento e preenche com debug"""
         try:
-            logger.info(f"⌨️ Preenchendo {description}: {text}")
-            self.page.wait_for_selector(selector, timeout=self.timeout)
+            logger.debug("⌨️ Preenchendo %s", description)
+            self.page.wait_for_selector(selector, timeout=self._espera())
             self.page.fill(selector, text)
             time.sleep(0.5)
             return True
-        except TimeoutError:
-            logger.error(f"❌ Não encontrei campo: {description} - Seletor: {selector}")
+        except timeout_playwright():
+            self._conferir_prazo()
+            logger.error("❌ Não encontrei campo: %s - Seletor: %s", description, selector)
             return False
     
     def wait_and_type(self, selector: str, text: str, description: str = ""):
         """Espera elemento e digita com delay (para campos que precisam de trigger)"""
         try:
-            logger.info(f"⌨️ Digitando {description}: {text}")
-            self.page.wait_for_selector(selector, timeout=self.timeout)
+            logger.debug("⌨️ Digitando %s: %s", description, text)
+            self.page.wait_for_selector(selector, timeout=self._espera())
             self.page.click(selector)  # Clica primeiro para focar
             time.sleep(0.5)
             self.page.keyboard.type(text)
             time.sleep(0.5)
             return True
-        except TimeoutError:
-            logger.error(f"❌ Não encontrei campo: {description} - Seletor: {selector}")
+        except timeout_playwright():
+            self._conferir_prazo()
+            logger.error("❌ Não encontrei campo: %s - Seletor: %s", description, selector)
             return False
     
     def login_initial(self, email: str, password: str):
@@ -69,7 +93,7 @@ class AuthManager:
         for selector in email_selectors:
             if self.wait_and_fill(selector, email, "email"):
                 email_filled = True
-                logger.info(f"✅ Email preenchido com: {selector}")
+                logger.info("✅ Email preenchido com: %s", selector)
                 break
         
         if not email_filled:
@@ -100,7 +124,7 @@ class AuthManager:
         for selector in password_selectors:
             if self.wait_and_fill(selector, password, "senha"):
                 password_filled = True
-                logger.info(f"✅ Senha preenchida com: {selector}")
+                logger.info("✅ Senha preenchida com: %s", selector)
                 break
         
         if not password_filled:
@@ -121,12 +145,12 @@ class AuthManager:
         
         for selector in login_buttons:
             if self.wait_and_click(selector, "botão login"):
-                logger.info(f"✅ Login acionado com: {selector}")
+                logger.info("✅ Login acionado com: %s", selector)
                 break
         
         # Aguardar login e navegação para próxima tela
         time.sleep(3)
-        self.page.wait_for_load_state("networkidle")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
         logger.info("✅ Primeiro login realizado!")
         return True
     
@@ -138,10 +162,10 @@ class AuthManager:
         
         # Aguardar a página extra carregar
         time.sleep(3)
-        self.page.wait_for_load_state("networkidle")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
         
-        logger.info(f"📄 Página extra - URL: {self.page.url}")
-        logger.info(f"📄 Página extra - Título: {self.page.title()}")
+        logger.info("📄 Página extra - URL: %s", self.page.url)
+        logger.info("📄 Página extra - Título: %s", self.page.title())
         
         # Estratégia para página extra: 
         continuar_buttons = [
@@ -157,12 +181,12 @@ class AuthManager:
         
         for selector in continuar_buttons:
             if self.wait_and_click(selector, "botão continuar"):
-                logger.info(f"✅ Navegação da página extra com: {selector}")
+                logger.info("✅ Navegação da página extra com: %s", selector)
                 break
         
         # Se não encontrar botão específico, esperar redirecionamento automático
         time.sleep(3)
-        self.page.wait_for_load_state("networkidle")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
         
         logger.info("✅ Página extra processada!")
         return True
@@ -172,11 +196,11 @@ class AuthManager:
         logger.info("👨‍💼 Realizando login no monitor...")
         
         # Aguardar tela do monitor carregar
-        self.page.wait_for_load_state("networkidle")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
         time.sleep(3)
         
-        logger.info(f"📄 Tela do monitor - URL: {self.page.url}")
-        logger.info(f"📄 Tela do monitor - Título: {self.page.title()}")
+        logger.info("📄 Tela do monitor - URL: %s", self.page.url)
+        logger.info("📄 Tela do monitor - Título: %s", self.page.title())
         
         # Estratégia para usuário do monitor
         user_selectors = [
@@ -194,7 +218,7 @@ class AuthManager:
         for selector in user_selectors:
             if self.wait_and_fill(selector, user, "usuário monitor"):
                 user_filled = True
-                logger.info(f"✅ Usuário monitor preenchido com: {selector}")
+                logger.info("✅ Usuário monitor preenchido com: %s", selector)
                 break
         
         if not user_filled:
@@ -222,12 +246,15 @@ class AuthManager:
         password_filled = False
         for selector in monitor_password_selectors:
             try:
-                self.page.wait_for_selector(selector, timeout=5000)
+                self.page.wait_for_selector(selector, timeout=self._espera(5000))
                 self.page.fill(selector, password)
                 password_filled = True
-                logger.info(f"✅ Senha monitor preenchida com: {selector}")
+                logger.info("✅ Senha monitor preenchida com: %s", selector)
                 break
+            except PrazoEsgotado:
+                raise
             except:
+                self._conferir_prazo()
                 continue
         
         if not password_filled:
@@ -243,15 +270,32 @@ class AuthManager:
         
         # Aguardar login do monitor
         time.sleep(5)
-        self.page.wait_for_load_state("networkidle")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
         logger.info("✅ Login no monitor realizado!")
         return True
     
+    def login_recusado(self) -> bool:
+        """Depois do login no monitor: a tela mostra a mensagem de usuário/senha recusados"""
+        try:
+            return self.page.is_visible(LOGIN_RECUSADO_SELECTOR)
+        except Exception:
+            return False
+    
+    def login_pendente(self) -> bool:
+        """Depois do login no monitor: o campo de senha continua na tela, sem recusa explícita
+        
+        Pode ser só uma página lenta ou a de troca de senha: não prova que a conta é inválida.
+        """
+        try:
+            return self.page.is_visible("input[type='password']")
+        except Exception:
+            return False
+    
     def navigate_to_search_screen(self):
         """Navega para tela de pesquisa de notas fiscais"""
         logger.info("🧭 Navegando para tela de pesquisa...")
         
-        self.page.wait_for_load_state("networkidle")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
         time.sleep(1)
         
         # Estratégia para encontrar botão/link de pesquisa
@@ -269,22 +313,22 @@ class AuthManager:
         
         for selector in search_selectors:
             if self.wait_and_click(selector, "tela de pesquisa"):
-                logger.info(f"✅ Navegação para pesquisa com: {selector}")
+                logger.info("✅ Navegação para pesquisa com: %s", selector)
                 break
         
         time.sleep(1)
-        self.page.wait_for_load_state("networkidle")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
         logger.info("✅ Navegação para pesquisa concluída!")
     
     def fill_search_form(self, initial_date: str, nota_fiscal: str):
         """Preenche formulário de pesquisa com chave da nota, datas e status Rejeitado"""
-        logger.info(f"📋 Preenchendo pesquisa - Data: {initial_date}, Nota: {nota_fiscal}, Status: Rejeitado")
+        logger.info("📋 Preenchendo pesquisa - Data: %s, Nota: %s, Status: Rejeitado", initial_date, nota_fiscal)
         
-        self.page.wait_for_load_state("networkidle")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
         time.sleep(2)
         
         # 1. Preencher chave da nota fiscal (DocKey)
-        logger.info("1. 🔑 Preenchendo chave da nota fiscal...")
+        logger.debug("1. 🔑 Preenchendo chave da nota fiscal...")
         dockey_selectors = [
             "input[name='DocKey']",
             "input[id='DocKey']",
@@ -297,7 +341,7 @@ class AuthManager:
         for selector in dockey_selectors:
             if self.wait_and_fill(selector, nota_fiscal, "chave da nota"):
                 nota_preenchida = True
-                logger.info(f"✅ Chave da nota preenchida com: {selector}")
+                logger.debug("✅ Chave da nota preenchida com: %s", selector)
                 break
         
         if not nota_preenchida:
@@ -307,7 +351,7 @@ class AuthManager:
         time.sleep(1)
         
         # 2. Preencher status "Rejeitado" no campo StatusId-input + TAB + espera
-        logger.info("2. 🚫 Preenchendo status 'Rejeitado'...")
+        logger.debug("2. 🚫 Preenchendo status 'Rejeitado'...")
         status_selectors = [
             "input[name='StatusId-input']",
             "input[id='StatusId-input']",
@@ -319,16 +363,16 @@ class AuthManager:
         for selector in status_selectors:
             if self.wait_and_fill(selector, "Rejeitado", "status Rejeitado"):
                 status_preenchido = True
-                logger.info(f"✅ Status 'Rejeitado' preenchido com: {selector}")
+                logger.debug("✅ Status 'Rejeitado' preenchido com: %s", selector)
                     
                 # 🔥 NOVO: Tab + espera de 1 segundo após escrever "Rejeitado"
                 self.page.keyboard.press("Tab")
-                logger.info("   ↪️  Tab pressionado após status")
+                logger.debug("   ↪️  Tab pressionado após status")
                 time.sleep(0.1)  # 🔥 Espera 1 segundo após o Tab
                 break
         
         # 3. Preencher data inicial (StartDate) - 30 dias atrás
-        logger.info("3. 📅 Preenchendo data inicial...")
+        logger.debug("3. 📅 Preenchendo data inicial...")
         startdate_selectors = [
             "input[name='StartDate']",
             "input[id='StartDate']",
@@ -339,23 +383,26 @@ class AuthManager:
         # Limpar campo StartDate primeiro (Ctrl+A + Delete)
         for selector in startdate_selectors:
             try:
-                self.page.wait_for_selector(selector, timeout=5000)
+                self.page.wait_for_selector(selector, timeout=self._espera(5000))
                 self.page.click(selector)
                 self.page.keyboard.press("Control+A")
                 self.page.keyboard.press("Delete")
-                logger.info(f"✅ Campo StartDate limpo com: {selector}")
+                logger.debug("✅ Campo StartDate limpo com: %s", selector)
                 
                 # Preencher com data inicial
                 self.wait_and_type(selector, initial_date, "data inicial")
                 break
+            except PrazoEsgotado:
+                raise
             except:
+                self._conferir_prazo()
                 continue
         
         time.sleep(1)
         
         # 4. Data final (EndDate) já deve vir preenchida com hoje
         # Vamos apenas verificar se está correta
-        logger.info("4. 📅 Verificando data final...")
+        logger.debug("4. 📅 Verificando data final...")
         enddate_selectors = [
             "input[name='EndDate']", 
             "input[id='EndDate']"
@@ -363,17 +410,20 @@ class AuthManager:
         
         for selector in enddate_selectors:
             try:
-                self.page.wait_for_selector(selector, timeout=3000)
+                self.page.wait_for_selector(selector, timeout=self._espera(3000))
                 end_date_value = self.page.input_value(selector)
-                logger.info(f"📅 Data final atual: {end_date_value}")
+                logger.debug("📅 Data final atual: %s", end_date_value)
                 break
+            except PrazoEsgotado:
+                raise
             except:
+                self._conferir_prazo()
                 continue
         
         time.sleep(1)
         
         # 5. Clicar em pesquisar
-        logger.info("5. 🔍 Clicando em pesquisar...")
+        logger.debug("5. 🔍 Clicando em pesquisar...")
         pesquisar_buttons = [
             "//*[contains(text(), 'Pesquisa')]",
             "button:has-text('Pesquisar')",
@@ -387,139 +437,156 @@ class AuthManager:
         
         for selector in pesquisar_buttons:
             if self.wait_and_click(selector, "botão pesquisar"):
-                logger.info(f"✅ Pesquisa acionada com: {selector}")
+                logger.debug("✅ Pesquisa acionada com: %s", selector)
                 break
         
         # Aguarda resultados
-        logger.info("⏳ Aguardando resultados da pesquisa...")
+        logger.debug("⏳ Aguardando resultados da pesquisa...")
         time.sleep(5)
-        self.page.wait_for_load_state("networkidle")
-        logger.info("✅ Pesquisa finalizada!")
+        self.page.wait_for_load_state("networkidle", timeout=self._espera())
+        logger.debug("✅ Pesquisa finalizada!")
         return True
 
+    def _localizar_linha(self, celulas, nota_fiscal: str) -> Optional[int]:
+        """Posição da linha (células da página atual) que contém a nota fiscal"""
+        ultimos_12_digitos = nota_fiscal[-12:]
+        partes_nota = [nota_fiscal[i:i+8] for i in range(0, len(nota_fiscal), 8)]
+        for idx, linha in enumerate(celulas):
+            texto_linha = "\t".join(linha)
+            
+            # Estratégias de busca:
+            # 1. Busca direta pela nota completa
+            if nota_fiscal in texto_linha:
+                logger.debug("✅ Nota encontrada (busca direta): %s", nota_fiscal)
+                return idx
+            
+            # 2. Busca pelos últimos dígitos (pode estar truncada)
+            if ultimos_12_digitos in texto_linha:
+                logger.debug("✅ Nota encontrada (últimos 12 dígitos): %s", ultimos_12_digitos)
+                return idx
+            
+            # 3. Busca por parte da chave (pode estar em colunas diferentes)
+            for parte in partes_nota:
+                if parte in texto_linha:
+                    logger.debug("✅ Nota encontrada (parte: %s)", parte)
+                    return idx
+        return None
+    
+    def _linha_do_grid(self, idx: int):
+        """ElementHandle da idx-ésima linha com células; os demais handles são liberados na hora
+        
+        Handles de query_selector_all ficam presos na página até serem descartados, e o
+        grid é consultado a cada nota: sem dispose() a memória da página só cresce.
+        """
+        linhas = []
+        for linha in self.page.query_selector_all(GRID_ROWS_SELECTOR):
+            celula = linha.query_selector(":scope > td")
+            if celula:
+                celula.dispose()
+                linhas.append(linha)
+            else:
+                linha.dispose()
+        encontrada = linhas.pop(idx)
+        for linha in linhas:
+            linha.dispose()
+        return encontrada
+    
+    def _dados_linha_handles(self, scraper: DataScraper, linha_encontrada):
+        """Marca a checkbox e lê a linha célula a célula pelo ElementHandle"""
+        # 1. Marcar a checkbox
+        checkbox = linha_encontrada.query_selector("input[type='checkbox'][name='checkedRecords']")
+        valor_checkbox = None
+        if checkbox:
+            valor_checkbox = ''
+            try:
+                checkbox.check()
+                valor_checkbox = checkbox.get_attribute('value') or ''
+                logger.debug("✅ Checkbox marcada - Value: %s", valor_checkbox)
+                time.sleep(1)
+            except Exception as e:
+                logger.warning("⚠️  Não consegui marcar a checkbox: %s", e)
+        
+        # 2. Extrair todas as células (ordem da tela -> ordem canônica pelo thead)
+        celulas = scraper.mapa.reordenar(
+            [celula.inner_text().strip() for celula in linha_encontrada.query_selector_all(":scope > td")])
+        
+        # 3. Observação completa e cor da linha (indica status)
+        observacao_celula = linha_encontrada.query_selector("td.t-last")
+        observacao = observacao_celula.inner_text().strip() if observacao_celula else None
+        return dados_da_linha(celulas, linha_encontrada.get_attribute('style') or '', valor_checkbox, observacao,
+                              scraper.mapa)
+    
+    def _dados_linha_html(self, scraper: DataScraper, linha):
+        """Marca a checkbox pela posição da linha; os dados já vieram do HTML do grid"""
+        try:
+            if scraper.marcar_linha(linha):
+                logger.debug("✅ Checkbox marcada - Value: %s", linha.checkbox)
+                time.sleep(1)
+        except PrazoEsgotado:
+            raise
+        except Exception as e:
+            self._conferir_prazo()
+            logger.warning("⚠️  Não consegui marcar a checkbox: %s", e)
+        return dados_da_linha(linha.celulas, linha.estilo, linha.checkbox, linha.observacao, scraper.mapa)
+    
     def extract_invoice_data(self, nota_fiscal: str):
         """Extrai todos os dados da linha da nota fiscal da tabela"""
-        logger.info(f"📊 Extraindo dados completos para nota: {nota_fiscal}")
+        logger.debug("📊 Extraindo dados completos para nota: %s", nota_fiscal)
         
         try:
             # Aguardar tabela de resultados carregar
             try:
-                self.page.wait_for_selector("table", timeout=10000)
+                self.page.wait_for_selector("table", timeout=self._espera(10000))
                 time.sleep(1)
+            except PrazoEsgotado:
+                raise
             except:
-                logger.info(f"🔍 Tabela não encontrada - nota não existe: {nota_fiscal}")
+                self._conferir_prazo()
+                logger.info("🔍 Tabela não encontrada - nota não existe: %s", nota_fiscal)
                 return {"nota_fiscal": nota_fiscal, "status": "Não tem nota", "dados_completos": {}}
             
-            # BUSCAR PELA NOTA FISCAL - Estratégia mais abrangente
-            linhas = self.page.query_selector_all("table tr")
+            # BUSCAR PELA NOTA FISCAL - página a página, parando na primeira que tem a nota
             linha_encontrada = None
-            
-            for linha in linhas:
-                try:
-                    texto_linha = linha.inner_text()
-                    
-                    # Estratégias de busca:
-                    # 1. Busca direta pela nota completa
-                    if nota_fiscal in texto_linha:
-                        linha_encontrada = linha
-                        logger.info(f"✅ Nota encontrada (busca direta): {nota_fiscal}")
-                        break
-                    
-                    # 2. Busca pelos últimos dígitos (pode estar truncada)
-                    ultimos_12_digitos = nota_fiscal[-12:]
-                    if ultimos_12_digitos in texto_linha:
-                        linha_encontrada = linha
-                        logger.info(f"✅ Nota encontrada (últimos 12 dígitos): {ultimos_12_digitos}")
-                        break
-                        
-                    # 3. Busca por parte da chave (pode estar em colunas diferentes)
-                    partes_nota = [nota_fiscal[i:i+8] for i in range(0, len(nota_fiscal), 8)]
-                    for parte in partes_nota:
-                        if parte in texto_linha:
-                            linha_encontrada = linha
-                            logger.info(f"✅ Nota encontrada (parte: {parte})")
-                            break
-                    if linha_encontrada:
+            scraper = DataScraper(self.page, backend=self.backend_grid)
+            scraper.prazo = self.prazo
+            with closing(scraper.paginas()) as paginas:
+                for pagina, celulas in paginas:
+                    idx = self._localizar_linha(celulas, nota_fiscal)
+                    if idx is not None:
+                        # Backend html: a linha já veio inteira do HTML, sem ElementHandle
+                        if scraper.backend == "html":
+                            linha_encontrada = scraper.linhas_html[idx]
+                        else:
+                            linha_encontrada = self._linha_do_grid(idx)
+                        logger.debug("✅ Nota encontrada na página %s", pagina)
                         break
-                        
-                except Exception as e:
-                    logger.warning(f"⚠️  Erro ao buscar linha: {e}")
-                    continue
             
             if not linha_encontrada:
-                logger.info(f"🔍 Nota não encontrada na tabela após busca completa: {nota_fiscal}")
+                logger.info("🔍 Nota não encontrada na tabela após busca completa: %s", nota_fiscal)
                 # DEBUG: Mostra o que tem na tabela
                 try:
-                    primeira_linha = self.page.query_selector("table tr")
+                    # inner_text() é uma ida ao navegador: só paga se o DEBUG estiver ligado
+                    primeira_linha = self.page.query_selector("table tr") if logger.isEnabledFor(logging.DEBUG) else None
                     if primeira_linha:
-                        logger.info(f"🔍 Primeira linha da tabela: {primeira_linha.inner_text()[:200]}...")
+                        logger.debug("🔍 Primeira linha da tabela: %s...", primeira_linha.inner_text()[:200])
                 except:
                     pass
                 return {"nota_fiscal": nota_fiscal, "status": "Não tem nota", "dados_completos": {}}
             
             # EXTRAIR DADOS DA LINHA ENCONTRADA
-            logger.info("🎯 Extraindo dados da linha encontrada...")
-            
-            # 1. Marcar a checkbox
-            checkbox = linha_encontrada.query_selector("input[type='checkbox'][name='checkedRecords']")
-            if checkbox:
-                try:
-                    checkbox.check()
-                    valor_checkbox = checkbox.get_attribute('value') or ''
-                    logger.info(f"✅ Checkbox marcada - Value: {valor_checkbox}")
-                    time.sleep(1)
-                except Exception as e:
-                    logger.warning(f"⚠️  Não consegui marcar a checkbox: {e}")
-            
-            # 2. Extrair todas as células
-            celulas = linha_encontrada.query_selector_all("td")
-            dados_linha = {}
-            
-            # Mapeamento baseado no HTML que você mostrou
-            headers = [
-                'checkbox', 'codigo', 'numero_documento', 'chave_acesso', 'chave_consulta', 
-                'tipo_documento', 'data_processamento', 'status', 'icone1', 'icone2', 
-                'icone3', 'icone4', 'icone5', 'valor_total', 'valor_oculto', 
-                'data_emissao', 'id_interno', 'nome_empresa', 'oculto', 'observacao'
-            ]
-            
-            for i, celula in enumerate(celulas):
-                if i < len(headers):
-                    chave = headers[i]
-                    valor = celula.inner_text().strip()
-                    dados_linha[chave] = valor
-                    logger.info(f"   📝 {chave}: {valor}")
-                else:
-                    chave = f"coluna_extra_{i}"
-                    valor = celula.inner_text().strip()
-                    dados_linha[chave] = valor
-            
-            # 3. Extrair dados específicos importantes
-            # Status limpo (sem o link de ajuda)
-            if celulas and len(celulas) > 7:
-                status_com_limpeza = celulas[7].inner_text()
-                status_limpo = status_com_limpeza.split('Clique aqui')[0].strip() if 'Clique aqui' in status_com_limpeza else status_com_limpeza
-                dados_linha['status_limpo'] = status_limpo
-                logger.info(f"✅ Status detalhado: {status_limpo}")
-            
-            # Observação completa
-            observacao_celula = linha_encontrada.query_selector("td.t-last")
-            if observacao_celula:
-                observacao = observacao_celula.inner_text().strip()
-                dados_linha['observacao_completa'] = observacao
-                logger.info(f"📋 Observação completa: {observacao}")
-            
-            # Cor da linha (indica status)
-            cor_linha = linha_encontrada.get_attribute('style') or ''
-            if 'color: rgb(255, 0, 0)' in cor_linha:
-                dados_linha['cor_status'] = 'VERMELHO-REJEITADO'
-                logger.info("🎨 Status visual: REJEITADO (vermelho)")
+            logger.debug("🎯 Extraindo dados da linha encontrada...")
             
-            # Valor do checkbox
-            if checkbox:
-                dados_linha['checkbox_value'] = valor_checkbox
+            if scraper.backend == "html":
+                dados_linha = self._dados_linha_html(scraper, linha_encontrada)
+            else:
+                dados_linha = self._dados_linha_handles(scraper, linha_encontrada)
+            for chave, valor in dados_linha.items():
+                logger.debug("   📝 %s: %s", chave, valor)
             
-            logger.info(f"✅ Dados extraídos com sucesso: {len(dados_linha)} campos")
+            # Um único evento estruturado por nota no lugar do log célula a célula
+            logger.info("✅ Dados extraídos: %s campos", len(dados_linha),
+                        extra={"chave": nota_fiscal, "status": dados_linha.get('status_limpo', dados_linha.get('status')),
+                               "observacao": dados_linha.get('observacao_completa', '')})
             
             return {
                 "nota_fiscal": nota_fiscal,
@@ -527,8 +594,11 @@ class AuthManager:
                 "dados_completos": dados_linha
             }
             
+        except PrazoEsgotado:
+            raise
         except Exception as e:
-            logger.error(f"❌ Erro ao extrair dados: {e}")
+            self._conferir_prazo()
+            logger.error("❌ Erro ao extrair dados: %s", e)
             return {
                 "nota_fiscal": nota_fiscal,
                 "status": f"Erro: {e}",
@@ -552,7 +622,7 @@ class AuthManager:
             
             try:
                 # 1. Clicar no botão "Reprocessar"
-                logger.info("1. 📝 Clicando em 'Reprocessar'...")
+                logger.debug("1. 📝 Clicando em 'Reprocessar'...")
                 reprocessar_selectors = [
                     "div.div-action-act.Reprocess",
                     "div[title*='Reprocessar']",
@@ -565,7 +635,7 @@ class AuthManager:
                 for selector in reprocessar_selectors:
                     if self.wait_and_click(selector, "botão Reprocessar"):
                         reprocessado = True
-                        logger.info(f"✅ Botão Reprocessar clicado com: {selector}")
+                        logger.debug("✅ Botão Reprocessar clicado com: %s", selector)
                         break
                 
                 if not reprocessado:
@@ -576,7 +646,7 @@ class AuthManager:
                 time.sleep(3)
                 
                 # 2. Marcar radio button "Normal" (já vem checked, mas vamos garantir)
-                logger.info("2. 🔘 Marcando opção 'Normal'...")
+                logger.debug("2. 🔘 Marcando opção 'Normal'...")
                 normal_selectors = [
                     "input#EmissionType[value='0']",
                     "input[name='EmissionType'][value='0']",
@@ -586,17 +656,20 @@ class AuthManager:
                 normal_marcado = False
                 for selector in normal_selectors:
                     try:
-                        self.page.wait_for_selector(selector, timeout=5000)
+                        self.page.wait_for_selector(selector, timeout=self._espera(5000))
                         # Só clica se não estiver checked
                         is_checked = self.page.is_checked(selector)
                         if not is_checked:
                             self.page.click(selector)
-                            logger.info(f"✅ Radio 'Normal' marcado com: {selector}")
+                            logger.debug("✅ Radio 'Normal' marcado com: %s", selector)
                         else:
-                            logger.info("✅ Radio 'Normal' já estava marcado")
+                            logger.debug("✅ Radio 'Normal' já estava marcado")
                         normal_marcado = True
                         break
+                    except PrazoEsgotado:
+                        raise
                     except:
+                        self._conferir_prazo()
                         continue
                 
                 if not normal_marcado:
@@ -605,7 +678,7 @@ class AuthManager:
                 time.sleep(1)
                 
                 # 3. Clicar em "OK"
-                logger.info("3. ✅ Clicando em 'OK'...")
+                logger.debug("3. ✅ Clicando em 'OK'...")
                 ok_selectors = [
                     "span.ui-button-text:has-text('OK')",
                     "button:has-text('OK')",
@@ -618,7 +691,7 @@ class AuthManager:
                 for selector in ok_selectors:
                     if self.wait_and_click(selector, "botão OK"):
                         ok_clicado = True
-                        logger.info(f"✅ Botão OK clicado com: {selector}")
+                        logger.debug("✅ Botão OK clicado com: %s", selector)
                         break
                 
                 if not ok_clicado:
@@ -627,10 +700,13 @@ class AuthManager:
                 
                 # Aguardar processamento
                 time.sleep(3)
-                self.page.wait_for_load_state("networkidle")
+                self.page.wait_for_load_state("networkidle", timeout=self._espera())
                 logger.info("✅ Reprocessamento concluído com sucesso!")
                 return True
                 
+            except PrazoEsgotado:
+                raise
             except Exception as e:
-                logger.error(f"❌ Erro durante reprocessamento: {e}")
+                self._conferir_prazo()
+                logger.error("❌ Erro durante reprocessamento: %s", e)
                 return False
\ No newline at end of file
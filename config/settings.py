@@ -1,27 +1,198 @@
 import os
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from utils.browser_launch import CACHE_PADRAO as CACHE_NAVEGADOR
+from utils.har_replay import HAR_PADRAO, IGNORAR_PADRAO
+from utils.logging_config import parse_levels
+from utils.protocol_cache import CACHE_PADRAO
+from utils.xml_store import LIMITE_PADRAO_MB
 
 @dataclass
 class ProxyConfig:
     host: str = "10.141.6.12"
     port: int = 80
 
+@dataclass
+class ProxyPoolConfig:
+    intervalo_s: float = 60.0  # sondagem em segundo plano (só com 2+ proxies)
+    timeout_s: float = 10.0
+    url_teste: str = "http://nfecd-gpa.unisys.com.br/eFormseMonitor/"
+    janela: int = 20  # últimas sondagens/notas consideradas por proxy
+    taxa_erro_max: float = 0.3  # acima disso o proxy é degradado
+    latencia_max_s: float = 5.0
+
+def parse_proxies(texto: str) -> List[ProxyConfig]:
+    """'10.141.6.12:80,10.141.6.13:8080' -> [ProxyConfig, ...] (porta padrão 80)"""
+    proxies = []
+    for item in texto.split(','):
+        item = item.strip()
+        if item:
+            host, _, porta = item.partition(':')
+            proxies.append(ProxyConfig(host=host, port=int(porta or 80)))
+    return proxies
+
+@dataclass
+class MonitorAccount:
+    user: str
+    password: str
+
+def parse_monitor_accounts(texto: str) -> List[MonitorAccount]:
+    """'usuario1:senha1;usuario2:senha2' -> [MonitorAccount, ...] (a senha pode conter ':')"""
+    contas = []
+    for item in texto.split(';'):
+        usuario, separador, senha = item.strip().partition(':')
+        if usuario and separador:
+            contas.append(MonitorAccount(usuario, senha))
+    return contas
+
 @dataclass
 class Credentials:
     email: str
     password: str
     monitor_user: str
     monitor_password: str
+    monitor_accounts: List[MonitorAccount] = field(default_factory=list)  # pool; vazio = só monitor_user
+
+@dataclass
+class AccountPoolConfig:
+    sessoes_por_conta: int = 1  # contextos logados ao mesmo tempo com a mesma conta do monitor
+    taxa_inicial: float = 0.5  # ações/s de cada conta (limitador próprio, além do global)
+    taxa_max: float = 1.0
+    espera_s: float = 120.0  # login que não passou da tela (sem recusa explícita): conta em espera por este tempo
+    max_esperas: int = 3  # esperas seguidas sem nenhuma nota ok antes de a conta sair do pool
+
+@dataclass
+class LoggingConfig:
+    level: str = "INFO"
+    console_level: str = "WARNING"
+    levels: Dict[str, str] = field(default_factory=dict)  # nível por subsistema: {'auth': 'DEBUG'}
+    file_path: str = os.path.join("logs", "nf_scraper.ndjson")
+    file_max_bytes: int = 10 * 1024 * 1024
+    file_backups: int = 5
+
+@dataclass
+class DaemonConfig:
+    host: str = "127.0.0.1"  # só aceita conexões locais
+    port: int = 8765
+    workers: int = 1  # sessões logadas mantidas abertas
+    drop_dir: str = "entrada"  # pasta observada para arquivos de notas
+    poll_interval: float = 2.0
+    keepalive_s: int = 300  # ociosidade máxima antes de conferir a sessão
+
+@dataclass
+class PollerConfig:
+    interval_s: int = 120  # intervalo entre consultas de rejeições novas
+    initial_days: int = 1  # janela da primeira consulta, antes de existir marca d'água
+    state_path: str = os.path.join("state", "monitor_watermark.json")
+    max_tentativas: int = 5  # falhas de reprocesso de uma linha antes de ela ir para a fila humana
+    espera_s: float = 300.0  # espera depois da 1ª falha de uma linha (dobra a cada falha seguinte)
+
+@dataclass
+class VerifyConfig:
+    delays: List[int] = field(default_factory=lambda: [60, 180, 600])  # s até cada verificação; vazio desliga
+    window_days: int = 7  # janela máxima de datas coberta por uma consulta de verificação
+    espera_final_s: float = 120.0  # quanto o fim do lote ainda espera por verificações vencendo
+
+@dataclass
+class ExportConfig:
+    enabled: bool = True  # tenta a exportação do grid antes de paginar
+    dir: str = "exportacoes"
+    timeout_ms: int = 60000
+    keep_files: bool = False  # mantém os arquivos baixados após a leitura
+    pausa_s: float = 600.0  # depois de uma exportação que falhou, pagina por este tempo antes de tentar de novo
+
+@dataclass
+class RejectionConfig:
+    enabled: bool = True  # classifica o motivo antes de abrir o Reprocessar
+    aprender: bool = True  # taxas de sucesso por código a partir de sheets/
+    regras: str = ""  # 'EMISSAO_ATRASADA=pular,DUPLICIDADE=fila' (vale antes do aprendido)
+    taxa_minima: float = 0.05  # abaixo disso o reprocesso é considerado inútil
+    min_amostras: int = 20  # reprocessos com desfecho conhecido antes de confiar na taxa
+    acao_futil: str = "fila"  # 'pular' ou 'fila' para os códigos inúteis
+    fila_path: str = os.path.join("sheets", "fila_humana.csv")
+
+@dataclass
+class PlanConfig:
+    enabled: bool = True  # estima a duração do lote antes de abrir o navegador
+    max_workers: int = 3  # sessões simultâneas consideradas
+    auto: bool = False  # usa a quantidade recomendada em vez de só mostrar
+    eficiencia: float = 0.85  # rendimento de cada sessão extra em relação à anterior
+    ganho_minimo: float = 0.15  # redução mínima de tempo para valer mais uma sessão
+
+@dataclass
+class RateConfig:
+    taxa_inicial: float = 0.5  # ações/s no início (equivale à antiga pausa de 2s entre notas)
+    taxa_min: float = 0.1
+    taxa_max: float = 2.0
+    incremento_taxa: float = 0.05  # aumento aditivo por ação bem-sucedida
+    concorrencia_inicial: int = 1  # ações simultâneas no servidor, somando todas as sessões
+    concorrencia_max: int = 4
+    latencia_alvo_s: float = 20.0  # acima disso uma ação (pesquisa, reprocesso) conta como sinal de sobrecarga
+    latencia_alvo_lote_s: float = 300.0  # o mesmo para as ações de lote (consulta do monitor, reprocesso em lote)
+    intervalo_reducao_s: float = 20.0  # mínimo entre dois cortes multiplicativos
+    beta: float = 0.5  # fator do corte multiplicativo em erro/timeout/lentidão
+
+@dataclass
+class DeadlineConfig:
+    enabled: bool = True
+    nota_s: float = 180.0  # orçamento total de uma nota (pesquisa + extração + reprocesso)
+    pesquisa_s: float = 60.0
+    extracao_s: float = 45.0
+    reprocesso_s: float = 60.0
+    espera_ms: int = 30000  # teto de cada espera do Playwright (antes fixo no AuthManager)
+    recolocar: int = 1  # vezes que uma nota com prazo esgotado volta para o fim da fila
+
+@dataclass
+class RecycleConfig:
+    enabled: bool = True
+    telemetria: bool = True  # amostra JSHeapUsedSize/Nodes/Documents (CDP) depois de cada nota
+    modo: str = "pagina"  # "pagina" (nova aba no mesmo contexto) ou "contexto" (novo contexto com os cookies)
+    max_notas: int = 200  # recicla depois de tantas notas na mesma página (0 = só por memória)
+    heap_max_mb: float = 300.0
+    nos_max: int = 150000
+
+@dataclass
+class BrowserConfig:
+    perfil: str = "padrao"  # utils.browser_launch.PERFIS: padrao | enxuto
+    cache_dir: str = CACHE_NAVEGADOR  # cache de disco reaproveitado entre execuções (perfil enxuto)
+
+@dataclass
+class GridConfig:
+    backend: str = "handles"  # handles (células lidas no navegador) | html (outerHTML interpretado em Python)
+
+@dataclass
+class HarConfig:
+    modo: str = "off"  # off | gravar (sessão real -> HAR sem credenciais) | reproduzir (offline a partir do HAR)
+    caminho: str = HAR_PADRAO  # contextos seguintes da gravação viram unisys-2.har, unisys-3.har...
+    ignorar: List[str] = field(default_factory=lambda: list(IGNORAR_PADRAO))  # campos fora da comparação no replay
 
 @dataclass
 class AppConfig:
     proxy: ProxyConfig
     credentials: Credentials
     notas_fiscais: List[str]
+    proxies: List[ProxyConfig] = field(default_factory=list)  # pool (PROXIES); vazio = só `proxy`
+    proxy_pool: ProxyPoolConfig = field(default_factory=ProxyPoolConfig)
+    accounts: AccountPoolConfig = field(default_factory=AccountPoolConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    daemon: DaemonConfig = field(default_factory=DaemonConfig)
+    poller: PollerConfig = field(default_factory=PollerConfig)
+    verify: VerifyConfig = field(default_factory=VerifyConfig)
+    export: ExportConfig = field(default_factory=ExportConfig)
+    rejection: RejectionConfig = field(default_factory=RejectionConfig)
+    plan: PlanConfig = field(default_factory=PlanConfig)
+    rate: RateConfig = field(default_factory=RateConfig)
+    deadline: DeadlineConfig = field(default_factory=DeadlineConfig)
+    recycle: RecycleConfig = field(default_factory=RecycleConfig)
+    browser: BrowserConfig = field(default_factory=BrowserConfig)
+    har: HarConfig = field(default_factory=HarConfig)
+    grid: GridConfig = field(default_factory=GridConfig)
+    protocol_cache: str = CACHE_PADRAO  # sqlite chave -> protocolo (nProt)
+    xml_store_max_mb: int = LIMITE_PADRAO_MB  # depósito xmls/ (LRU acima disso)
     headless: bool = True
-    timeout: int = 60000
-    slow_mo: int = 100
+    timeout: int = 60000  # timeout padrão do contexto (cliques, preenchimentos, navegação)
+    slow_mo: int = 0  # atraso entre ações do Playwright (ms), só para depuração visual
     fluxo: int = 1  # ← NOVO: 1 = Unisys, 2 = Sefaz
     
     @classmethod
@@ -33,19 +204,134 @@ class AppConfig:
             chave_unica = os.getenv('CHAVE_NOT', '')
             notas_fiscais = [chave_unica] if chave_unica else []
         
+        proxy = ProxyConfig(
+            host=os.getenv('PROXY_HOST', '10.141.6.12'),
+            port=int(os.getenv('PROXY_PORT', '80'))
+        )
+        
         return cls(
-            proxy=ProxyConfig(
-                host=os.getenv('PROXY_HOST', '10.141.6.12'),
-                port=int(os.getenv('PROXY_PORT', '80'))
+            proxy=proxy,
+            proxies=parse_proxies(os.getenv('PROXIES', '')) or [proxy],
+            proxy_pool=ProxyPoolConfig(
+                intervalo_s=float(os.getenv('PROXY_CHECK_INTERVAL', '60')),
+                timeout_s=float(os.getenv('PROXY_CHECK_TIMEOUT', '10')),
+                url_teste=os.getenv('PROXY_CHECK_URL', ProxyPoolConfig.url_teste),
+                janela=int(os.getenv('PROXY_CHECK_WINDOW', '20')),
+                taxa_erro_max=float(os.getenv('PROXY_MAX_ERROR_RATE', '0.3')),
+                latencia_max_s=float(os.getenv('PROXY_MAX_LATENCY_S', '5'))
             ),
             credentials=Credentials(
                 email=os.getenv('EMAIL'),
                 password=os.getenv('PASSWORD'),
                 monitor_user=os.getenv('MONITOR_USER'),
-                monitor_password=os.getenv('MONITOR_PASSWORD')
+                monitor_password=os.getenv('MONITOR_PASSWORD'),
+                monitor_accounts=parse_monitor_accounts(os.getenv('MONITOR_ACCOUNTS', ''))
+                or [MonitorAccount(os.getenv('MONITOR_USER'), os.getenv('MONITOR_PASSWORD'))]
+            ),
+            accounts=AccountPoolConfig(
+                sessoes_por_conta=int(os.getenv('ACCOUNT_MAX_SESSIONS', '1')),
+                taxa_inicial=float(os.getenv('ACCOUNT_INITIAL_RPS', '0.5')),
+                taxa_max=float(os.getenv('ACCOUNT_MAX_RPS', '1.0')),
+                espera_s=float(os.getenv('ACCOUNT_RETRY_S', '120')),
+                max_esperas=int(os.getenv('ACCOUNT_MAX_RETRIES', '3'))
             ),
             notas_fiscais=notas_fiscais,
+            logging=LoggingConfig(
+                level=os.getenv('LOG_LEVEL', 'INFO'),
+                console_level=os.getenv('LOG_CONSOLE_LEVEL', 'WARNING'),
+                levels=parse_levels(os.getenv('LOG_LEVELS', '')),
+                file_path=os.getenv('LOG_FILE', os.path.join('logs', 'nf_scraper.ndjson')),
+                file_max_bytes=int(os.getenv('LOG_FILE_MAX_MB', '10')) * 1024 * 1024,
+                file_backups=int(os.getenv('LOG_FILE_BACKUPS', '5'))
+            ),
+            daemon=DaemonConfig(
+                host=os.getenv('DAEMON_HOST', '127.0.0.1'),
+                port=int(os.getenv('DAEMON_PORT', '8765')),
+                workers=int(os.getenv('DAEMON_WORKERS', '1')),
+                drop_dir=os.getenv('DAEMON_DROP_DIR', 'entrada'),
+                poll_interval=float(os.getenv('DAEMON_POLL_INTERVAL', '2')),
+                keepalive_s=int(os.getenv('DAEMON_KEEPALIVE', '300'))
+            ),
+            poller=PollerConfig(
+                interval_s=int(os.getenv('POLL_INTERVAL', '120')),
+                initial_days=int(os.getenv('POLL_INITIAL_DAYS', '1')),
+                state_path=os.getenv('POLL_STATE_FILE', os.path.join('state', 'monitor_watermark.json')),
+                max_tentativas=int(os.getenv('POLL_MAX_RETRIES', '5')),
+                espera_s=float(os.getenv('POLL_RETRY_S', '300'))
+            ),
+            verify=VerifyConfig(
+                delays=[int(d) for d in os.getenv('VERIFY_DELAYS', '60,180,600').split(',') if d.strip()],
+                window_days=int(os.getenv('VERIFY_WINDOW_DAYS', '7')),
+                espera_final_s=float(os.getenv('VERIFY_FINAL_WAIT_S', '120'))
+            ),
+            export=ExportConfig(
+                enabled=os.getenv('GRID_EXPORT', 'true').lower() == 'true',
+                dir=os.getenv('GRID_EXPORT_DIR', 'exportacoes'),
+                timeout_ms=int(os.getenv('GRID_EXPORT_TIMEOUT', '60000')),
+                keep_files=os.getenv('GRID_EXPORT_KEEP', 'false').lower() == 'true',
+                pausa_s=float(os.getenv('GRID_EXPORT_RETRY_S', '600'))
+            ),
+            rejection=RejectionConfig(
+                enabled=os.getenv('REJECTION_POLICY', 'true').lower() == 'true',
+                aprender=os.getenv('REJECTION_LEARN', 'true').lower() == 'true',
+                regras=os.getenv('REJECTION_RULES', ''),
+                taxa_minima=float(os.getenv('REJECTION_MIN_RATE', '0.05')),
+                min_amostras=int(os.getenv('REJECTION_MIN_SAMPLES', '20')),
+                acao_futil=os.getenv('REJECTION_FUTILE_ACTION', 'fila').lower(),
+                fila_path=os.getenv('REJECTION_QUEUE_FILE', os.path.join('sheets', 'fila_humana.csv'))
+            ),
+            plan=PlanConfig(
+                enabled=os.getenv('PLAN', 'true').lower() == 'true',
+                max_workers=int(os.getenv('PLAN_MAX_WORKERS', '3')),
+                auto=os.getenv('PLAN_AUTO', 'false').lower() == 'true',
+                eficiencia=float(os.getenv('PLAN_EFFICIENCY', '0.85')),
+                ganho_minimo=float(os.getenv('PLAN_MIN_GAIN', '0.15'))
+            ),
+            rate=RateConfig(
+                taxa_inicial=float(os.getenv('RATE_INITIAL_RPS', '0.5')),
+                taxa_min=float(os.getenv('RATE_MIN_RPS', '0.1')),
+                taxa_max=float(os.getenv('RATE_MAX_RPS', '2.0')),
+                incremento_taxa=float(os.getenv('RATE_INCREASE_RPS', '0.05')),
+                concorrencia_inicial=int(os.getenv('RATE_INITIAL_CONCURRENCY', '1')),
+                concorrencia_max=int(os.getenv('RATE_MAX_CONCURRENCY', '4')),
+                latencia_alvo_s=float(os.getenv('RATE_TARGET_LATENCY_S', '20')),
+                latencia_alvo_lote_s=float(os.getenv('RATE_BATCH_TARGET_LATENCY_S', '300')),
+                intervalo_reducao_s=float(os.getenv('RATE_BACKOFF_INTERVAL_S', '20')),
+                beta=float(os.getenv('RATE_BACKOFF', '0.5'))
+            ),
+            deadline=DeadlineConfig(
+                enabled=os.getenv('DEADLINE', 'true').lower() == 'true',
+                nota_s=float(os.getenv('DEADLINE_NOTE_S', '180')),
+                pesquisa_s=float(os.getenv('DEADLINE_SEARCH_S', '60')),
+                extracao_s=float(os.getenv('DEADLINE_EXTRACT_S', '45')),
+                reprocesso_s=float(os.getenv('DEADLINE_REPROCESS_S', '60')),
+                espera_ms=int(os.getenv('DEADLINE_WAIT_MS', '30000')),
+                recolocar=int(os.getenv('DEADLINE_REQUEUE', '1'))
+            ),
+            browser=BrowserConfig(
+                perfil=os.getenv('BROWSER_PROFILE', 'padrao').lower(),
+                cache_dir=os.getenv('BROWSER_CACHE_DIR', CACHE_NAVEGADOR)
+            ),
+            recycle=RecycleConfig(
+                enabled=os.getenv('RECYCLE', 'true').lower() == 'true',
+                telemetria=os.getenv('PAGE_TELEMETRY', 'true').lower() == 'true',
+                modo=os.getenv('RECYCLE_MODE', 'pagina').lower(),
+                max_notas=int(os.getenv('RECYCLE_MAX_NOTES', '200')),
+                heap_max_mb=float(os.getenv('RECYCLE_MAX_HEAP_MB', '300')),
+                nos_max=int(os.getenv('RECYCLE_MAX_NODES', '150000'))
+            ),
+            grid=GridConfig(
+                backend=os.getenv('GRID_BACKEND', 'handles').lower()
+            ),
+            har=HarConfig(
+                modo=os.getenv('HAR_MODE', 'off').lower(),
+                caminho=os.getenv('HAR_PATH', HAR_PADRAO),
+                ignorar=[c.strip() for c in os.getenv('HAR_IGNORE_FIELDS', ','.join(IGNORAR_PADRAO)).split(',') if c.strip()]
+            ),
+            protocol_cache=os.getenv('PROTOCOL_CACHE', CACHE_PADRAO),
+            xml_store_max_mb=int(os.getenv('XML_STORE_MAX_MB', str(LIMITE_PADRAO_MB))),
             headless=os.getenv('HEADLESS', 'true').lower() == 'true',
-            slow_mo=int(os.getenv('SLOW_MO', '100')),
+            timeout=int(os.getenv('TIMEOUT_MS', '60000')),
+            slow_mo=int(os.getenv('SLOW_MO', '0')),
             fluxo=int(os.getenv('FLUXO', '1'))  # ← NOVO
         )
\ No newline at end of file
@@ -0,0 +1,11 @@
+@echo off
+echo ====================================
+echo  DAEMON NF-SCRAPER (sessoes aquecidas)
+echo ====================================
+
+echo.
+echo Iniciando daemon com Python do environment...
+"nf_scraper_env\python.exe" main.py --daemon
+
+echo.
+pause
\ No newline at end of file
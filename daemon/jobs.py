@@ -0,0 +1,111 @@
+import time
+import uuid
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def normalizar_notas(payload: Any) -> List[Dict[str, Any]]:
+    """Aceita lista de chaves, lista no formato do notas_fiscais.json ou {"chaves"/"notas": [...]}"""
+    if isinstance(payload, dict):
+        payload = payload.get('notas', payload.get('chaves', []))
+    if not isinstance(payload, list):
+        raise ValueError("Esperado uma lista de chaves ou de notas")
+
+    notas = []
+    for item in payload:
+        if isinstance(item, str):
+            chave = item.strip()
+            if chave:
+                notas.append({"chave": chave})
+        elif isinstance(item, dict) and item.get('chave'):
+            notas.append(item)
+        else:
+            raise ValueError(f"Item inválido: {item!r}")
+    return notas
+
+
+@dataclass
+class Job:
+    """Um pedido de processamento; os resultados chegam nota a nota"""
+    notas: List[Dict[str, Any]]
+    origem: str = "api"
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    criado_em: float = field(default_factory=time.time)
+    finalizado_em: Optional[float] = None
+    resultados: List[Dict[str, Any]] = field(default_factory=list)
+    _cond: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def concluido(self) -> bool:
+        return len(self.resultados) >= len(self.notas)
+
+    def adicionar_resultado(self, resultado: Dict[str, Any]):
+        with self._cond:
+            self.resultados.append(resultado)
+            if self.concluido:
+                self.finalizado_em = time.time()
+            self._cond.notify_all()
+
+    def acompanhar(self, timeout: float = 30.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """Gera cada resultado assim que fica pronto; None sinaliza espera sem novidade (keep-alive)"""
+        entregues = 0
+        while True:
+            with self._cond:
+                if entregues >= len(self.resultados) and not self.concluido:
+                    self._cond.wait(timeout)
+                novos = self.resultados[entregues:]
+                terminou = self.concluido
+            if not novos and not terminou:
+                yield None
+            for resultado in novos:
+                yield resultado
+            entregues += len(novos)
+            if terminou and entregues >= len(self.notas):
+                return
+
+    def resumo(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "origem": self.origem,
+            "total": len(self.notas),
+            "processadas": len(self.resultados),
+            "concluido": self.concluido,
+            "criado_em": self.criado_em,
+            "finalizado_em": self.finalizado_em,
+        }
+
+
+class JobRegistry:
+    """Guarda os jobs e a fila de notas compartilhada pelos workers"""
+
+    def __init__(self, max_jobs: int = 200):
+        self.max_jobs = max_jobs
+        self.jobs: Dict[str, Job] = {}
+        self.tarefas: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+
+    def submeter(self, notas: List[Dict[str, Any]], origem: str = "api") -> Job:
+        job = Job(notas=notas, origem=origem)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._descartar_antigos()
+        # Cada nota é uma tarefa: vários workers dividem o mesmo job
+        for nota in notas:
+            self.tarefas.put((job, nota))
+        return job
+
+    def obter(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def listar(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [job.resumo() for job in self.jobs.values()]
+
+    def _descartar_antigos(self):
+        concluidos = [job for job in self.jobs.values() if job.concluido]
+        excesso = len(self.jobs) - self.max_jobs
+        for job in sorted(concluidos, key=lambda j: j.criado_em)[:max(excesso, 0)]:
+            del self.jobs[job.id]
@@ -0,0 +1,86 @@
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from daemon.jobs import JobRegistry, normalizar_notas
+
+logger = logging.getLogger(__name__)
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """API local de jobs
+
+    POST /jobs              corpo: ["chave", ...] | [{"chave": ...}, ...] | {"chaves": [...]}
+    GET  /jobs              lista os jobs
+    GET  /jobs/<id>         resumo + resultados até o momento
+    GET  /jobs/<id>/stream  resultados em NDJSON, uma linha por nota assim que termina
+    GET  /health            estado dos workers
+    """
+
+    server: "JobServer"
+
+    def log_message(self, format, *args):
+        logger.debug("🌐 %s - " + format, self.address_string(), *args)
+
+    def _responder_json(self, codigo: int, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            return self._responder_json(404, {"erro": "rota não encontrada"})
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+            notas = normalizar_notas(json.loads(self.rfile.read(tamanho) or b'[]'))
+        except (ValueError, json.JSONDecodeError) as e:
+            return self._responder_json(400, {"erro": str(e)})
+        if not notas:
+            return self._responder_json(400, {"erro": "nenhuma nota informada"})
+
+        job = self.server.registry.submeter(notas, origem="api")
+        logger.info("📥 Job %s recebido pela API: %s notas", job.id, len(notas))
+        self._responder_json(202, {**job.resumo(), "stream": f"/jobs/{job.id}/stream"})
+
+    def do_GET(self):
+        partes = [p for p in self.path.split('?')[0].split('/') if p]
+
+        if partes == ['health']:
+            return self._responder_json(200, self.server.health())
+        if partes == ['jobs']:
+            return self._responder_json(200, self.server.registry.listar())
+        if len(partes) in (2, 3) and partes[0] == 'jobs':
+            job = self.server.registry.obter(partes[1])
+            if not job:
+                return self._responder_json(404, {"erro": "job não encontrado"})
+            if len(partes) == 2:
+                return self._responder_json(200, {**job.resumo(), "resultados": list(job.resultados)})
+            if partes[2] == 'stream':
+                return self._stream(job)
+        self._responder_json(404, {"erro": "rota não encontrada"})
+
+    def _stream(self, job):
+        # Sem Content-Length: o cliente lê até o servidor fechar a conexão
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.end_headers()
+        try:
+            for resultado in job.acompanhar():
+                linha = {"keepalive": True} if resultado is None else resultado
+                self.wfile.write((json.dumps(linha, ensure_ascii=False, default=str) + "\n").encode('utf-8'))
+                self.wfile.flush()
+            self.wfile.write((json.dumps({"fim": True, **job.resumo()}) + "\n").encode('utf-8'))
+        except (BrokenPipeError, ConnectionResetError):
+            logger.debug("🔌 Cliente desconectou do stream do job %s", job.id)
+
+
+class JobServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, registry: JobRegistry, health):
+        super().__init__(endereco, JobRequestHandler)
+        self.registry = registry
+        self.health = health
@@ -0,0 +1,71 @@
+import time
+import logging
+import threading
+from typing import Callable
+
+from daemon.jobs import JobRegistry
+from daemon.server import JobServer
+from daemon.watcher import DropFolderWatcher
+from daemon.workers import SessionWorker
+from utils.account_pool import contas_compartilhadas
+from utils.proxy_pool import pool_compartilhado
+from utils.rate_control import controlador_compartilhado
+
+logger = logging.getLogger(__name__)
+
+
+class NFScraperDaemon:
+    """Processo residente: sessões logadas aquecidas + API local + pasta de entrada"""
+
+    def __init__(self, config, app_factory: Callable):
+        self.config = config
+        self.registry = JobRegistry()
+        self.parar = threading.Event()
+        self.inicio = time.time()
+        self.workers = [
+            SessionWorker(f"sessao-{i + 1}", self.registry, app_factory, config, self.parar)
+            for i in range(max(1, config.daemon.workers))
+        ]
+        self.watcher = DropFolderWatcher(config.daemon.drop_dir, self.registry,
+                                         config.daemon.poll_interval, self.parar)
+        self.server = JobServer((config.daemon.host, config.daemon.port), self.registry, self.health)
+        self.servindo = False  # server.shutdown() só retorna depois que um serve_forever começou
+
+    def health(self):
+        return {
+            "uptime_s": round(time.time() - self.inicio),
+            "fila": self.registry.tarefas.qsize(),
+            "workers": [
+                {"nome": w.name, "pronto": w.pronto, "notas": w.notas_processadas, "vivo": w.is_alive()}
+                for w in self.workers
+            ],
+            "limitador": controlador_compartilhado(self.config.rate).metricas(),
+            "proxies": pool_compartilhado(self.config).metricas(),
+            "contas": contas_compartilhadas(self.config).metricas(),
+        }
+
+    def serve_forever(self):
+        for worker in self.workers:
+            worker.start()
+        self.watcher.start()
+
+        host, port = self.server.server_address[:2]
+        print(f"🛰️  Daemon ativo em http://{host}:{port} | pasta de entrada: {self.config.daemon.drop_dir}")
+        print(f"   {len(self.workers)} sessão(ões) sendo aquecida(s)... Ctrl+C para encerrar")
+        try:
+            self.servindo = True
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Encerrando daemon...")
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self.parar.set()
+        if self.servindo:
+            # Encerra o loop do serve_forever (de outra thread ou já encerrado) antes de fechar o socket
+            self.server.shutdown()
+        self.server.server_close()
+        for worker in self.workers:
+            worker.join(timeout=30)
+        print("🔚 Daemon encerrado.")
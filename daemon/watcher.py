@@ -0,0 +1,84 @@
+import os
+import json
+import shutil
+import logging
+import threading
+from typing import Dict, List, Tuple
+
+from daemon.jobs import JobRegistry, normalizar_notas
+
+logger = logging.getLogger(__name__)
+
+
+class DropFolderWatcher(threading.Thread):
+    """Observa a pasta de entrada: cada .json (lista de chaves ou notas_fiscais.json) vira um job
+
+    entrada/arquivo.json             -> movido para entrada/processando/
+    entrada/resultados/arquivo.ndjson <- uma linha por nota, escrita assim que termina
+
+    Um arquivo só é consumido quando tamanho e data de modificação não mudam entre
+    duas varreduras (ainda pode estar sendo copiado). Quem gera o arquivo pode também
+    gravá-lo como .json.tmp e renomear no fim, que é atômico.
+    """
+
+    def __init__(self, pasta: str, registry: JobRegistry, intervalo: float, parar: threading.Event):
+        super().__init__(name="drop-folder", daemon=True)
+        self.pasta = pasta
+        self.registry = registry
+        self.intervalo = intervalo
+        self.parar = parar
+        self.processando = os.path.join(pasta, "processando")
+        self.resultados = os.path.join(pasta, "resultados")
+        self._assinaturas: Dict[str, Tuple[int, int]] = {}  # nome -> (tamanho, mtime) da varredura anterior
+        for caminho in (self.pasta, self.processando, self.resultados):
+            os.makedirs(caminho, exist_ok=True)
+
+    def run(self):
+        while not self.parar.is_set():
+            for nome in self._estaveis():
+                self._consumir(nome)
+            self.parar.wait(self.intervalo)
+
+    def _estaveis(self) -> List[str]:
+        """.json da pasta que não mudaram desde a varredura anterior"""
+        atuais = {}
+        for nome in sorted(os.listdir(self.pasta)):
+            if not nome.lower().endswith('.json'):
+                continue
+            try:
+                info = os.stat(os.path.join(self.pasta, nome))
+            except OSError:
+                continue  # renomeado/apagado no meio da varredura
+            atuais[nome] = (info.st_size, info.st_mtime_ns)
+        estaveis = [nome for nome, assinatura in atuais.items() if self._assinaturas.get(nome) == assinatura]
+        self._assinaturas = {nome: assinatura for nome, assinatura in atuais.items() if nome not in estaveis}
+        return estaveis
+
+    def _consumir(self, nome: str):
+        origem = os.path.join(self.pasta, nome)
+        destino = os.path.join(self.processando, nome)
+        try:
+            # Move antes de ler: o arquivo sai da pasta mesmo se estiver inválido
+            shutil.move(origem, destino)
+            with open(destino, 'r', encoding='utf-8') as arquivo:
+                notas = normalizar_notas(json.load(arquivo))
+        except (OSError, ValueError) as e:
+            logger.error("❌ Arquivo de entrada inválido %s: %s", nome, e)
+            return
+        if not notas:
+            logger.warning("⚠️  Arquivo de entrada sem notas: %s", nome)
+            return
+
+        job = self.registry.submeter(notas, origem=f"pasta:{nome}")
+        logger.info("📥 Job %s recebido pela pasta (%s): %s notas", job.id, nome, len(notas))
+        threading.Thread(target=self._gravar_resultados, args=(job, nome), daemon=True).start()
+
+    def _gravar_resultados(self, job, nome: str):
+        saida = os.path.join(self.resultados, os.path.splitext(nome)[0] + ".ndjson")
+        with open(saida, 'w', encoding='utf-8') as arquivo:
+            for resultado in job.acompanhar():
+                if resultado is None:
+                    continue
+                arquivo.write(json.dumps(resultado, ensure_ascii=False, default=str) + "\n")
+                arquivo.flush()
+        logger.info("💾 Resultados do job %s gravados em %s", job.id, saida)
@@ -0,0 +1,91 @@
+import time
+import queue
+import logging
+import threading
+from typing import Callable
+
+from daemon.jobs import JobRegistry
+from models.entities import NoteResult
+
+logger = logging.getLogger(__name__)
+
+
+class SessionWorker(threading.Thread):
+    """Thread dona de uma sessão logada; consome notas da fila até o daemon parar
+
+    O Playwright síncrono só pode ser usado pela thread que o iniciou, por isso
+    cada worker cria e mantém o próprio navegador.
+    """
+
+    def __init__(self, nome: str, registry: JobRegistry, app_factory: Callable, config,
+                 parar: threading.Event):
+        super().__init__(name=nome, daemon=True)
+        self.registry = registry
+        self.app_factory = app_factory
+        self.config = config
+        self.parar = parar
+        self.app = None
+        self.pronto = False
+        self.notas_processadas = 0
+        self.ultima_atividade = time.monotonic()
+
+    def _abrir_sessao(self) -> bool:
+        try:
+            self.app = self.app_factory(self.config, [])
+            self.app.iniciar_sessao()
+            self.pronto = True
+            self.ultima_atividade = time.monotonic()
+            logger.info("✅ %s: sessão logada e pronta", self.name)
+            return True
+        except Exception as e:
+            logger.error("❌ %s: falha ao abrir sessão: %s", self.name, e)
+            self._fechar_sessao()
+            return False
+
+    def _fechar_sessao(self):
+        self.pronto = False
+        if self.app:
+            try:
+                self.app.close()
+            except Exception:
+                pass
+            self.app = None
+
+    def _processar(self, job, nota):
+        if not self.app.garantir_sessao():
+            # Sessão irrecuperável: recria o navegador do zero antes de desistir da nota
+            self._fechar_sessao()
+            if not self._abrir_sessao():
+                job.adicionar_resultado(NoteResult(nota, "❌ Sessão indisponível no daemon").to_dict())
+                return
+
+        resultado = self.app.processar_nota(nota)
+        self.notas_processadas += 1
+        job.adicionar_resultado(resultado.to_dict())
+
+    def run(self):
+        while not self.parar.is_set():
+            if not self.pronto and not self._abrir_sessao():
+                self.parar.wait(30)
+                continue
+
+            try:
+                job, nota = self.registry.tarefas.get(timeout=1)
+            except queue.Empty:
+                # Ocioso: de tempos em tempos confere se a sessão continua válida
+                if time.monotonic() - self.ultima_atividade > self.config.daemon.keepalive_s:
+                    self.ultima_atividade = time.monotonic()
+                    if not self.app.garantir_sessao():
+                        self._fechar_sessao()
+                continue
+
+            try:
+                self._processar(job, nota)
+            except Exception as e:
+                logger.error("❌ %s: erro inesperado na nota %s: %s", self.name, nota.get('chave'), e)
+                job.adicionar_resultado(NoteResult(nota, f"❌ Erro no daemon: {e}").to_dict())
+            finally:
+                self.ultima_atividade = time.monotonic()
+                self.registry.tarefas.task_done()
+
+        self._fechar_sessao()
@@ -4,6 +4,8 @@ import logging
 import os
 from dotenv import load_dotenv
 
+from utils.browser_launch import lancar_chromium
+
 # Carregar variáveis do .env
 load_dotenv()
 
@@ -21,10 +23,7 @@ class DebugFluxoParcial:
     def setup_browser(self):
         """Configura o navegador com proxy"""
         playwright = sync_playwright().start()
-        browser = playwright.chromium.launch(
-            headless=False,
-            slow_mo=1000
-        )
+        browser = lancar_chromium(playwright, headless=False, slow_mo=1000)
         
         context = browser.new_context(
             proxy={"server": f"http://{self.proxy_host}:{self.proxy_port}"},
@@ -3,6 +3,8 @@ import time
 import os
 from dotenv import load_dotenv
 
+from utils.browser_launch import lancar_chromium
+
 # Carregar variáveis do .env
 load_dotenv()
 
@@ -23,10 +25,7 @@ def interactive_debug():
     print("=" * 50)
     
     with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=False, 
-            slow_mo=1000
-        )
+        browser = lancar_chromium(p, headless=False, slow_mo=1000)
         
         context = browser.new_context(
             proxy={
@@ -1,42 +1,52 @@
 import time
-from playwright.sync_api import sync_playwright
+from collections import deque
+from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import logging
 import os
-import xml.etree.ElementTree as ET
 import csv
 from datetime import datetime
-import glob
+from dotenv import load_dotenv
+
+from config.settings import AppConfig
+from utils.browser_launch import lancar_chromium
+from utils.nfe_xml import ler_nfe_dados, ler_nfe_xml
+from utils.protocol_cache import FONTE_CONSULTADANFE, ProtocolCache, protocolo_valido
+from utils.xml_store import XmlStore
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SITE_URL = "https://consultadanfe.com/"
+BTN_XML = ".btn-download-premium.xml"
+RESULTADO_TIMEOUT_MS = 15000
+DOWNLOAD_TIMEOUT_S = 60
+POLL_MS = 100
+
+# Pipeline: páginas abertas ao mesmo tempo e intervalo mínimo entre dois envios (limite do portal)
+PAGINAS_PADRAO = int(os.getenv("DANFE_PAGINAS", "3"))
+INTERVALO_ENVIO = float(os.getenv("DANFE_INTERVALO", "2"))
+
 class ConsultaDanfeScraper:
-    def __init__(self):
+    def __init__(self, config: AppConfig = None):
+        self.config = config or AppConfig.from_env()
         self.page = None
         self.download_path = os.path.join(os.getcwd(), "xmls")
         self.csv_path = os.path.join(os.getcwd(),"sheets", "resultados_consultas.csv")
         
-        # EXCLUIR XMLs ANTIGOS no início
-        self.limpar_xmls_antigos()
+        # Aproveita o histórico antes que o CSV seja zerado abaixo (mesmo PROTOCOL_CACHE do main.py)
+        self.cache = ProtocolCache(self.config.protocol_cache)
+        self.cache.aquecer_csv(self.csv_path, self.download_path)
+        
+        # XMLs ficam guardados entre execuções (antes eram apagados aqui)
+        self.store = XmlStore(self.download_path, limite_mb=self.config.xml_store_max_mb)
+        self.store.importar_soltos()
+        self.cache.aquecer_store(self.store)
+        print(f"📦 Depósito de XMLs: {len(self.store)} nota(s), {self.store.tamanho_total / (1024 * 1024):.1f} MB")
         
         # Inicializar CSV
         self.inicializar_csv()
     
-    def limpar_xmls_antigos(self):
-        """Exclui todos os XMLs da pasta xmls no início"""
-        if os.path.exists(self.download_path):
-            xml_files = glob.glob(os.path.join(self.download_path, "*.xml"))
-            for xml_file in xml_files:
-                try:
-                    os.remove(xml_file)
-                    print(f"🗑️  Removido: {os.path.basename(xml_file)}")
-                except Exception as e:
-                    print(f"❌ Erro ao remover {xml_file}: {e}")
-        else:
-            os.makedirs(self.download_path)
-            print(f"📁 Pasta 'xmls' criada: {self.download_path}")
-    
     def inicializar_csv(self):
         """Cria/limpa o arquivo CSV com cabeçalhos"""
         # Garantir que a pasta sheets existe
@@ -64,13 +74,15 @@ class ConsultaDanfeScraper:
     def setup_browser(self):
         """Configura o navegador"""
         playwright = sync_playwright().start()
-        browser = playwright.chromium.launch(headless=False)
+        # Perfil padrão: o captcha do consultadanfe precisa das imagens
+        browser = lancar_chromium(playwright, perfil="padrao", headless=False)
         
         context = browser.new_context(
             accept_downloads=True,
             viewport={'width': 1280, 'height': 720}
         )
         
+        self.context = context
         self.page = context.new_page()
         return browser
 
@@ -80,8 +92,8 @@ class ConsultaDanfeScraper:
         
         try:
             # Navegar para o site (apenas na primeira vez)
-            if self.page.url != "https://consultadanfe.com/":
-                self.page.goto("https://consultadanfe.com/", wait_until="networkidle")
+            if self.page.url != SITE_URL:
+                self.page.goto(SITE_URL, wait_until="networkidle")
                 time.sleep(3)
             
             # Preencher campo da chave
@@ -99,7 +111,7 @@ class ConsultaDanfeScraper:
             btn_buscar.click()
             
             print("🔄 Aguardando resultado...")
-            time.sleep(5)
+            self.aguardar_resultado(self.page)
             
             # Verificar e baixar XML
             return self.verificar_e_baixar_xml(chave_acesso)
@@ -112,7 +124,7 @@ class ConsultaDanfeScraper:
         """Verifica se a consulta foi bem sucedida e baixa o XML"""
         try:
             # Verificar se apareceu o botão de download XML
-            btn_xml = self.page.query_selector(".btn-download-premium.xml")
+            btn_xml = self.page.query_selector(BTN_XML)
             
             if btn_xml and btn_xml.is_visible():
                 print("📥 Baixando XML...")
@@ -128,18 +140,8 @@ class ConsultaDanfeScraper:
                     
                     print(f"💾 XML salvo: {arquivo_path}")
                     
-                    # Extrair protocolo do XML
-                    protocolo = self.extrair_protocolo_xml(arquivo_path)
-                    
-                    # Adicionar ao CSV
-                    self.adicionar_ao_csv(chave_acesso, protocolo, os.path.basename(arquivo_path))
-                    
-                    return {
-                        "sucesso": True,
-                        "chave": chave_acesso,
-                        "arquivo": arquivo_path,
-                        "protocolo": protocolo
-                    }
+                    # Extrair protocolo, guardar no depósito e adicionar ao CSV
+                    return self.arquivar_xml(chave_acesso, arquivo_path)
             else:
                 print("❌ Botão de download não encontrado")
                 print("🖥️  Colocando navegador em PRIMEIRO PLANO...")
@@ -166,7 +168,7 @@ class ConsultaDanfeScraper:
         """Tenta fazer o download após intervenção manual"""
         try:
             # Verificar novamente se o botão de download apareceu
-            btn_xml = self.page.query_selector(".btn-download-premium.xml")
+            btn_xml = self.page.query_selector(BTN_XML)
             
             if btn_xml and btn_xml.is_visible():
                 print("🔄 Tentando download novamente...")
@@ -180,15 +182,7 @@ class ConsultaDanfeScraper:
                     
                     print(f"💾 XML salvo: {arquivo_path}")
                     
-                    protocolo = self.extrair_protocolo_xml(arquivo_path)
-                    self.adicionar_ao_csv(chave_acesso, protocolo, os.path.basename(arquivo_path))
-                    
-                    return {
-                        "sucesso": True,
-                        "chave": chave_acesso,
-                        "arquivo": arquivo_path,
-                        "protocolo": protocolo
-                    }
+                    return self.arquivar_xml(chave_acesso, arquivo_path)
             else:
                 print("❌ Ainda não foi possível baixar o XML")
                 self.adicionar_ao_csv(chave_acesso, "DOWNLOAD_FALHOU_APOS_INTERVENCAO", "N/A")
@@ -199,38 +193,47 @@ class ConsultaDanfeScraper:
             self.adicionar_ao_csv(chave_acesso, f"ERRO_INTERVENCAO: {str(e)}", "N/A")
             return None
 
+    def arquivar_xml(self, chave_acesso, arquivo_path):
+        """Extrai o protocolo do XML recém-baixado, registra no cache/CSV e move o arquivo para o depósito"""
+        protocolo = self.extrair_protocolo_xml(arquivo_path)
+        if protocolo_valido(protocolo):
+            self.cache.put(chave_acesso, protocolo, FONTE_CONSULTADANFE, arquivo_path)
+        self.adicionar_ao_csv(chave_acesso, protocolo, os.path.basename(arquivo_path))
+        self.store.guardar_arquivo(chave_acesso, arquivo_path)
+        print(f"📦 XML guardado no depósito: {chave_acesso}")
+        
+        return {
+            "sucesso": True,
+            "chave": chave_acesso,
+            "arquivo": arquivo_path,
+            "protocolo": protocolo
+        }
+
     def extrair_protocolo_xml(self, xml_path):
         """Extrai o protocolo do arquivo XML baixado"""
+        registro = ler_nfe_xml(xml_path)
+        if registro.erro:
+            print(f"❌ Erro ao extrair protocolo: {registro.erro}")
+            return f"Erro: {registro.erro}"
+        return registro.protocolo or "Protocolo não encontrado no XML"
+
+    def aguardar_resultado(self, page):
+        """Espera o botão do XML aparecer em vez de dormir um tempo fixo; False se não veio a tempo"""
         try:
-            tree = ET.parse(xml_path)
-            root = tree.getroot()
-            
-            # Namespace do XML da NFe
-            ns = {'nfe': 'http://www.portalfiscal.inf.br/nfe'}
-            
-            # Buscar protocolo
-            protNFe = root.find('.//nfe:protNFe', ns)
-            if protNFe is not None:
-                infProt = protNFe.find('nfe:infProt', ns)
-                if infProt is not None:
-                    protocolo = infProt.find('nfe:nProt', ns)
-                    if protocolo is not None:
-                        return protocolo.text
-            
-            return "Protocolo não encontrado no XML"
-            
-        except Exception as e:
-            print(f"❌ Erro ao extrair protocolo: {e}")
-            return f"Erro: {str(e)}"
+            page.wait_for_selector(BTN_XML, state="visible", timeout=RESULTADO_TIMEOUT_MS)
+            return True
+        except PlaywrightTimeoutError:
+            return False
 
-    def clicar_nova_consulta(self):
+    def clicar_nova_consulta(self, page=None):
         """Clica no botão 'Nova Consulta' para limpar o formulário"""
+        page = page or self.page
         try:
-            btn_nova = self.page.query_selector(".btn-new-search")
+            btn_nova = page.query_selector(".btn-new-search")
             if btn_nova and btn_nova.is_visible():
                 print("🔄 Clicando em 'Nova Consulta'...")
                 btn_nova.click()
-                time.sleep(2)
+                page.wait_for_selector("input#chave", state="visible")
                 return True
             else:
                 print("⚠️  Botão 'Nova Consulta' não encontrado")
@@ -249,14 +252,13 @@ class ConsultaDanfeScraper:
             campo_chave.click()
             campo_chave.fill("")
             campo_chave.fill(chave_acesso)
-            time.sleep(1)
             
             # Clicar em BUSCAR (sem captcha nas demais)
             btn_buscar = self.page.wait_for_selector("#btn-chave")
             btn_buscar.click()
             
             print("🔄 Aguardando resultado...")
-            time.sleep(5)
+            self.aguardar_resultado(self.page)
             
             return self.verificar_e_baixar_xml(chave_acesso)
             
@@ -265,41 +267,168 @@ class ConsultaDanfeScraper:
             self.adicionar_ao_csv(chave_acesso, f"ERRO: {str(e)}", "N/A")
             return None
 
+    def enviar_consulta(self, page, chave_acesso):
+        """Preenche a chave e clica em BUSCAR sem esperar o resultado"""
+        campo_chave = page.wait_for_selector("input#chave")
+        campo_chave.fill(chave_acesso)
+        page.click("#btn-chave")
+
+    def abrir_paginas(self, total):
+        """Abre páginas extras no mesmo contexto (cookies da verificação manual compartilhados)"""
+        paginas = [self.page]
+        for _ in range(total - 1):
+            pagina = self.context.new_page()
+            pagina.goto(SITE_URL, wait_until="domcontentloaded")
+            paginas.append(pagina)
+        return paginas
+
+    def consultar_em_pipeline(self, lista_chaves, total_paginas=PAGINAS_PADRAO):
+        """Mantém até total_paginas consultas em andamento, cada uma numa página do mesmo contexto
+
+        O arquivo chega pelo evento 'download' da página e vai direto para a extração do
+        protocolo. Entre dois envios há no mínimo INTERVALO_ENVIO segundos, o limite do portal.
+        Retorna (resultados, chaves que falharam e devem seguir pelo fluxo com intervenção manual).
+        """
+        paginas = self.abrir_paginas(max(1, min(total_paginas, len(lista_chaves))))
+        downloads = deque()  # (pagina, download) entregues pelos eventos
+        for pagina in paginas:
+            pagina.on("download", lambda download, pagina=pagina: downloads.append((pagina, download)))
+        
+        fila = deque(lista_chaves)
+        em_andamento = {}  # pagina -> [chave, fase, desde]
+        resultados, falhas = [], []
+        ultimo_envio = 0.0
+        inicio = time.perf_counter()
+        print(f"🚀 PIPELINE: {len(lista_chaves)} nota(s) em {len(paginas)} página(s), "
+              f"{INTERVALO_ENVIO:.1f}s entre envios")
+        
+        def liberar(pagina, motivo=None):
+            chave = em_andamento.pop(pagina)[0]
+            if motivo:
+                print(f"⚠️  {chave}: {motivo} (vai para a fila manual)")
+                falhas.append(chave)
+            self.clicar_nova_consulta(pagina)
+        
+        while fila or em_andamento:
+            agora = time.perf_counter()
+            
+            # Páginas livres recebem a próxima chave
+            for pagina in paginas:
+                if not fila or pagina in em_andamento or agora - ultimo_envio < INTERVALO_ENVIO:
+                    continue
+                chave = fila.popleft()
+                try:
+                    self.enviar_consulta(pagina, chave)
+                    em_andamento[pagina] = [chave, "buscando", agora]
+                    ultimo_envio = agora
+                    print(f"🔍 [{len(lista_chaves) - len(fila)}/{len(lista_chaves)}] Enviada: {chave}")
+                except Exception as e:
+                    print(f"❌ Erro ao enviar {chave}: {e}")
+                    falhas.append(chave)
+            
+            # Resultado na tela: clica no XML; o arquivo chega pelo evento de download
+            for pagina, estado in list(em_andamento.items()):
+                chave, fase, desde = estado
+                if fase == "buscando":
+                    btn_xml = pagina.query_selector(BTN_XML)
+                    if btn_xml and btn_xml.is_visible():
+                        btn_xml.click()
+                        estado[1:] = ["baixando", time.perf_counter()]
+                    elif agora - desde > RESULTADO_TIMEOUT_MS / 1000:
+                        liberar(pagina, "resultado não apareceu")
+                elif agora - desde > DOWNLOAD_TIMEOUT_S:
+                    liberar(pagina, "download não começou")
+            
+            # Downloads recebidos: salva, extrai o protocolo e guarda no depósito
+            while downloads:
+                pagina, download = downloads.popleft()
+                if pagina not in em_andamento:
+                    continue
+                chave = em_andamento[pagina][0]
+                arquivo_path = os.path.join(self.download_path, f"{chave}.xml")
+                try:
+                    download.save_as(arquivo_path)
+                    # O download é da página, não da chave: um resultado antigo na tela traria outra nota
+                    with open(arquivo_path, 'rb') as arquivo:
+                        baixada = ler_nfe_dados(arquivo.read(), arquivo_path).chave
+                    if baixada != chave:
+                        os.remove(arquivo_path)
+                        liberar(pagina, f"XML baixado é de outra nota ({baixada or 'chave ilegível'})")
+                        continue
+                    print(f"💾 XML salvo: {arquivo_path}")
+                    resultados.append(self.arquivar_xml(chave, arquivo_path))
+                    liberar(pagina)
+                except Exception as e:
+                    liberar(pagina, f"erro no download: {e}")
+            
+            if fila or em_andamento:
+                paginas[0].wait_for_timeout(POLL_MS)  # deixa o Playwright entregar os eventos
+        
+        duracao = time.perf_counter() - inicio
+        print(f"⏱️  Pipeline: {len(resultados)} XML(s) em {duracao:.1f}s "
+              f"({len(resultados) / duracao * 60 if duracao else 0:.1f} notas/min), {len(falhas)} falha(s)")
+        for pagina in paginas[1:]:
+            pagina.close()
+        return resultados, falhas
+
     def consultar_multiplas_notas(self, lista_chaves):
         """Consulta múltiplas notas com controle manual do captcha"""
+        # Protocolos já conhecidos saem do cache, sem abrir o navegador
+        resultados = []
+        for chave in lista_chaves:
+            protocolo = self.cache.get(chave)
+            if protocolo:
+                resultados.append({"sucesso": True, "chave": chave, "arquivo": None,
+                                   "protocolo": protocolo, "cache": True})
+                self.adicionar_ao_csv(chave, protocolo, "CACHE")
+        lista_chaves = self.cache.pendentes(lista_chaves)
+        
+        # XML já baixado antes (mesmo sem protocolo válido): não se baixa de novo
+        for chave in [c for c in lista_chaves if c in self.store]:
+            dados = self.store.ler(chave)
+            if dados is None:
+                continue  # corrompido: foi descartado do depósito e será baixado de novo
+            registro = ler_nfe_dados(dados, chave)
+            protocolo = registro.protocolo or "Protocolo não encontrado no XML"
+            resultados.append({"sucesso": True, "chave": chave, "arquivo": None,
+                               "protocolo": protocolo, "cache": True})
+            self.adicionar_ao_csv(chave, protocolo, "DEPOSITO")
+        lista_chaves = [c for c in lista_chaves if c not in self.store]
+        
+        print(f"🗃️  {len(resultados)} protocolo(s) já em cache/depósito")
         print(f"🚀 INICIANDO CONSULTA DE {len(lista_chaves)} NOTAS")
         print("=" * 50)
+        if not lista_chaves:
+            return resultados
         
         browser = self.setup_browser()
-        resultados = []
         
         try:
-            for i, chave in enumerate(lista_chaves, 1):
-                print(f"\n[{i}/{len(lista_chaves)}] Processando: {chave}")
-                
-                if i == 1:
-                    # Primeira nota - controle manual do captcha
-                    resultado = self.fazer_consulta_com_controle(chave)
-                else:
-                    # Demais notas - consulta rápida
-                    resultado = self.consultar_nota_rapida(chave)
-                
+            # Primeira nota - controle manual do captcha
+            print(f"\n[1/{len(lista_chaves)}] Processando: {lista_chaves[0]}")
+            resultado = self.fazer_consulta_com_controle(lista_chaves[0])
+            resultados.append(resultado or {"sucesso": False, "chave": lista_chaves[0], "erro": "Falha na consulta"})
+            if len(lista_chaves) == 1:
+                return resultados
+            self.clicar_nova_consulta()
+            
+            # Demais notas - várias consultas em andamento ao mesmo tempo
+            baixados, falhas = self.consultar_em_pipeline(lista_chaves[1:])
+            resultados.extend(baixados)
+            
+            # O que falhou no pipeline segue uma a uma, com a intervenção manual se preciso
+            for i, chave in enumerate(falhas, 1):
+                print(f"\n[{i}/{len(falhas)}] Nova tentativa: {chave}")
+                resultado = self.consultar_nota_rapida(chave)
                 if resultado:
                     resultados.append(resultado)
-                    
-                    # Clicar em "Nova Consulta" após baixar o XML (exceto na última)
-                    if i < len(lista_chaves):
-                        self.clicar_nova_consulta()
+                    self.clicar_nova_consulta()
                 else:
                     resultados.append({
                         "sucesso": False,
                         "chave": chave,
                         "erro": "Falha na consulta"
                     })
-                
-                # Pausa entre consultas
-                if i < len(lista_chaves):
-                    time.sleep(2)
             
             return resultados
             
@@ -309,6 +438,11 @@ class ConsultaDanfeScraper:
         finally:
             input("\n⏹️  Pressione ENTER para fechar o navegador...")
             browser.close()
+    
+    def fechar(self):
+        """Grava o índice do depósito e fecha o cache de protocolos"""
+        self.store.fechar()
+        self.cache.close()
 
     def exibir_resultados(self, resultados):
         """Exibe relatório final"""
@@ -322,7 +456,7 @@ class ConsultaDanfeScraper:
         print(f"✅ Notas baixadas com sucesso: {len(sucessos)}")
         print(f"❌ Notas com falha: {len(falhas)}")
         print(f"💾 Arquivo CSV: {self.csv_path}")
-        print(f"📁 Pasta XMLs: {self.download_path}")
+        print(f"📁 Depósito de XMLs: {self.download_path} ({len(self.store)} nota(s))")
         
         if sucessos:
             print(f"\n📋 XMLs BAIXADOS:")
@@ -332,6 +466,7 @@ class ConsultaDanfeScraper:
 
 # USO
 def main():
+    load_dotenv()
     scraper = ConsultaDanfeScraper()
     
     # Suas notas fiscais
@@ -341,7 +476,7 @@ def main():
     ]
     
     print("🎯 FLUXO OTIMIZADO:")
-    print("1. ✅ Limpa XMLs antigos automaticamente")
+    print("1. ✅ Pula notas já no cache/depósito de XMLs")
     print("2. Preenche nota automaticamente")
     print("3. PAUSA: Você resolve captcha se aparecer") 
     print("4. Pressione ENTER para BUSCAR")
@@ -350,11 +485,14 @@ def main():
     print("7. ⏯️  Pressione ENTER para continuar")
     print("8. Sistema tenta download novamente")
     print("9. Clica em 'Nova Consulta' automaticamente")
-    print("10. Demais notas: Totalmente automático")
+    print(f"10. Demais notas: automático, {PAGINAS_PADRAO} páginas em paralelo (DANFE_PAGINAS)")
     print("=" * 50)
     
-    resultados = scraper.consultar_multiplas_notas(notas_fiscais)
-    scraper.exibir_resultados(resultados)
+    try:
+        resultados = scraper.consultar_multiplas_notas(notas_fiscais)
+        scraper.exibir_resultados(resultados)
+    finally:
+        scraper.fechar()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
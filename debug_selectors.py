@@ -4,6 +4,8 @@ import logging
 import os
 from dotenv import load_dotenv
 
+from utils.browser_launch import lancar_chromium
+
 # Carregar variáveis do .env
 load_dotenv()
 
@@ -30,10 +32,7 @@ def debug_selectors():
     
     with sync_playwright() as p:
         # 🔥 Browser VISÍVEL com proxy
-        browser = p.chromium.launch(
-            headless=False,
-            slow_mo=500
-        )
+        browser = lancar_chromium(p, headless=False, slow_mo=500)
         
         context = browser.new_context(
             viewport={'width': 1280, 'height': 720},
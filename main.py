@@ -1,10 +1,26 @@
 import os
 import sys
 import time
-from datetime import datetime, timedelta
-from playwright.sync_api import sync_playwright
+import logging
+import argparse
+import multiprocessing
+
+_INICIO_PROCESSO = time.perf_counter()
+
+# ⏱️ --profile-startup: o medidor precisa entrar antes de qualquer import pesado
+_import_profiler = None
+if '--profile-startup' in sys.argv:
+    from utils.startup_profile import ImportProfiler
+    _import_profiler = ImportProfiler().install()
+
+import csv
 import json
-import pandas as pd
+import queue
+import threading
+from collections import Counter, deque
+from contextlib import closing, contextmanager
+from dataclasses import replace
+from datetime import datetime, timedelta
 
 # 🔧 CORREÇÃO: Carregar .env de forma explícita
 from dotenv import load_dotenv
@@ -28,9 +44,22 @@ try:
     from config.settings import AppConfig
     from auth.authentication import AuthManager
     from scrapers.data_scraper import DataScraper
-    from models.entities import ScrapingResult, Invoice, BatchScrapingResult
+    from scrapers.grid_export import GridExporter
+    from scrapers.monitor_poller import chave_linha
+    from scrapers.reprocess_verifier import ReprocessVerifier
+    from models.entities import NoteResult, NoteBatch, NoteOutcome, STATUS_PRAZO_ESGOTADO
+    from utils.account_pool import ContaRecusada, contas_compartilhadas
+    from utils.deadline import OrcamentoNota, Prazo, PrazoEsgotado, limitar
+    from utils.har_replay import HarReplay, arquivos_gravados, credenciais_replay, higienizar_har, proximo_arquivo, segredos
     from utils.helpers import get_date_30_days_ago, validate_credentials
-    print("✅ Todos os módulos importados!")
+    from utils.browser_launch import lancar_chromium
+    from utils.logging_config import setup_logging, ProgressLine
+    from utils.page_telemetry import PageTelemetry, PoliticaReciclagem
+    from utils.protocol_cache import ProtocolCache
+    from utils.proxy_pool import pool_compartilhado
+    from utils.rate_control import acao_conjunta, controlador_compartilhado
+    from utils.rejection_policy import AcaoRejeicao, RejectionPolicy
+    from utils.xml_store import XmlStore
 except ImportError as e:
     print(f"❌ Erro ao importar módulos: {e}")
     # Criar classes básicas se não existirem
@@ -42,16 +71,38 @@ except ImportError as e:
     class DataScraper:
         def __init__(self, page): pass
 
+logger = logging.getLogger("app")
+
 class NFScraperApp:
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, notas_fiscais=None):
         self.config = config
+        self.playwright = None
         self.auth_manager = None
         self.browser = None
         self.context = None
         self.page = None
+        self.proxies = None
+        self.proxy = None  # ProxyConfig atribuído pelo pool ao contexto atual
+        self.contas = None
+        self.conta = None  # ContaMonitor com que o contexto atual está logado
+        self.telemetria = None
+        self.reciclagem = PoliticaReciclagem(config.recycle)
+        self.har = None  # HarReplay no modo reproduzir
+        self.har_gravados = {}  # contexto -> HAR no modo gravar (higienizado assim que o contexto fecha)
+        self.notas_na_pagina = 0
         self.data_scraper = None
+        self.verificador = None
+        self.politica = None
+        self.estouros = Counter()  # fase -> notas que passaram do orçamento
+        # Todas as sessões do processo dividem o mesmo ritmo de ações no servidor
+        self.limitador = controlador_compartilhado(config.rate)
         self.json_path = os.path.join(os.getcwd(), "notas_fiscais.json")
         
+        # Sessão do daemon: as notas chegam por job, não pelo JSON
+        if notas_fiscais is not None:
+            self.notas_fiscais = notas_fiscais
+            return
+        
         # Carregar notas do JSON
         self.notas_fiscais = self.carregar_notas_do_json()
         
@@ -60,6 +111,11 @@ class NFScraperApp:
             return
         
         print(f"📋 Notas carregadas do JSON: {len(self.notas_fiscais)}")
+        
+        with closing(ProtocolCache(config.protocol_cache)) as cache:
+            preenchidas = cache.preencher_notas(self.notas_fiscais)
+        if preenchidas:
+            print(f"🗃️  Protocolo de {preenchidas} nota(s) completado pelo cache")
     
     def carregar_notas_do_json(self):
         """Carrega notas fiscais do arquivo JSON"""
@@ -109,20 +165,137 @@ class NFScraperApp:
         """Configura o navegador e contexto"""
         print("🌐 Iniciando navegador...")
         
-        playwright = sync_playwright().start()
-        self.browser = playwright.chromium.launch(headless=self.config.headless)
-        
-        self.context = self.browser.new_context(
-            proxy={"server": f"http://{self.config.proxy.host}:{self.config.proxy.port}"},
-            ignore_https_errors=True
-        )
+        # Import adiado: Playwright só é carregado quando o navegador é realmente necessário
+        from playwright.sync_api import sync_playwright
         
-        self.page = self.context.new_page()
-        self.data_scraper = DataScraper(self.page)
-        self.auth_manager = AuthManager(self.page)
+        self.playwright = sync_playwright().start()
+        self.browser = lancar_chromium(self.playwright, self.config.browser.perfil, headless=self.config.headless,
+                                       slow_mo=self.config.slow_mo, cache_dir=self.config.browser.cache_dir)
+        if self.config.har.modo == "reproduzir":
+            self.har = HarReplay(arquivos_gravados(self.config.har.caminho), self.config.har.ignorar)
+        self.proxies = pool_compartilhado(self.config)
+        self.abrir_contexto(self.proxies.atribuir())
         
         print("✅ Navegador configurado!")
     
+    def abrir_contexto(self, proxy, storage_state=None):
+        """Contexto pelo proxy indicado (com os cookies de storage_state, se houver) e a página dele"""
+        self.proxy = proxy
+        opcoes = {"ignore_https_errors": True, "storage_state": storage_state}
+        if not self.har:
+            opcoes["proxy"] = {"server": f"http://{proxy.host}:{proxy.port}"}
+        if self.config.har.modo == "gravar":
+            # O HAR é escrito quando o contexto fecha; fechar_contexto tira as credenciais na hora
+            opcoes["record_har_path"] = proximo_arquivo(self.config.har.caminho)
+            opcoes["record_har_content"] = "embed"
+        self.context = self.browser.new_context(**opcoes)
+        if "record_har_path" in opcoes:
+            self.har_gravados[self.context] = opcoes["record_har_path"]
+        if self.har:
+            self.har.instalar(self.context)
+        # Cliques/preenchimentos sem timeout explícito; as esperas da nota seguem o prazo da fase
+        self.context.set_default_timeout(self.config.timeout)
+        self.montar_pagina(self.context.new_page())
+    
+    def fechar_contexto(self, contexto):
+        """Fecha um contexto e, no modo gravar, higieniza o HAR dele logo em seguida"""
+        try:
+            contexto.close()
+        except Exception as e:
+            logger.debug("Contexto já fechado: %s", e)
+        caminho = self.har_gravados.pop(contexto, None)
+        if caminho:
+            self.higienizar_gravacao(caminho)
+    
+    def montar_pagina(self, page):
+        """Página nova e os componentes que dependem dela"""
+        if self.telemetria:
+            self.telemetria.fechar()
+        self.page = page
+        self.notas_na_pagina = 0
+        self.telemetria = PageTelemetry(page) if self.config.recycle.telemetria else None
+        self.data_scraper = DataScraper(self.page, backend=self.config.grid.backend)
+        self.auth_manager = AuthManager(self.page, timeout=self.config.deadline.espera_ms,
+                                        backend_grid=self.config.grid.backend)
+        self.exportador = GridExporter(self.data_scraper, self.config.export)
+        # Reprocessos aguardando confirmação sobrevivem à troca de página/contexto
+        pendentes = self.verificador.pendentes if self.verificador else []
+        self.verificador = ReprocessVerifier(self.auth_manager, self.data_scraper, self.config.verify,
+                                             self.exportador, acao_limitada=self.acao_limitada)
+        self.verificador.pendentes = pendentes
+    
+    def trocar_proxy(self):
+        """Failover: novo contexto pelo proxy saudável de menor custo e login de novo
+        
+        O contexto antigo só fecha depois do login no novo. Se o novo não abre ou não
+        entra, a sessão continua no antigo e a falha conta contra o proxy novo.
+        """
+        novo = self.proxies.atribuir(anterior=self.proxy)
+        if novo is self.proxy:
+            return
+        antigo, pagina, proxy = self.context, self.page, self.proxy
+        try:
+            self.abrir_contexto(novo)
+            self.entrar()
+        except Exception:
+            if self.context is not antigo:
+                self.fechar_contexto(self.context)
+            self.context, self.proxy = antigo, proxy
+            self.montar_pagina(pagina)
+            self.proxies.desfazer_troca(novo, proxy)
+            raise
+        self.fechar_contexto(antigo)
+    
+    def reciclar(self, motivo: str):
+        """Troca a página (ou o contexto, levando os cookies) e volta para a tela de pesquisa"""
+        logger.info("♻️  Reciclando %s após %s nota(s) (motivo: %s)", self.config.recycle.modo,
+                    self.notas_na_pagina, motivo)
+        if self.config.recycle.modo == "contexto":
+            antigo = self.context
+            self.abrir_contexto(self.proxy, storage_state=antigo.storage_state())
+            self.fechar_contexto(antigo)
+        else:
+            antiga = self.page
+            self.montar_pagina(self.context.new_page())
+            antiga.close()
+        self.reciclagem.registrar(motivo)
+        self.navigate_to_initial_page()
+        if not self.garantir_sessao():
+            raise RuntimeError("sessão não voltou depois da reciclagem")
+    
+    def processar_nota(self, nota_data):
+        """Uma nota (pesquisa + reprocesso) contabilizada no proxy da sessão, trocando de proxy se ele degradou
+        
+        Depois da nota a memória da página é amostrada (CDP); passado o limite de notas ou
+        de memória, a página é reciclada antes da próxima.
+        """
+        inicio = time.perf_counter()
+        resultado = self.search_single_invoice_with_immediate_reprocess(nota_data)
+        ok = not (resultado.prazo_esgotado or resultado.outcome is NoteOutcome.ERRO)
+        if self.conta:
+            self.contas.registrar_nota(self.conta, ok)
+        if self.proxies:
+            self.proxies.registrar_nota(self.proxy, time.perf_counter() - inicio, ok)
+            if self.proxies.degradado(self.proxy):
+                try:
+                    self.trocar_proxy()
+                    return resultado
+                except Exception as e:
+                    logger.error("❌ Falha ao trocar de proxy: %s", e)
+        
+        self.notas_na_pagina += 1
+        amostra = self.telemetria.amostra() if self.telemetria else None
+        if amostra:
+            logger.info("🧠 Memória da página: %sMB, %s nós", amostra['heap_mb'], int(amostra['Nodes']),
+                        extra={"chave": nota_data['chave'], "notas_na_pagina": self.notas_na_pagina, **amostra})
+        motivo = self.reciclagem.motivo(self.notas_na_pagina, amostra)
+        if motivo:
+            try:
+                self.reciclar(motivo)
+            except Exception as e:
+                logger.error("❌ Falha ao reciclar a página: %s", e)
+        return resultado
+    
     def navigate_to_initial_page(self):
         """Navega para a página inicial"""
         print("🌍 Navegando para página inicial...")
@@ -153,14 +326,18 @@ class NFScraperApp:
         if not success:
             print("⚠️  Aviso: Página extra não processada completamente, continuando...")
         
-        # 3. Login monitor
-        print("3. 👨‍💼 Login no monitor...")
-        success = self.auth_manager.login_monitor(
-            self.config.credentials.monitor_user,
-            self.config.credentials.monitor_password
-        )
+        # 3. Login monitor (conta do pool atribuída a este contexto)
+        print(f"3. 👨‍💼 Login no monitor ({self.conta.usuario})...")
+        success = self.auth_manager.login_monitor(self.conta.usuario, self.conta.senha)
         if not success:
             raise Exception("❌ Falha no login do monitor")
+        if self.auth_manager.login_recusado():
+            self.contas.recusar(self.conta)
+            raise ContaRecusada(f"❌ Monitor recusou a conta {self.conta.usuario}")
+        if self.auth_manager.login_pendente():
+            # Sem mensagem de recusa: a conta descansa e volta ao pool
+            self.contas.esperar(self.conta)
+            raise ContaRecusada(f"⏳ Login da conta {self.conta.usuario} não passou da tela do monitor")
         
         # 4. Navegação
         print("4. 🧭 Navegando para tela de pesquisa...")
@@ -168,31 +345,148 @@ class NFScraperApp:
         
         print("✅ Autenticação completa com página extra!")
     
+    def iniciar_sessao(self):
+        """Abre o navegador e deixa a sessão logada na tela de pesquisa"""
+        self.setup_browser()
+        self.entrar()
+    
+    def entrar(self):
+        """Login completo com a conta do monitor deste contexto (atribuída do pool na primeira vez)
+        
+        Conta recusada sai do pool (ou fica em espera, sem recusa explícita); a próxima
+        livre é tentada em um contexto limpo.
+        Sem conta livre, SemContaDisponivel sobe para quem abriu a sessão.
+        """
+        self.contas = contas_compartilhadas(self.config)
+        while True:
+            if self.conta is None:
+                self.conta = self.contas.atribuir()
+            try:
+                self.navigate_to_initial_page()
+                self.perform_full_login()
+                return
+            except ContaRecusada as e:
+                logger.error("%s", e)
+                self.conta = None
+                self.fechar_contexto(self.context)
+                self.abrir_contexto(self.proxy)
+    
+    @contextmanager
+    def acao_limitada(self, nome: str, lote: bool = False):
+        """Ação no servidor sob o limitador da conta do monitor e o limitador global
+
+        lote: a ação cobre várias requisições (todas as páginas, vários Reprocessar) e é
+        comparada com RATE_BATCH_TARGET_LATENCY_S em vez do alvo de uma ação só.
+        """
+        controladores = [self.conta.limitador, self.limitador] if self.conta else [self.limitador]
+        alvo = self.config.rate.latencia_alvo_lote_s if lote else None
+        with acao_conjunta(controladores, nome, alvo) as acao:
+            yield acao
+    
+    def garantir_sessao(self) -> bool:
+        """Confere se a tela de pesquisa ainda está acessível e refaz o login se a sessão caiu"""
+        return self.voltar_para_pesquisa() or self.refazer_login()
+    
+    def voltar_para_pesquisa(self) -> bool:
+        """A tela de pesquisa está (ou voltou a ficar) acessível, sem refazer o login
+        
+        PrazoEsgotado (prazo posto no AuthManager por quem chamou) sobe sem ser engolido.
+        """
+        try:
+            self.page.wait_for_selector("input[name='DocKey']", timeout=5000)
+            return True
+        except PrazoEsgotado:
+            raise
+        except Exception:
+            pass
+        
+        logger.warning("⚠️  Tela de pesquisa indisponível, tentando voltar para ela...")
+        try:
+            self.auth_manager.navigate_to_search_screen()
+            self.page.wait_for_selector("input[name='DocKey']", timeout=5000)
+            return True
+        except PrazoEsgotado:
+            raise
+        except Exception:
+            return False
+    
+    def refazer_login(self) -> bool:
+        """Login completo de novo; False se nem assim a sessão voltou"""
+        logger.warning("🔐 Sessão expirada, refazendo login...")
+        try:
+            self.entrar()
+            return True
+        except Exception as e:
+            logger.error("❌ Não consegui restabelecer a sessão: %s", e)
+            return False
+    
+    def recuperar_apos_prazo(self):
+        """Fecha o que ficou aberto na tela e volta para a pesquisa
+        
+        A volta para a tela de pesquisa não espera mais que um prazo de pesquisa; o login
+        completo, se preciso, fica fora dele (não caberia nesse prazo).
+        """
+        try:
+            self.page.keyboard.press("Escape")
+        except Exception:
+            pass
+        with limitar(self.auth_manager, Prazo('recuperacao', self.config.deadline.pesquisa_s)):
+            try:
+                if self.voltar_para_pesquisa():
+                    return True
+            except PrazoEsgotado:
+                logger.warning("⏱️  Não voltei para a tela de pesquisa no prazo")
+        return self.refazer_login()
+    
+    def politica_rejeicao(self) -> RejectionPolicy:
+        """Política de rejeição, montada na primeira rejeição (o aprendizado lê o histórico de sheets/)"""
+        if self.politica is None:
+            self.politica = RejectionPolicy.com_historico(self.config.rejection)
+        return self.politica
+    
+    @staticmethod
+    def status_sem_reprocesso(codigo: str, acao: AcaoRejeicao) -> str:
+        if acao is AcaoRejeicao.FILA_HUMANA:
+            return f"📨 Rejeitado ({codigo}) - enviado para a fila humana"
+        return f"⏭️ Rejeitado ({codigo}) - reprocesso pulado"
+    
     def search_single_invoice_with_immediate_reprocess(self, nota_data):
         """Pesquisa uma única nota fiscal e já reprocessa imediatamente se rejeitada - SEM REPESQUISAR"""
         chave_acesso = nota_data['chave']
         fiscal_doc_no = nota_data.get('fiscal_doc_no', '')
         series_no = nota_data.get('series_no', '')
         
-        print(f"🔍 Pesquisando nota: {chave_acesso}")
-        print(f"   📊 Fiscal Doc: {fiscal_doc_no}")
-        print(f"   🔢 Série: {series_no}")
+        logger.info("🔍 Pesquisando nota: %s | Fiscal Doc: %s | Série: %s", chave_acesso, fiscal_doc_no, series_no)
+        
+        # Duração de cada fase, usada pelo planejador nas próximas execuções
+        tempos = {}
+        # Orçamento da nota: cada espera do AuthManager recebe só o que resta da fase
+        orcamento = OrcamentoNota(self.config.deadline)
+        inicio = marca = time.perf_counter()
+        
+        def medir(fase):
+            nonlocal marca
+            agora = time.perf_counter()
+            tempos[fase] = round(agora - marca, 3)
+            tempos['total'] = round(agora - inicio, 3)
+            marca = agora
         
         try:
-            # PRIMEIRA E ÚNICA CONSULTA
-            initial_date = get_date_30_days_ago()
-            success = self.auth_manager.fill_search_form(initial_date, chave_acesso)
-            
-            if not success:
-                return {
-                    "nota_data": nota_data,
-                    "status": "❌ Erro ao pesquisar nota",
-                    "dados_completos": {},
-                    "reprocessado": False
-                }
-            
-            # Extrai dados da consulta
-            dados_completos = self.auth_manager.extract_invoice_data(chave_acesso)
+            # PRIMEIRA E ÚNICA CONSULTA (passa pelo limitador de taxa compartilhado)
+            with self.acao_limitada('pesquisa') as acao:
+                initial_date = get_date_30_days_ago()
+                with orcamento.fase('pesquisa', self.auth_manager):
+                    success = self.auth_manager.fill_search_form(initial_date, chave_acesso)
+                medir('pesquisa')
+                
+                if not success:
+                    acao.falhou("pesquisa não concluída")
+                    return NoteResult(nota_data, "❌ Erro ao pesquisar nota", tempos=tempos, estouros=orcamento.estouros)
+                
+                # Extrai dados da consulta
+                with orcamento.fase('extracao', self.auth_manager):
+                    dados_completos = self.auth_manager.extract_invoice_data(chave_acesso)
+                medir('extracao')
             
             # Extrai status e dados da estrutura correta
             if isinstance(dados_completos, dict):
@@ -202,173 +496,311 @@ class NFScraperApp:
                 status = dados_completos
                 dados = {}
             
-            print(f"   📊 Status: {status}")
+            logger.info("   📊 Status: %s", status)
             
             # VERIFICA SE PRECISA REPROCESSAR IMEDIATAMENTE
             precisa_reprocessar = 'Rejeitado' in status or '❌' in status
+            codigo_rejeicao = None
+            
+            if precisa_reprocessar:
+                # Motivos que falham sempre do mesmo jeito não passam pelo diálogo de Reprocessar
+                codigo_rejeicao, acao = self.politica_rejeicao().decidir(
+                    nota_data, dados.get('observacao_completa') or dados.get('observacao', ''), chave_linha(dados))
+                precisa_reprocessar = acao is AcaoRejeicao.REPROCESSAR
+                if not precisa_reprocessar:
+                    status = self.status_sem_reprocesso(codigo_rejeicao, acao)
+                    logger.info("   %s", status)
             
             if precisa_reprocessar:
-                print(f"   🚫 Nota rejeitada, INICIANDO REPROCESSAMENTO IMEDIATO...")
+                logger.info("   🚫 Nota rejeitada, INICIANDO REPROCESSAMENTO IMEDIATO...")
                 
                 # REPROCESSAMENTO DIRETO - SEM REPESQUISAR
-                sucesso_reprocessamento = self.reprocessar_nota_diretamente()
+                with self.acao_limitada('reprocesso') as acao:
+                    with orcamento.fase('reprocesso', self.auth_manager):
+                        sucesso_reprocessamento = self.reprocessar_nota_diretamente()
+                    medir('reprocesso')
+                    if not sucesso_reprocessamento:
+                        acao.falhou("reprocesso não concluído")
                 
                 if sucesso_reprocessamento:
                     status = "✅ REPROCESSADO COM SUCESSO"
                     reprocessado = True
-                    print(f"   ✅ Status final: REPROCESSADO COM SUCESSO")
+                    logger.info("   ✅ Status final: REPROCESSADO COM SUCESSO")
                 else:
                     status = "❌ FALHA NO REPROCESSAMENTO"
                     reprocessado = False
-                    print(f"   ❌ Status final: FALHA NO REPROCESSAMENTO")
+                    logger.warning("   ❌ Status final: FALHA NO REPROCESSAMENTO - %s", chave_acesso)
             else:
                 reprocessado = False
-                print(f"   ✅ Status final: {status}")
+                logger.info("   ✅ Status final: %s", status)
             
-            return {
-                "nota_data": nota_data,
-                "status": status,
-                "dados_completos": dados,
-                "reprocessado": reprocessado
-            }
+            self.estouros.update(orcamento.estouros)
+            return NoteResult(nota_data, status, dados, reprocessado, codigo_rejeicao=codigo_rejeicao, tempos=tempos,
+                              estouros=orcamento.estouros)
+            
+        except PrazoEsgotado as e:
+            medir('erro')
+            self.estouros.update(orcamento.estouros)
+            logger.warning("   ⏱️  %s: %s", chave_acesso, e)
+            return NoteResult(nota_data, f"{STATUS_PRAZO_ESGOTADO} ({e.fase})", tempos=tempos,
+                              estouros=orcamento.estouros)
             
         except Exception as e:
             error_msg = f"❌ Erro na nota {chave_acesso}: {e}"
-            print(f"   {error_msg}")
-            return {
-                "nota_data": nota_data,
-                "status": error_msg,
-                "dados_completos": {},
-                "reprocessado": False
-            }
+            logger.error("   %s", error_msg)
+            medir('erro')
+            return NoteResult(nota_data, error_msg, tempos=tempos)
     
     def reprocessar_nota_diretamente(self):
         """Reprocessa a nota diretamente sem repesquisar - usa a nota já encontrada"""
         try:
-            print("   🔄 EXECUTANDO REPROCESSAMENTO DIRETO...")
+            logger.debug("   🔄 EXECUTANDO REPROCESSAMENTO DIRETO...")
             
             # 1. Chamar o reprocessamento do AuthManager DIRETAMENTE
             # A nota já está selecionada/identificada na tela atual
-            print("   🔄 Acionando reprocessamento direto...")
             success = self.auth_manager.reprocessar_notas_selecionadas()
             
             if success:
-                print("   ✅ REPROCESSAMENTO DIRETO CONCLUÍDO!")
-                
-                # Aguarda um pouco após sucesso
-                time.sleep(2)
+                logger.debug("   ✅ REPROCESSAMENTO DIRETO CONCLUÍDO!")
                 
-                # Volta para tela de pesquisa para próxima nota
-                print("   🧭 Voltando para tela de pesquisa...")
+                # Sem esperar o servidor: a confirmação fica com o ReprocessVerifier
+                logger.debug("   🧭 Voltando para tela de pesquisa...")
                 self.auth_manager.navigate_to_search_screen()
-                time.sleep(2)
                 
                 return True
             else:
-                print("   ❌ REPROCESSAMENTO DIRETO FALHOU")
+                logger.warning("   ❌ REPROCESSAMENTO DIRETO FALHOU")
                 return False
                 
+        except PrazoEsgotado:
+            raise
         except Exception as e:
-            print(f"   ❌ Erro no reprocessamento direto: {e}")
+            logger.error("   ❌ Erro no reprocessamento direto: %s", e)
             return False
     
-    def search_multiple_invoices(self):
+    def planejar_lote(self):
+        """Estima a duração do lote pelo histórico e recomenda quantas sessões usar"""
+        if not self.config.plan.enabled:
+            return None
+        try:
+            from analytics.planner import planejar
+            # Cada sessão precisa da própria conta do monitor: as contas ativas limitam as sessões
+            capacidade = contas_compartilhadas(self.config).capacidade
+            config_plano = replace(self.config.plan, max_workers=max(1, min(self.config.plan.max_workers, capacidade)))
+            plano = planejar(self.notas_fiscais, config_plano)
+        except Exception as e:
+            logger.warning("⚠️  Planejamento indisponível: %s", e)
+            return None
+        
+        print(plano.resumo())
+        if plano.workers > 1 and not self.config.plan.auto:
+            print(f"💡 Use PLAN_AUTO=true no .env para rodar com {plano.workers} sessões")
+        print("=" * 60)
+        return plano
+    
+    def search_multiple_invoices(self, plano=None):
         """Pesquisa múltiplas notas fiscais com reprocessamento imediato integrado"""
-        resultados = []
-        notas_com_erro = []
+        lote = NoteBatch()
+        estimativa = None
+        if plano:
+            from analytics.planner import EstimativaAoVivo
+            estimativa = EstimativaAoVivo(plano)
         
         print(f"🚀 Iniciando busca para {len(self.notas_fiscais)} notas fiscais...")
         print("💡 MODO: CONSULTA ÚNICA + REPROCESSAMENTO DIRETO")
         print("=" * 60)
         
-        for i, nota_data in enumerate(self.notas_fiscais, 1):
+        # Uma linha de progresso no console; o detalhe de cada nota vai para o log NDJSON
+        progresso = ProgressLine(len(self.notas_fiscais), eta=estimativa.restante if estimativa else None)
+        
+        # Notas com prazo esgotado voltam para o fim da fila em vez de travar o lote
+        pendentes = deque(self.notas_fiscais)
+        recolocadas = Counter()
+        i = 0
+        while pendentes:
+            nota_data = pendentes.popleft()
+            i += 1
             try:
-                print(f"\n[{i}/{len(self.notas_fiscais)}] Processando nota...")
+                logger.info("[%s/%s] Processando nota...", i, len(self.notas_fiscais) + sum(recolocadas.values()))
                 
                 # 🔥 AGORA: Faz a consulta E reprocessamento DIRETO na mesma chamada
-                dados_nota = self.search_single_invoice_with_immediate_reprocess(nota_data)
-                resultados.append(dados_nota)
+                dados_nota = self.processar_nota(nota_data)
+                if dados_nota.prazo_esgotado:
+                    self.recuperar_apos_prazo()
+                    if recolocadas[nota_data['chave']] < self.config.deadline.recolocar:
+                        recolocadas[nota_data['chave']] += 1
+                        pendentes.append(nota_data)
+                        continue
+                lote.adicionar(dados_nota)
+                if estimativa:
+                    estimativa.concluir(nota_data['chave'], dados_nota.tempos)
+                progresso.update(dados_nota.outcome.icone, nota_data['chave'])
                 
-                # Pequena pausa entre notas
-                if i < len(self.notas_fiscais):
-                    print("   ⏳ Aguardando antes da próxima nota...")
-                    time.sleep(2)
+                # Confirmação adiada: só consulta quando um grupo de reprocessos vence
+                self.verificador.registrar(dados_nota)
+                self.verificador.verificar_vencidos()
                     
             except Exception as e:
-                error_msg = f"❌ Erro crítico na nota {nota_data['chave']}: {e}"
-                print(f"   {error_msg}")
-                notas_com_erro.append({
-                    'nota_data': nota_data,
-                    'erro': str(e)
-                })
+                logger.error("   ❌ Erro crítico na nota %s: %s", nota_data['chave'], e)
+                lote.adicionar_erro(nota_data, str(e))
+                progresso.update("❌", nota_data['chave'])
                 continue
         
-        return {
-            'resultados': resultados,
-            'notas_com_erro': notas_com_erro,
-            'total_notas_processadas': len(resultados),
-            'total_registros_encontrados': len(resultados)
-        }
+        progresso.finish()
+        
+        if self.verificador.pendentes:
+            print(f"🔎 Confirmando {len(self.verificador.pendentes)} reprocesso(s) em lote...")
+            self.verificador.finalizar()
+        
+        if self.politica:
+            print(f"🧭 Política de rejeição: {self.politica.resumo()}")
+        print(f"🚦 Limitador: {self.limitador.resumo()}")
+        self.relatar_estouros(self.estouros)
+        self.relatar_sessoes()
+        print(f"🧠 Página: {self.reciclagem.resumo()}")
+        
+        return lote
+    
+    def relatar_sessoes(self):
+        proxies = self.proxies or pool_compartilhado(self.config)
+        print("🌐 Proxies:\n" + proxies.resumo())
+        print("👥 Contas do monitor:\n" + contas_compartilhadas(self.config).resumo())
+    
+    @staticmethod
+    def relatar_estouros(estouros: Counter):
+        if estouros:
+            print("⏱️  Fases acima do orçamento: " + " | ".join(f"{fase}: {n}" for fase, n in estouros.most_common()))
+    
+    def search_multiple_invoices_paralelo(self, plano):
+        """Divide o lote entre plano.workers sessões, cada uma com thread e navegador próprios
+
+        As notas saem de uma fila comum na ordem do plano (as mais demoradas primeiro); se
+        uma sessão não consegue logar, as outras seguem com as notas que sobrarem.
+        """
+        from analytics.planner import EstimativaAoVivo
+        
+        lote = NoteBatch()
+        fila = queue.Queue()
+        for nota in plano.notas:
+            fila.put(nota)
+        trava = threading.Lock()
+        recolocadas, estouros = Counter(), Counter()
+        estimativa = EstimativaAoVivo(plano, plano.workers)
+        politica = self.politica_rejeicao()
+        
+        print(f"🚀 Iniciando busca para {len(plano.notas)} notas fiscais em {plano.workers} sessões...")
+        print("=" * 60)
+        progresso = ProgressLine(len(plano.notas), eta=estimativa.restante)
+        
+        def sessao():
+            app = NFScraperApp(self.config, notas_fiscais=[])
+            app.politica = politica
+            try:
+                app.iniciar_sessao()
+                while True:
+                    try:
+                        nota_data = fila.get_nowait()
+                    except queue.Empty:
+                        break
+                    try:
+                        dados_nota = app.processar_nota(nota_data)
+                        if dados_nota.prazo_esgotado:
+                            app.recuperar_apos_prazo()
+                            with trava:
+                                recolocar = recolocadas[nota_data['chave']] < self.config.deadline.recolocar
+                                if recolocar:
+                                    recolocadas[nota_data['chave']] += 1
+                            if recolocar:
+                                fila.put(nota_data)
+                                continue
+                        app.verificador.registrar(dados_nota)
+                        app.verificador.verificar_vencidos()
+                    except Exception as e:
+                        logger.error("   ❌ Erro crítico na nota %s: %s", nota_data['chave'], e)
+                        with trava:
+                            lote.adicionar_erro(nota_data, str(e))
+                            progresso.update("❌", nota_data['chave'])
+                        continue
+                    with trava:
+                        lote.adicionar(dados_nota)
+                        estimativa.concluir(nota_data['chave'], dados_nota.tempos)
+                        progresso.update(dados_nota.outcome.icone, nota_data['chave'])
+                if app.verificador and app.verificador.pendentes:
+                    app.verificador.finalizar()
+            except Exception as e:
+                logger.error("❌ %s: sessão encerrada: %s", threading.current_thread().name, e)
+            finally:
+                with trava:
+                    estouros.update(app.estouros)
+                print(f"🧠 {threading.current_thread().name}: {app.reciclagem.resumo()}")
+                app.close()
+        
+        threads = [threading.Thread(target=sessao, name=f"sessao-{n}") for n in range(1, plano.workers + 1)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        # Nenhuma sessão sobrou para estas notas
+        while not fila.empty():
+            lote.adicionar_erro(fila.get_nowait(), "nenhuma sessão disponível")
+        progresso.finish()
+        print(f"🧭 Política de rejeição: {politica.resumo()}")
+        print(f"🚦 Limitador: {self.limitador.resumo()}")
+        self.relatar_estouros(estouros)
+        self.relatar_sessoes()
+        return lote
     
-    def display_batch_results(self, batch_result):
-        """Exibe resultados do processamento em lote"""
+    def display_batch_results(self, batch_result: NoteBatch):
+        """Exibe resultados do processamento em lote (contadores já vêm do lote, detalhe em uma passada)"""
         print("\n" + "="*60)
         print("📋 RELATÓRIO FINAL DO PROCESSAMENTO")
         print("="*60)
         
-        # Contadores
-        notas_reprocessadas = sum(1 for r in batch_result['resultados'] if r.get('reprocessado', False))
-        notas_com_sucesso = sum(1 for r in batch_result['resultados'] if '✅' in str(r.get('status', '')) and 'REPROCESSADO' not in str(r.get('status', '')))
-        notas_reprocessadas_sucesso = sum(1 for r in batch_result['resultados'] if 'REPROCESSADO COM SUCESSO' in str(r.get('status', '')))
-        notas_com_erro = sum(1 for r in batch_result['resultados'] if '❌' in str(r.get('status', '')) or 'FALHA' in str(r.get('status', '')))
-        
-        print(f"✅ Notas processadas com sucesso: {notas_com_sucesso}")
-        print(f"🔄 Notas reprocessadas com sucesso: {notas_reprocessadas_sucesso}")
-        print(f"❌ Notas com erro: {notas_com_erro}")
-        print(f"📊 Total de registros processados: {batch_result['total_registros_encontrados']}")
+        contagem = batch_result.contagem
+        print(f"✅ Notas processadas com sucesso: {contagem[NoteOutcome.SUCESSO]}")
+        print(f"🔄 Notas reprocessadas com sucesso: {contagem[NoteOutcome.REPROCESSADO]}")
+        print(f"🚫 Notas rejeitadas sem reprocesso: {contagem[NoteOutcome.REJEITADO]}")
+        print(f"🔍 Notas não encontradas: {contagem[NoteOutcome.NAO_ENCONTRADA]}")
+        print(f"❌ Notas com erro: {contagem[NoteOutcome.ERRO]}")
+        print(f"📊 Total de registros processados: {batch_result.total_registros_encontrados}")
         
-        if batch_result['notas_com_erro']:
+        if batch_result.notas_com_erro:
             print(f"\n🔴 Notas com erro crítico:")
-            for erro in batch_result['notas_com_erro']:
-                print(f"   - {erro['nota_data']['chave']}: {erro['erro']}")
+            for nota_data, erro in batch_result.notas_com_erro:
+                print(f"   - {nota_data['chave']}: {erro}")
         
-        # Detalhamento
+        # Detalhamento: no console só as notas que pedem atenção, o resto vai para o log
         print("\n" + "-"*50)
-        print("DETALHAMENTO POR NOTA FISCAL:")
+        print("NOTAS QUE PEDEM ATENÇÃO:")
         print("-"*50)
         
-        for resultado in batch_result['resultados']:
-            nota_data = resultado['nota_data']
-            status = str(resultado['status'])
-            reprocessado = resultado.get('reprocessado', False)
-            
-            # Determina o ícone baseado no status
-            if '❌' in status or 'Erro' in status or 'FALHA' in status:
-                status_icon = "❌"
-            elif 'Rejeitado' in status:
-                status_icon = "🚫"
-            elif 'não tem nota' in status.lower():
-                status_icon = "🔍"
-            elif 'REPROCESSADO' in status:
-                status_icon = "🔄"
-            else:
-                status_icon = "✅"
+        verificados = confirmados = 0
+        for resultado in batch_result.resultados:
+            nota_data = resultado.nota_data
+            status_icon = resultado.outcome.icone
             
             # Adiciona ícone de reprocessamento se aplicável
-            reprocess_icon = " 🔄" if reprocessado else ""
+            reprocess_icon = " 🔄" if resultado.reprocessado else ""
             
             # Mostra informações adicionais
             info_extra = f" | Fiscal Doc: {nota_data.get('fiscal_doc_no', 'N/A')}"
             info_extra += f" | Série: {nota_data.get('series_no', 'N/A')}"
             
-            print(f"{status_icon}{reprocess_icon} {nota_data['chave']}: {status}{info_extra}")
+            if resultado.status_confirmado:
+                verificados += 1
+                confirmados += resultado.status_confirmado.startswith('✅')
+                info_extra += f" | Confirmação: {resultado.status_confirmado}"
+            
+            logger.info("%s%s %s: %s%s", status_icon, reprocess_icon, nota_data['chave'], resultado.status, info_extra)
+            if resultado.outcome not in (NoteOutcome.SUCESSO, NoteOutcome.REPROCESSADO):
+                print(f"{status_icon}{reprocess_icon} {nota_data['chave']}: {resultado.status}{info_extra}")
+        
+        if verificados:
+            print(f"\n🔎 Reprocessos confirmados: {confirmados}/{verificados}")
     
-    def save_results_to_file(self, batch_result, filename=None):
-        """Salva os resultados completos em um arquivo CSV na pasta /sheets"""
-        import pandas as pd
-        from datetime import datetime
-        import os
-
+    def save_results_to_file(self, batch_result: NoteBatch, filename=None):
+        """Salva os resultados completos em um arquivo CSV na pasta /sheets (sem pandas)"""
         # Criar pasta sheets se não existir
         sheets_dir = "sheets"
         if not os.path.exists(sheets_dir):
@@ -384,8 +816,8 @@ class NFScraperApp:
         # Prepara dados para CSV com estrutura completa do JSON
         dados = []
         
-        for resultado in batch_result['resultados']:
-            nota_data = resultado['nota_data']
+        for resultado in batch_result.resultados:
+            nota_data = resultado.nota_data
             
             linha_csv = {
                 'chave_acesso': nota_data['chave'],
@@ -393,39 +825,52 @@ class NFScraperApp:
                 'series_no': nota_data.get('series_no', ''),
                 'location_id': nota_data.get('location_id', ''),
                 'chave_aux': nota_data.get('chave_aux', ''),
-                'status': resultado['status'],
-                'reprocessado': 'Sim' if resultado.get('reprocessado', False) else 'Não',
+                'status': resultado.status,
+                'reprocessado': 'Sim' if resultado.reprocessado else 'Não',
                 'data_consulta': datetime.now().strftime('%d/%m/%Y %H:%M:%S'),
                 'protocolo': nota_data.get('protocolo', '')
             }
             
+            if resultado.status_confirmado is not None:
+                linha_csv['status_confirmado'] = resultado.status_confirmado
+                linha_csv['verificado_em'] = resultado.verificado_em or ''
+            if resultado.codigo_rejeicao is not None:
+                linha_csv['codigo_rejeicao'] = resultado.codigo_rejeicao
+            for fase, segundos in resultado.tempos.items():
+                linha_csv[f'tempo_{fase}_s'] = segundos
+            if resultado.estouros:
+                linha_csv['estouros'] = ";".join(f"{fase}={segundos}" for fase, segundos in resultado.estouros.items())
+            
             # Adiciona dados completos da consulta
-            dados_completos = resultado.get('dados_completos', {})
+            dados_completos = resultado.dados_completos
             if dados_completos and isinstance(dados_completos, dict):
                 for chave, valor in dados_completos.items():
                     linha_csv[chave] = valor
             
             dados.append(linha_csv)
         
-        for erro in batch_result['notas_com_erro']:
-            nota_data = erro['nota_data']
+        for nota_data, erro in batch_result.notas_com_erro:
             dados.append({
                 'chave_acesso': nota_data['chave'],
                 'fiscal_doc_no': nota_data.get('fiscal_doc_no', ''),
                 'series_no': nota_data.get('series_no', ''),
                 'location_id': nota_data.get('location_id', ''),
                 'chave_aux': nota_data.get('chave_aux', ''),
-                'status': f"ERRO: {erro['erro']}",
+                'status': f"ERRO: {erro}",
                 'reprocessado': 'Não',
                 'data_consulta': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
             })
         
         if dados:
-            df = pd.DataFrame(dados)
-            df.to_csv(filepath, index=False, encoding='utf-8-sig')
+            # Mesmas colunas que o DataFrame geraria: união das chaves na ordem em que aparecem
+            colunas = list(dict.fromkeys(coluna for linha in dados for coluna in linha))
+            with open(filepath, 'w', newline='', encoding='utf-8-sig') as arquivo:
+                writer = csv.DictWriter(arquivo, fieldnames=colunas)
+                writer.writeheader()
+                writer.writerows(dados)
             print(f"💾 Resultados COMPLETOS salvos em: {filepath}")
-            print(f"   📊 Total de colunas: {len(df.columns)}")
-            print(f"   📋 Colunas: {', '.join(df.columns.tolist()[:8])}...")
+            print(f"   📊 Total de colunas: {len(colunas)}")
+            print(f"   📋 Colunas: {', '.join(colunas[:8])}...")
             return filepath
         else:
             print("📝 Nenhum dado para salvar.")
@@ -441,12 +886,15 @@ class NFScraperApp:
             print("❌ Nenhuma nota para processar")
             return
         
-        self.setup_browser()
-        self.navigate_to_initial_page()
-        self.perform_full_login()
-        
-        # 🔥 AGORA: Só uma chamada - já inclui consulta E reprocessamento DIRETO
-        batch_result = self.search_multiple_invoices()
+        # Estimativa antes de abrir o navegador; com PLAN_AUTO, as sessões recomendadas são usadas
+        plano = self.planejar_lote()
+        if plano and plano.workers > 1 and self.config.plan.auto:
+            batch_result = self.search_multiple_invoices_paralelo(plano)
+        else:
+            self.iniciar_sessao()
+            
+            # 🔥 AGORA: Só uma chamada - já inclui consulta E reprocessamento DIRETO
+            batch_result = self.search_multiple_invoices(plano)
         
         self.display_batch_results(batch_result)
         arquivo_salvo = self.save_results_to_file(batch_result)
@@ -455,6 +903,102 @@ class NFScraperApp:
         if arquivo_salvo:
             print(f"💾 Arquivo salvo: {arquivo_salvo}")
     
+    def executar_monitoramento(self):
+        """Modo contínuo: consulta rejeições novas desde a marca d'água e reprocessa em lote"""
+        from scrapers.monitor_poller import RejectionPoller
+        
+        print("🚀 Iniciando monitoramento contínuo de rejeições...")
+        print(f"⏱️  Intervalo: {self.config.poller.interval_s}s | Estado: {self.config.poller.state_path}")
+        print("=" * 60)
+        
+        self.iniciar_sessao()
+        poller = RejectionPoller(self.auth_manager, self.data_scraper, self.config.poller)
+        resultados_pendentes = []
+        
+        while True:
+            try:
+                if not self.garantir_sessao():
+                    raise RuntimeError("sessão indisponível")
+                
+                with self.acao_limitada('monitor_consulta', lote=True):
+                    novas = poller.poll()
+                if novas:
+                    lote = NoteBatch()
+                    for resultado in self.reprocessar_lote_monitor(poller, novas):
+                        lote.adicionar(resultado)
+                        self.verificador.registrar(resultado)
+                    self.save_results_to_file(
+                        lote, filename=f"resultados_monitor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+                    resultados_pendentes.extend(lote.resultados)
+                else:
+                    print(f"💤 {datetime.now().strftime('%H:%M:%S')} nenhuma rejeição nova")
+                
+                if self.verificador.verificar_vencidos():
+                    self.relatar_confirmacoes(resultados_pendentes)
+                    resultados_pendentes = [r for r in resultados_pendentes
+                                            if (r.status_confirmado or '').startswith('⏳')]
+            except Exception as e:
+                logger.error("❌ Erro no ciclo de monitoramento: %s", e)
+            
+            time.sleep(self.config.poller.interval_s)
+    
+    def reprocessar_lote_monitor(self, poller, novas):
+        """Reprocessa as linhas novas e só avança a marca d'água com as que deram certo"""
+        from scrapers.monitor_poller import nota_da_linha
+        
+        # Pulados e enviados à fila também contam como tratados: não voltam na próxima consulta
+        politica = self.politica_rejeicao()
+        codigos, decididas, reprocessar = {}, [], []
+        for linha in novas:
+            codigo, acao = politica.decidir(nota_da_linha(linha), linha.get('observacao', ''), chave_linha(linha))
+            codigos[chave_linha(linha)] = codigo
+            if acao is AcaoRejeicao.REPROCESSAR:
+                reprocessar.append(linha)
+            else:
+                decididas.append(NoteResult(nota_da_linha(linha), self.status_sem_reprocesso(codigo, acao), linha,
+                                            codigo_rejeicao=codigo))
+        
+        print(f"🚫 {len(novas)} rejeição(ões) nova(s), reprocessando {len(reprocessar)} em lote...")
+        resultados = []
+        if reprocessar:
+            with self.acao_limitada('reprocesso_lote', lote=True) as acao:
+                resultados = poller.reprocessar(reprocessar)
+                if not any(r.reprocessado for r in resultados):
+                    acao.falhou("nenhum reprocesso do lote concluído")
+        for resultado in resultados:
+            resultado.codigo_rejeicao = codigos.get(chave_linha(resultado.dados_completos))
+        
+        tratadas = [r.dados_completos for r in resultados if r.reprocessado] + [r.dados_completos for r in decididas]
+        falhas = [r.dados_completos for r in resultados if not r.reprocessado]
+        resultados += decididas
+        # As que falharam seguram a marca d'água na data delas e voltam numa consulta seguinte;
+        # as que já falharam POLL_MAX_RETRIES vezes vão para a fila humana
+        for linha in poller.confirmar(tratadas, falhas):
+            politica.enfileirar(nota_da_linha(linha), codigos.get(chave_linha(linha), ''),
+                                linha.get('observacao', ''), chave_linha(linha))
+        
+        for resultado in resultados:
+            print(f"{resultado.outcome.icone} {resultado.nota_data['fiscal_doc_no']}: {resultado.status}")
+        return resultados
+    
+    def relatar_confirmacoes(self, resultados):
+        """Mostra os reprocessos do monitoramento que acabaram de ser confirmados"""
+        for resultado in resultados:
+            confirmado = resultado.status_confirmado or ''
+            if confirmado and not confirmado.startswith('⏳'):
+                print(f"   🔎 {resultado.nota_data['fiscal_doc_no']}: {confirmado}")
+    
+    def medir_primeira_navegacao(self, inicio_processo: float):
+        """Abre o navegador, navega uma vez e informa o tempo até a primeira navegação"""
+        try:
+            self.setup_browser()
+            self.page.goto("http://nfecd-gpa.unisys.com.br/eFormseMonitor/", wait_until="commit")
+            decorrido = time.perf_counter() - inicio_processo
+            # Marcador lido por scripts/bench_startup.py
+            print(f"FIRST_NAV {decorrido:.3f}", flush=True)
+        finally:
+            self.close()
+    
     def run(self):
         """Executa o fluxo completo baseado no FLUXO configurado"""
         try:
@@ -474,16 +1018,168 @@ class NFScraperApp:
     
     def close(self):
         """Fecha recursos"""
+        if self.proxies and self.proxy:
+            self.proxies.liberar(self.proxy)
+            self.proxy = None
+        if self.contas and self.conta:
+            self.contas.liberar(self.conta)
+            self.conta = None
+        if self.context:
+            # Fechar o contexto antes do navegador é o que grava o HAR (modo gravar)
+            self.fechar_contexto(self.context)
+            self.context = None
         if self.browser:
             self.browser.close()
+            self.browser = None
             print("🔚 Navegador fechado.")
+        if self.playwright:
+            self.playwright.stop()
+            self.playwright = None
+        if self.har:
+            print(f"📼 Replay: {self.har.resumo()}")
+        # Contextos que só fecharam junto com o navegador
+        for caminho in self.har_gravados.values():
+            self.higienizar_gravacao(caminho)
+        self.har_gravados = {}
+    
+    def higienizar_gravacao(self, caminho: str):
+        """Tira credenciais e cookies de sessão de um HAR gravado por este app"""
+        if not os.path.exists(caminho):
+            return
+        try:
+            entradas = higienizar_har(caminho, segredos(self.config.credentials))
+            print(f"📼 HAR gravado: {caminho} ({entradas} requisições, credenciais removidas)")
+        except Exception as e:
+            # HAR com credenciais não pode ficar no disco
+            os.remove(caminho)
+            logger.error("❌ Falha ao higienizar %s, arquivo removido: %s", caminho, e)
+
+def configurar_har(config, args):
+    """--gravar-har/--reproduzir-har sobre o HAR_MODE do .env; o replay loga com as credenciais substitutas"""
+    har = config.har
+    if args.gravar_har is not None:
+        har = replace(har, modo="gravar", caminho=args.gravar_har or har.caminho)
+    elif args.reproduzir_har is not None:
+        har = replace(har, modo="reproduzir", caminho=args.reproduzir_har or har.caminho)
+    if har.modo == "reproduzir":
+        # Offline: só o proxy principal (sem sondagem do pool) e as credenciais que o HAR higienizado contém
+        return replace(config, har=har, proxies=[config.proxy], credentials=credenciais_replay(config.credentials))
+    return replace(config, har=har)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="NF-Scraper - automação de notas fiscais")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="mostra o custo de importação de cada módulo e sai")
+    parser.add_argument('--first-nav', action='store_true',
+                        help="abre o navegador, faz a primeira navegação e sai (benchmark de inicialização)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="mantém sessões logadas e recebe jobs pela API local e pela pasta de entrada")
+    parser.add_argument('--watch', action='store_true',
+                        help="consulta rejeições novas periodicamente e reprocessa sem arquivo de entrada")
+    har = parser.add_mutually_exclusive_group()
+    har.add_argument('--gravar-har', nargs='?', const='', metavar='ARQUIVO', default=None,
+                     help="grava a sessão em HAR (sem credenciais) para rodar offline depois; padrão HAR_PATH")
+    har.add_argument('--reproduzir-har', nargs='?', const='', metavar='ARQUIVO', default=None,
+                     help="roda offline respondendo o navegador a partir do HAR gravado")
+    parser.add_argument('--preencher-protocolos', action='store_true',
+                        help="aquece o cache de protocolos (histórico CSV + XMLs) e completa o notas_fiscais.json")
+    parser.add_argument('--relatorio', choices=['motivos', 'locais', 'reprocesso', 'consultas', 'todos'],
+                        help="análise do histórico em sheets/ (motivos de rejeição, rejeições por local, "
+                             "sucesso do reprocesso por motivo, consultas de protocolo) e sai")
+    parser.add_argument('--dias', type=int, default=None,
+                        help="com --relatorio: considera só os últimos N dias")
+    parser.add_argument('--exportar', metavar='PASTA', default=None,
+                        help="com --relatorio: grava cada tabela em CSV nesta pasta")
+    return parser.parse_args(argv)
+
+def gerar_relatorios(args):
+    """Agrega o histórico de execuções (sheets/*.csv) com o cache de arquivos já interpretados"""
+    import pandas as pd
+    from analytics.history import carregar_historico
+    from analytics.reports import RELATORIOS, exportar, gerar
+    
+    inicio = time.perf_counter()
+    historico = carregar_historico()
+    nomes = list(RELATORIOS) if args.relatorio == 'todos' else [args.relatorio]
+    tabelas = gerar(historico, nomes, args.dias)
+    periodo = f"últimos {args.dias} dia(s)" if args.dias else "histórico completo"
+    
+    with pd.option_context('display.width', 160, 'display.max_colwidth', 60):
+        for nome, tabela in tabelas.items():
+            print(f"\n📊 {nome.upper()} ({periodo})")
+            print(tabela.to_string() if not tabela.empty else "   (sem dados)")
+    if args.exportar:
+        for nome, caminho in exportar(tabelas, args.exportar).items():
+            print(f"💾 {nome}: {caminho}")
+    print(f"\n📚 {historico.arquivos} arquivo(s), {historico.relidos} relido(s) | "
+          f"{time.perf_counter() - inicio:.2f}s")
+
+def preencher_protocolos(config: AppConfig):
+    """Aquece o cache com o histórico de consultas e os XMLs baixados e completa o notas_fiscais.json"""
+    cache = ProtocolCache(config.protocol_cache)
+    pasta_xmls = os.path.join(os.getcwd(), "xmls")
+    cache.aquecer_csv(os.path.join(os.getcwd(), "sheets", "resultados_consultas.csv"), pasta_xmls)
+    if os.path.isdir(pasta_xmls):
+        store = XmlStore(pasta_xmls, limite_mb=config.xml_store_max_mb)
+        store.importar_soltos()
+        cache.aquecer_store(store)
+        store.fechar()
+    
+    json_path = os.path.join(os.getcwd(), "notas_fiscais.json")
+    preenchidas = cache.preencher_json(json_path) if os.path.exists(json_path) else 0
+    print(f"🗃️  Cache de protocolos: {len(cache)} chave(s) | {preenchidas} nota(s) completada(s) em {json_path}")
+    cache.close()
+
+def report_startup_profile():
+    """Importa também os módulos adiados para mostrar o custo total de inicialização"""
+    for modulo in ('playwright.sync_api', 'pandas'):
+        try:
+            __import__(modulo)
+        except ImportError as e:
+            print(f"⚠️  {modulo} não disponível: {e}")
+    _import_profiler.uninstall()
+    print(_import_profiler.report())
 
 def main():
+    args = parse_args()
+    
+    if args.profile_startup:
+        report_startup_profile()
+        return
+    
     try:
         # Carrega configurações
-        config = AppConfig.from_env()
+        config = configurar_har(AppConfig.from_env(), args)
+        setup_logging(config.logging)
         print("✅ Configurações carregadas!")
         
+        if args.first_nav:
+            NFScraperApp(config).medir_primeira_navegacao(_INICIO_PROCESSO)
+            return
+        
+        if args.preencher_protocolos:
+            preencher_protocolos(config)
+            return
+        
+        if args.relatorio:
+            gerar_relatorios(args)
+            return
+        
+        if args.daemon:
+            from daemon.service import NFScraperDaemon
+            NFScraperDaemon(config, NFScraperApp).serve_forever()
+            return
+        
+        if args.watch:
+            app = NFScraperApp(config, notas_fiscais=[])
+            try:
+                app.executar_monitoramento()
+            except KeyboardInterrupt:
+                print("\n🛑 Monitoramento interrompido.")
+            finally:
+                app.close()
+            return
+        
         # Executa aplicação
         app = NFScraperApp(config)
         app.run()
@@ -492,4 +1188,6 @@ def main():
         print(f"❌ Erro na execução: {e}")
 
 if __name__ == "__main__":
+    # Leitura de XMLs em paralelo (--preencher-protocolos) no executável do PyInstaller
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -1,31 +1,54 @@
-from dataclasses import dataclass
-from typing import List, Dict, Any
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum
+from typing import List, Dict, Any, Optional, Tuple
 
-@dataclass
+class InvoiceStatus(IntEnum):
+    """Status do grid como código inteiro (usado em máscaras e contagens vetorizadas)"""
+    APROVADO = 0
+    REJEITADO = 1
+    PENDENTE = 2
+    OUTRO = 3
+
+def parse_status(texto: str) -> InvoiceStatus:
+    """Interpreta o texto livre da coluna de status uma única vez"""
+    texto = texto or ''
+    if "Rejeitado" in texto:
+        return InvoiceStatus.REJEITADO
+    if "Pendente" in texto:
+        return InvoiceStatus.PENDENTE
+    if "Aprovado" in texto or "Autorizado" in texto:
+        return InvoiceStatus.APROVADO
+    return InvoiceStatus.OUTRO
+
+@dataclass(slots=True)
 class Invoice:
     """Representa uma nota fiscal"""
     numero_nota: str  # Número da nota fiscal sendo pesquisada
     data: Dict[str, str]  # Dados extraídos
+    status_code: InvoiceStatus = field(init=False)
+    
+    def __post_init__(self):
+        # Interpretado uma vez; aceita linha nomeada ('status') ou col_N canônica ('col_7', ver GRID_HEADERS)
+        self.status_code = parse_status(self.data.get('status', self.data.get('col_7', '')))
     
     @property
     def is_rejected(self) -> bool:
-            return "Rejeitado" in self.data.get('col_7', '')
+        return self.status_code is InvoiceStatus.REJEITADO
     
     @property
     def is_pending(self) -> bool:
-        return "Pendente" in self.data.get('col_7', '')
+        return self.status_code is InvoiceStatus.PENDENTE
     
     @property
     def status(self) -> str:
-        status_text = self.data.get('col_7', '')
-        if "Rejeitado" in status_text:
+        if self.status_code is InvoiceStatus.REJEITADO:
             return "Rejeitado"
-        elif "Pendente" in status_text:
+        elif self.status_code is InvoiceStatus.PENDENTE:
             return "Pendente"
         else:
             return "Aprovado"
 
-@dataclass
+@dataclass(slots=True)
 class ScrapingResult:
     """Resultado do processo de scraping para uma nota fiscal"""
     nota_fiscal: str
@@ -35,19 +58,120 @@ class ScrapingResult:
     rejected_count: int
     
     def __post_init__(self):
-        self.rejected_count = len([inv for inv in self.invoices if inv.is_rejected])
+        self.rejected_count = sum(1 for inv in self.invoices if inv.is_rejected)
 
-@dataclass
+@dataclass(slots=True)
 class BatchScrapingResult:
-    """Resultado do processamento em lote"""
+    """Resultado do processamento em lote (totais mantidos a cada resultado adicionado)"""
     resultados: List[ScrapingResult]
     total_notas_processadas: int
     notas_com_erro: List[str]
+    total_notas_rejeitadas: int = field(init=False, default=0)
+    total_registros_encontrados: int = field(init=False, default=0)
+    
+    def __post_init__(self):
+        iniciais, self.resultados = self.resultados, []
+        for result in iniciais:
+            self.adicionar(result)
+    
+    def adicionar(self, result: ScrapingResult):
+        self.resultados.append(result)
+        self.total_registros_encontrados += result.total_invoices
+        if result.rejected_count > 0:
+            self.total_notas_rejeitadas += 1
+
+class NoteOutcome(Enum):
+    """Desfecho de uma nota no fluxo Unisys, com o ícone usado nos relatórios"""
+    SUCESSO = "✅"
+    REPROCESSADO = "🔄"
+    REJEITADO = "🚫"
+    NAO_ENCONTRADA = "🔍"
+    ERRO = "❌"
+    
+    @property
+    def icone(self) -> str:
+        return self.value
+
+# Status de uma nota interrompida pelo orçamento de tempo (utils.deadline); conta como ERRO
+STATUS_PRAZO_ESGOTADO = "❌ Prazo esgotado"
+
+def classificar_status(status: str) -> NoteOutcome:
+    """Interpreta o texto de status de uma nota uma única vez"""
+    if '❌' in status or 'Erro' in status or 'FALHA' in status:
+        return NoteOutcome.ERRO
+    elif 'Rejeitado' in status:
+        return NoteOutcome.REJEITADO
+    elif 'não tem nota' in status.lower():
+        return NoteOutcome.NAO_ENCONTRADA
+    elif 'REPROCESSADO' in status:
+        return NoteOutcome.REPROCESSADO
+    return NoteOutcome.SUCESSO
+
+@dataclass(slots=True)
+class NoteResult:
+    """Resultado de uma nota processada (consulta + eventual reprocessamento)"""
+    nota_data: Dict[str, Any]
+    status: str
+    dados_completos: Dict[str, str] = field(default_factory=dict)
+    reprocessado: bool = False
+    outcome: NoteOutcome = field(init=False)
+    status_confirmado: Optional[str] = None
+    verificado_em: Optional[str] = None
+    codigo_rejeicao: Optional[str] = None  # motivo normalizado (utils.rejection_policy)
+    tempos: Dict[str, float] = field(default_factory=dict)  # segundos por fase: pesquisa, extracao, reprocesso, total
+    estouros: Dict[str, float] = field(default_factory=dict)  # fases que passaram do orçamento -> segundos gastos
+    
+    def __post_init__(self):
+        self.outcome = classificar_status(str(self.status))
+    
+    @property
+    def prazo_esgotado(self) -> bool:
+        """A nota foi interrompida pelo prazo (e pode voltar para a fila)"""
+        return str(self.status).startswith(STATUS_PRAZO_ESGOTADO)
+    
+    @property
+    def chave(self) -> str:
+        return self.nota_data['chave']
+    
+    def to_dict(self) -> Dict[str, Any]:
+        dados = {
+            "nota_data": self.nota_data,
+            "status": self.status,
+            "dados_completos": self.dados_completos,
+            "reprocessado": self.reprocessado,
+        }
+        if self.status_confirmado is not None:
+            dados["status_confirmado"] = self.status_confirmado
+            dados["verificado_em"] = self.verificado_em
+        if self.codigo_rejeicao is not None:
+            dados["codigo_rejeicao"] = self.codigo_rejeicao
+        if self.tempos:
+            dados["tempos"] = self.tempos
+        if self.estouros:
+            dados["estouros"] = self.estouros
+        return dados
+
+@dataclass(slots=True)
+class NoteBatch:
+    """Lote de notas com contadores atualizados a cada nota concluída"""
+    resultados: List[NoteResult] = field(default_factory=list)
+    notas_com_erro: List[Tuple[Dict[str, Any], str]] = field(default_factory=list)  # (nota_data, erro)
+    contagem: Dict[NoteOutcome, int] = field(default_factory=lambda: dict.fromkeys(NoteOutcome, 0))
+    total_reprocessadas: int = 0
+    
+    def adicionar(self, resultado: NoteResult):
+        self.resultados.append(resultado)
+        self.contagem[resultado.outcome] += 1
+        if resultado.reprocessado:
+            self.total_reprocessadas += 1
+    
+    def adicionar_erro(self, nota_data: Dict[str, Any], erro: str):
+        self.notas_com_erro.append((nota_data, erro))
     
     @property
-    def total_notas_rejeitadas(self) -> int:
-        return sum(1 for result in self.resultados if result.rejected_count > 0)
+    def total_notas_processadas(self) -> int:
+        return len(self.resultados)
     
     @property
     def total_registros_encontrados(self) -> int:
-        return sum(result.total_invoices for result in self.resultados)
\ No newline at end of file
+        return len(self.resultados)
@@ -1,11 +1,109 @@
 import time
-import pandas as pd
-from typing import List, Dict, Any
-from playwright.sync_api import Page
+import logging
+from contextlib import closing
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
+
+from models.entities import InvoiceStatus, parse_status
+from scrapers.grid_columns import (GRID_HEADER_SELECTOR, GRID_HEADERS, JS_ASSINATURA, JS_CABECALHO, MAPA_PADRAO,
+                                   MapaColunas, mapa_em_cache, registrar_mapa)
+from scrapers.grid_html import GRID_CONTENT_SELECTOR, JS_HTML_DO_GRID, LinhaGrid, executor, parse_grid
+
+if TYPE_CHECKING:
+    # pandas só é importado quando um DataFrame é realmente montado
+    import pandas as pd
+    from playwright.sync_api import Page
+
+# Só as linhas da tabela do grid (não as de tabelas aninhadas nas células): as mesmas que LinhaGrid.posicao conta
+GRID_ROWS_SELECTOR = "div.t-grid-content > table > tbody > tr"
+
+# Linha de "nenhum registro" que o grid Telerik mostra quando o filtro não tem resultado
+GRID_NO_DATA_SELECTOR = "div.t-grid-content tr.t-no-data"
+
+# Seta "próxima página" do pager Telerik (fica com t-state-disabled na última página)
+GRID_PAGER_NEXT = "div.t-grid-pager a.t-link:has(span.t-arrow-next)"
+
+PAGINA_TIMEOUT = 30000
+
+# col_N segue a ordem canônica de GRID_HEADERS (as células da tela são remapeadas pelo thead)
+STATUS_COLUMN = f"col_{GRID_HEADERS.index('status')}"
+
+# Texto de todas as células de todas as linhas numa única ida ao navegador
+_JS_CELULAS = "rows => rows.map(r => Array.from(r.querySelectorAll(':scope > td'), td => td.innerText.trim()))"
+
+# Assinatura do thead e células da página atual, numa única ida ao navegador
+_JS_PAGINA = f"""([linhas, cabecalho]) => [({JS_ASSINATURA})(cabecalho),
+    Array.from(document.querySelectorAll(linhas),
+               r => Array.from(r.querySelectorAll(':scope > td'), td => td.innerText.trim()))]"""
+
+# Assinatura do thead e outerHTML do grid (backend html)
+_JS_HTML_PAGINA = f"([grid, cabecalho]) => [({JS_ASSINATURA})(cabecalho), ({JS_HTML_DO_GRID})(grid)]"
+
+# Verdadeiro quando a primeira linha do grid mudou (o Ajax da troca de página terminou)
+_JS_PAGINA_TROCOU = """([seletor, antes]) => {
+    const linha = document.querySelector(seletor);
+    return !linha || linha.innerText !== antes;
+}"""
+
+logger = logging.getLogger(__name__)
+
+def nomear_colunas(nota: Dict[str, str]) -> Dict[str, str]:
+    """Converte uma linha col_N em dicionário com os nomes de GRID_HEADERS"""
+    return {
+        GRID_HEADERS[i] if i < len(GRID_HEADERS) else f"coluna_extra_{i}": nota.get(f"col_{i}", "")
+        for i in range(max(len(nota), len(GRID_HEADERS)))
+    }
+
+def dados_da_linha(celulas: List[str], estilo: str = "", checkbox: Optional[str] = None,
+                   observacao: Optional[str] = None, mapa: MapaColunas = MAPA_PADRAO) -> Dict[str, str]:
+    """Dicionário de uma linha do grid como extract_invoice_data devolve (mesmo formato nos dois backends)
+    
+    As células já vêm na ordem canônica; campos que o thead da tela não tem ficam de fora.
+    """
+    dados = {}
+    for i, valor in enumerate(celulas):
+        chave = GRID_HEADERS[i] if i < len(GRID_HEADERS) else f"coluna_extra_{i}"
+        if mapa.tem(chave):
+            dados[chave] = valor
+    if 'status' in dados:
+        # Status limpo (sem o link de ajuda)
+        status = dados['status']
+        dados['status_limpo'] = status.split('Clique aqui')[0].strip() if 'Clique aqui' in status else status
+    if observacao is not None:
+        dados['observacao_completa'] = observacao
+    # Cor da linha (indica status)
+    if 'color: rgb(255, 0, 0)' in estilo:
+        dados['cor_status'] = 'VERMELHO-REJEITADO'
+    if checkbox is not None:
+        dados['checkbox_value'] = checkbox
+    return dados
+
+def linhas_para_colunas(linhas: List[List[str]], num_columns: int = 20) -> Dict[str, List]:
+    """Transpõe as células em colunas col_N e acrescenta status_code (texto interpretado uma vez)"""
+    colunas = {
+        f"col_{i}": [linha[i] if i < len(linha) else "" for linha in linhas]
+        for i in range(num_columns)
+    }
+    # Poucos textos distintos de status: cada um é interpretado uma única vez
+    cache: Dict[str, int] = {}
+    status_idx = int(STATUS_COLUMN.split('_')[1])
+    codigos = []
+    for linha in linhas:
+        texto = linha[status_idx] if status_idx < len(linha) else ""
+        codigo = cache.get(texto)
+        if codigo is None:
+            codigo = cache[texto] = int(parse_status(texto))
+        codigos.append(codigo)
+    colunas['status_code'] = codigos
+    return colunas
 
 class DataScraper:
-    def __init__(self, page: Page):
+    def __init__(self, page: "Page", backend: str = "handles"):
         self.page = page
+        self.prazo = None  # utils.deadline.Prazo: limita a espera da troca de página
+        # handles: células lidas no navegador | html: outerHTML do grid interpretado em Python
+        self.backend = backend
+        self.linhas_html: List[LinhaGrid] = []  # linhas com células da última página lida pelo backend html
+        self.mapa = MAPA_PADRAO  # colunas da tela -> ordem canônica, conforme o thead atual
     
     def scrape_metadata(self, max_retries: int = 5) -> Dict[str, Any]:
         """Coleta metadados da página com retry"""
@@ -30,32 +128,179 @@ class DataScraper:
                     raise Exception(f"Não foi possível capturar os metadados: {e}")
                 time.sleep(1)
     
-    def scrape_invoices(self) -> List[Dict[str, str]]:
-        """Extrai dados das notas fiscais da tabela"""
-        self.page.wait_for_selector("div.t-grid-content table tbody tr")
-        linhas = self.page.query_selector_all("div.t-grid-content table tbody tr")
-        notas = []
+    def atualizar_mapa(self, assinatura: str) -> MapaColunas:
+        """Mapa de colunas do thead com esta assinatura; o thead só é lido quando ela é nova no processo"""
+        if assinatura != self.mapa.assinatura:
+            self.mapa = mapa_em_cache(assinatura) or registrar_mapa(
+                assinatura, self.page.evaluate(JS_CABECALHO, GRID_HEADER_SELECTOR))
+        return self.mapa
+    
+    def _celulas_da_pagina(self) -> List[List[str]]:
+        """Textos das células de cada linha da página atual do grid, na ordem canônica (linhas sem td são ignoradas)"""
+        assinatura, linhas = self.page.evaluate(_JS_PAGINA, [GRID_ROWS_SELECTOR, GRID_HEADER_SELECTOR])
+        mapa = self.atualizar_mapa(assinatura)
+        return [mapa.reordenar(celulas) for celulas in linhas if celulas]
+    
+    def html_do_grid(self) -> str:
+        """outerHTML do grid ('' sem grid na tela); a assinatura do thead vem junto e atualiza self.mapa"""
+        assinatura, html = self.page.evaluate(_JS_HTML_PAGINA, [GRID_CONTENT_SELECTOR, GRID_HEADER_SELECTOR])
+        self.atualizar_mapa(assinatura)
+        return html
+    
+    def _celulas_html(self, futuro) -> List[List[str]]:
+        """Resultado do parsing de uma página; guarda as linhas para quem precisa de checkbox/estilo"""
+        self.linhas_html = [linha for linha in futuro.result() if linha.celulas]
+        for linha in self.linhas_html:
+            linha.celulas = self.mapa.reordenar(linha.celulas)
+        return [linha.celulas for linha in self.linhas_html]
+    
+    def grid_sem_registros(self) -> bool:
+        """O grid carregou e mostra explicitamente que o filtro não tem resultado"""
+        return self.page.query_selector(GRID_NO_DATA_SELECTOR) is not None
+    
+    def marcar_linha(self, linha: LinhaGrid) -> bool:
+        """Marca a checkbox de uma linha lida pelo backend html (pela posição, sem ElementHandle)"""
+        if linha.checkbox is None:
+            return False
+        self.page.locator(GRID_ROWS_SELECTOR).nth(linha.posicao).locator(
+            "input[type='checkbox'][name='checkedRecords']").check()
+        return True
+    
+    def proxima_pagina(self) -> bool:
+        """Avança o pager do grid; False na última página (ou se o grid não tem pager)"""
+        botao = self.page.query_selector(GRID_PAGER_NEXT)
+        if not botao or 't-state-disabled' in (botao.get_attribute('class') or ''):
+            return False
+        primeira = self.page.eval_on_selector(GRID_ROWS_SELECTOR, "linha => linha.innerText")
+        botao.click()
+        espera = self.prazo.timeout_ms(PAGINA_TIMEOUT) if self.prazo else PAGINA_TIMEOUT
+        self.page.wait_for_function(_JS_PAGINA_TROCOU, arg=[GRID_ROWS_SELECTOR, primeira], timeout=espera)
+        return True
+    
+    def paginas(self, max_paginas: Optional[int] = None,
+                adiantar: bool = False) -> Iterator[Tuple[int, List[List[str]]]]:
+        """Percorre as páginas do grid entregando as células de cada uma assim que carrega
+        
+        Só a página atual fica em memória. Quem consome pode parar a qualquer momento
+        (break) e o grid continua na página entregue por último. Os tempos de cada
+        página ficam em self.tempos_paginas.
+        
+        Com adiantar (só para quem lê todas as páginas) e o backend html, o navegador
+        já troca de página enquanto a anterior é interpretada na thread de parsing;
+        nesse caso o grid pode estar uma página à frente da entregue.
+        """
+        self.tempos_paginas: List[float] = []
+        adiantar = adiantar and self.backend == "html"
+        pagina = 1
+        inicio = time.perf_counter()
+        try:
+            while True:
+                ultima = bool(max_paginas and pagina >= max_paginas)
+                avancou = False
+                if self.backend == "html":
+                    futuro = executor().submit(parse_grid, self.html_do_grid())
+                    if adiantar and not ultima:
+                        avancou = self.proxima_pagina()
+                    celulas = self._celulas_html(futuro)
+                else:
+                    celulas = self._celulas_da_pagina()
+                self.tempos_paginas.append(time.perf_counter() - inicio)
+                logger.debug("📄 Página %s: %s linha(s) em %.2fs", pagina, len(celulas), self.tempos_paginas[-1])
+                yield pagina, celulas
+                
+                if ultima:
+                    break
+                inicio = time.perf_counter()
+                if not (avancou if adiantar else self.proxima_pagina()):
+                    break
+                pagina += 1
+        finally:
+            if self.tempos_paginas:
+                total = sum(self.tempos_paginas)
+                logger.info("📄 %s página(s) do grid lidas em %.2fs (média %.2fs/página)",
+                            len(self.tempos_paginas), total, total / len(self.tempos_paginas))
+    
+    def iter_invoices(self, chaves: Optional[Iterable[str]] = None) -> Iterator[Dict[str, str]]:
+        """Linhas col_N de todas as páginas, em streaming
         
-        for idx, linha in enumerate(linhas):
-            colunas = linha.query_selector_all("td")
-            if not colunas:
+        Com chaves, entrega só as linhas que contêm alguma delas e para de paginar
+        assim que todas foram encontradas.
+        """
+        pendentes = set(chaves) if chaves is not None else None
+        with closing(self.paginas(adiantar=chaves is None)) as paginas:
+            for _, celulas in paginas:
+                for linha in celulas:
+                    if pendentes is not None:
+                        texto = "\t".join(linha)
+                        encontradas = {chave for chave in pendentes if chave in texto}
+                        if not encontradas:
+                            continue
+                        pendentes -= encontradas
+                    yield {f"col_{i}": valor for i, valor in enumerate(linha)}
+                if pendentes is not None and not pendentes:
+                    return
+    
+    def scrape_invoices(self) -> List[Dict[str, str]]:
+        """Extrai dados das notas fiscais da tabela (todas as páginas)"""
+        self.page.wait_for_selector(GRID_ROWS_SELECTOR)
+        return list(self.iter_invoices())
+    
+    def scrape_columns(self, num_columns: int = 20) -> Dict[str, List]:
+        """Extrai o grid já em colunas (col_0..col_N + status_code), pronto para o DataFrame"""
+        self.page.wait_for_selector(GRID_ROWS_SELECTOR)
+        linhas = [linha for _, celulas in self.paginas(adiantar=True) for linha in celulas]
+        return linhas_para_colunas(linhas, num_columns)
+    
+    def marcar_linhas(self, indices: List[int]) -> int:
+        """Marca a checkbox das linhas da página atual (posições na lista de células) para ações em lote"""
+        linhas = [l for l in self.page.query_selector_all(GRID_ROWS_SELECTOR) if l.query_selector(":scope > td")]
+        marcadas = 0
+        for idx in indices:
+            if idx >= len(linhas):
                 continue
-            
-            nota = {f"col_{i}": colunas[i].inner_text().strip() for i in range(len(colunas))}
-            notas.append(nota)
+            checkbox = linhas[idx].query_selector("input[type='checkbox'][name='checkedRecords']")
+            if checkbox:
+                checkbox.check()
+                marcadas += 1
+        return marcadas
+    
+    def normalize_dataframe(self, notas: Union[Dict[str, List], List[Dict[str, str]]],
+                            num_columns: int = 20) -> "pd.DataFrame":
+        """Normaliza os dados em um DataFrame (aceita colunas de scrape_columns ou linhas col_N)"""
+        import numpy as np
+        import pandas as pd
         
-        return notas
-    
-    def normalize_dataframe(self, notas: List[Dict[str, str]], num_columns: int = 20) -> pd.DataFrame:
-        """Normaliza os dados em um DataFrame"""
-        linhas_normalizadas = []
-        for nota in notas:
-            linha = [nota.get(f"col_{i}", "") for i in range(num_columns)]
-            linhas_normalizadas.append(linha)
+        if isinstance(notas, dict):
+            colunas = notas
+        else:
+            colunas = {f"col_{i}": [nota.get(f"col_{i}", "") for nota in notas] for i in range(num_columns)}
         
-        colunas = [f"col_{i}" for i in range(num_columns)]
-        return pd.DataFrame(linhas_normalizadas, columns=colunas)
+        df = pd.DataFrame({f"col_{i}": colunas.get(f"col_{i}", []) for i in range(num_columns)})
+        if 'status_code' in colunas:
+            df['status_code'] = np.asarray(colunas['status_code'], dtype=np.int8)
+        else:
+            df['status_code'] = self.status_codes(df)
+        return df
     
-    def filter_rejected_invoices(self, df: pd.DataFrame) -> pd.DataFrame:
+    def status_codes(self, df: "pd.DataFrame"):
+        """Códigos InvoiceStatus (int8) do DataFrame, interpretando cada texto distinto uma vez"""
+        import numpy as np
+        import pandas as pd
+        
+        if 'status_code' in df:
+            return df['status_code'].to_numpy()
+        codigos, textos = pd.factorize(df[STATUS_COLUMN].fillna(""))
+        tabela = np.fromiter((parse_status(t) for t in textos), dtype=np.int8, count=len(textos))
+        return tabela[codigos]
+    
+    def filter_rejected_invoices(self, df: "pd.DataFrame") -> "pd.DataFrame":
         """Filtra notas rejeitadas ou pendentes"""
-        return df[df['col_7'].str.contains("Rejeitado|Pendente", na=False)]
\ No newline at end of file
+        codigos = self.status_codes(df)
+        return df[(codigos == InvoiceStatus.REJEITADO) | (codigos == InvoiceStatus.PENDENTE)]
+    
+    def count_by_status(self, df: "pd.DataFrame") -> Dict[str, int]:
+        """Quantidade de notas por status"""
+        import numpy as np
+        
+        contagem = np.bincount(self.status_codes(df), minlength=len(InvoiceStatus))
+        return {status.name: int(contagem[status]) for status in InvoiceStatus}
\ No newline at end of file
@@ -0,0 +1,164 @@
+import logging
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Campos do grid do eFormseMonitor na ordem canônica: col_N de todo o projeto é GRID_HEADERS[N],
+# seja qual for a ordem das colunas na tela (o thead é mapeado para esta ordem)
+GRID_HEADERS = [
+    'checkbox', 'codigo', 'numero_documento', 'chave_acesso', 'chave_consulta',
+    'tipo_documento', 'data_processamento', 'status', 'icone1', 'icone2',
+    'icone3', 'icone4', 'icone5', 'valor_total', 'valor_oculto',
+    'data_emissao', 'id_interno', 'nome_empresa', 'oculto', 'observacao'
+]
+
+# Colunas sem título no grid (checkbox, ícones, ocultas): recebem os cabeçalhos vazios, na ordem
+SEM_TITULO = ['checkbox', 'icone1', 'icone2', 'icone3', 'icone4', 'icone5', 'valor_oculto', 'oculto']
+
+# Cabeçalhos (normalizados) do thead e do arquivo exportado -> nomes de GRID_HEADERS
+ALIAS_COLUNAS = {
+    'cod': 'codigo',
+    'numero': 'numero_documento',
+    'numero_do_documento': 'numero_documento',
+    'n_documento': 'numero_documento',
+    'no_documento': 'numero_documento',
+    'documento': 'numero_documento',
+    'chave': 'chave_acesso',
+    'chave_de_acesso': 'chave_acesso',
+    'chave_de_consulta': 'chave_consulta',
+    'tipo': 'tipo_documento',
+    'tipo_de_documento': 'tipo_documento',
+    'data_de_processamento': 'data_processamento',
+    'processamento': 'data_processamento',
+    'situacao': 'status',
+    'valor': 'valor_total',
+    'data_de_emissao': 'data_emissao',
+    'emissao': 'data_emissao',
+    'id': 'id_interno',
+    'empresa': 'nome_empresa',
+    'observacoes': 'observacao',
+    'mensagem': 'observacao',
+}
+
+# Campos sem os quais a extração não funciona; sem eles no thead, fica a ordem padrão
+ESSENCIAIS = ('chave_acesso', 'status')
+
+GRID_HEADER_SELECTOR = "div.t-grid thead th"
+
+# Cabeçalho de cada coluna; a coluna da checkbox "marcar todas" costuma não ter texto
+JS_CABECALHO = """s => Array.from(document.querySelectorAll(s), th =>
+    th.innerText.trim() || (th.querySelector("input[type='checkbox']") ? 'checkbox' : ''))"""
+
+# Assinatura do thead (quantidade de colunas + hash dos textos), calculada na própria página
+# junto com as células: o cabeçalho só é lido de novo quando ela muda
+JS_ASSINATURA = """s => {
+    const ths = document.querySelectorAll(s);
+    let h = 0;
+    for (const th of ths) {
+        const t = th.textContent.trim();
+        for (let i = 0; i < t.length; i++) h = (h * 31 + t.charCodeAt(i)) | 0;
+        h = (h * 31 + 124) | 0;
+    }
+    return ths.length + ':' + h;
+}"""
+
+
+def normalizar_cabecalho(texto: str) -> str:
+    """'Data de Emissão' -> 'data_de_emissao'"""
+    sem_acento = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode()
+    return '_'.join(''.join(c if c.isalnum() else ' ' for c in sem_acento.lower()).split())
+
+
+def mapear_colunas(cabecalhos: List[str]) -> List[int]:
+    """Posição canônica (índice em GRID_HEADERS) de cada coluna, na ordem em que aparecem
+
+    Cabeçalho conhecido (direto ou por ALIAS_COLUNAS) vai para o seu campo; vazio vai
+    para o próximo campo de SEM_TITULO livre. Os demais (rótulo desconhecido, repetido)
+    viram colunas extras depois de GRID_HEADERS (coluna_extra_N), sem ocupar campos.
+    """
+    nomes = [ALIAS_COLUNAS.get(normalizar_cabecalho(c), normalizar_cabecalho(c)) for c in cabecalhos]
+    usados = {nome for nome in nomes if nome in GRID_HEADERS}
+    sem_titulo = iter([campo for campo in SEM_TITULO if campo not in usados])
+    posicoes = []
+    extras = len(GRID_HEADERS)
+    vistos = set()
+    for nome in nomes:
+        if nome in GRID_HEADERS and nome not in vistos:
+            vistos.add(nome)
+            posicoes.append(GRID_HEADERS.index(nome))
+            continue
+        campo = next(sem_titulo, None) if not nome else None
+        if campo is not None:
+            posicoes.append(GRID_HEADERS.index(campo))
+        else:
+            posicoes.append(extras)
+            extras += 1
+    return posicoes
+
+
+class MapaColunas:
+    """Coluna da tela -> posição canônica, montado a partir do thead do grid"""
+
+    def __init__(self, posicoes: Optional[List[int]] = None, assinatura: str = "",
+                 cabecalhos: Optional[List[str]] = None):
+        self.posicoes = posicoes
+        self.assinatura = assinatura
+        self.cabecalhos = cabecalhos or []
+        self.identidade = posicoes is None or posicoes == list(range(len(posicoes)))
+        presentes = set(posicoes if posicoes is not None else range(len(GRID_HEADERS)))
+        self.faltando = [campo for i, campo in enumerate(GRID_HEADERS) if i not in presentes]
+
+    def tem(self, campo: str) -> bool:
+        """O grid da tela tem esta coluna (os demais campos vêm vazios)"""
+        return campo not in self.faltando
+
+    def reordenar(self, celulas: List[str]) -> List[str]:
+        """Células na ordem da tela -> ordem canônica (col_N = GRID_HEADERS[N])"""
+        if self.identidade:
+            return celulas
+        ordenadas = [""] * max(len(GRID_HEADERS), max(self.posicoes, default=0) + 1)
+        for posicao, valor in zip(self.posicoes, celulas):
+            ordenadas[posicao] = valor
+        # Linha mais larga que o thead: o que sobra vai para o fim
+        ordenadas.extend(celulas[len(self.posicoes):])
+        return ordenadas
+
+
+# Sem thead legível: a ordem da tela é a canônica (comportamento anterior ao mapeamento)
+MAPA_PADRAO = MapaColunas()
+
+_mapas: Dict[str, MapaColunas] = {}
+_mapas_lock = threading.Lock()
+
+
+def mapa_em_cache(assinatura: str) -> Optional[MapaColunas]:
+    with _mapas_lock:
+        return _mapas.get(assinatura)
+
+
+def registrar_mapa(assinatura: str, cabecalhos: List[str]) -> MapaColunas:
+    """Monta o mapa de um thead lido e guarda pela assinatura (vale para todas as sessões do processo)"""
+    mapa = MapaColunas(mapear_colunas(cabecalhos), assinatura, cabecalhos)
+    essenciais = [campo for campo in ESSENCIAIS if not mapa.tem(campo)]
+    desconhecidos = [f"{rotulo!r} -> coluna_extra_{posicao}" for rotulo, posicao in zip(cabecalhos, mapa.posicoes)
+                     if posicao >= len(GRID_HEADERS)]
+    if cabecalhos and desconhecidos:
+        logger.warning("⚠️  Colunas do grid sem campo conhecido (inclua em ALIAS_COLUNAS): %s",
+                       ", ".join(desconhecidos))
+    if not cabecalhos:
+        mapa = MAPA_PADRAO
+        logger.warning("⚠️  Grid sem thead legível: usando a ordem padrão das colunas")
+    elif essenciais:
+        # Remapear sem status/chave estragaria mais do que a ordem padrão
+        mapa = MAPA_PADRAO
+        logger.error("❌ thead do grid sem %s reconhecível, usando a ordem padrão: %s",
+                     ", ".join(essenciais), cabecalhos)
+    elif mapa.identidade:
+        logger.info("🧭 Colunas do grid na ordem padrão: %s", cabecalhos)
+    else:
+        logger.warning("🧭 Colunas do grid fora da ordem padrão, remapeadas: %s", cabecalhos)
+    with _mapas_lock:
+        _mapas[assinatura] = mapa
+    return mapa
@@ -0,0 +1,221 @@
+import os
+import csv
+import time
+import logging
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import Dict, Iterator, List, Optional
+
+from scrapers.data_scraper import DataScraper
+from scrapers.grid_columns import ESSENCIAIS, GRID_HEADERS, mapear_colunas
+
+logger = logging.getLogger(__name__)
+
+# Botões de exportação conhecidos do eFormseMonitor / grid Telerik, do mais específico ao mais genérico
+EXPORT_SELECTORS = [
+    "div.div-action-act.Export",
+    "div.div-action-act.ExportExcel",
+    "div[title*='Exportar']",
+    "a.t-grid-action:has-text('Export')",
+    "a:has-text('Exportar')",
+    "//div[contains(@class, 'Export')]",
+]
+
+_BLOCO = 64 * 1024
+
+
+def _texto(valor) -> str:
+    """Valor de célula como o grid mostraria (datas no formato DD/MM/YYYY HH:MM:SS)"""
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.strftime('%d/%m/%Y %H:%M:%S')
+    return str(valor).strip()
+
+
+class _LeitorTabelaHTML(HTMLParser):
+    """Extrai linhas de <table> (exportações 'xls' que na verdade são HTML) à medida que chegam"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.prontas: List[List[str]] = []
+        self._linha: Optional[List[str]] = None
+        self._celula: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self._linha = []
+        elif tag in ('td', 'th') and self._linha is not None:
+            self._celula = []
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th') and self._celula is not None:
+            self._linha.append(' '.join(''.join(self._celula).split()))
+            self._celula = None
+        elif tag == 'tr' and self._linha is not None:
+            self.prontas.append(self._linha)
+            self._linha = None
+
+    def handle_data(self, data):
+        if self._celula is not None:
+            self._celula.append(data)
+
+
+def _linhas_csv(caminho: str) -> Iterator[List[str]]:
+    with open(caminho, 'rb') as arquivo:
+        amostra = arquivo.read(_BLOCO)
+    try:
+        amostra.decode('utf-8-sig')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        encoding = 'latin-1'
+    texto = amostra.decode(encoding, errors='ignore')
+    try:
+        dialeto = csv.Sniffer().sniff(texto, delimiters=';,\t')
+    except csv.Error:
+        class dialeto(csv.excel):
+            delimiter = ';' if texto.count(';') > texto.count(',') else ','
+
+    with open(caminho, 'r', encoding=encoding, newline='') as arquivo:
+        yield from csv.reader(arquivo, dialeto)
+
+
+def _linhas_html(caminho: str) -> Iterator[List[str]]:
+    leitor = _LeitorTabelaHTML()
+    with open(caminho, 'r', encoding='utf-8', errors='replace') as arquivo:
+        for bloco in iter(lambda: arquivo.read(_BLOCO), ''):
+            leitor.feed(bloco)
+            yield from leitor.prontas
+            leitor.prontas.clear()
+    leitor.close()
+    yield from leitor.prontas
+
+
+def _linhas_xlsx(caminho: str) -> Iterator[List[str]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("exportação em .xlsx requer o pacote openpyxl")
+    planilha = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        for linha in planilha.active.iter_rows(values_only=True):
+            yield [_texto(valor) for valor in linha]
+    finally:
+        planilha.close()
+
+
+def ler_linhas(caminho: str) -> Iterator[List[str]]:
+    """Linhas cruas do arquivo exportado, em streaming; o formato vem do conteúdo, não da extensão"""
+    with open(caminho, 'rb') as arquivo:
+        inicio = arquivo.read(512)
+    if inicio.startswith(b'PK'):
+        return _linhas_xlsx(caminho)
+    if inicio.startswith(b'\xd0\xcf\x11\xe0'):
+        raise ValueError("formato .xls binário não suportado")
+    if inicio.lstrip(b'\xef\xbb\xbf \r\n\t').startswith(b'<'):
+        return _linhas_html(caminho)
+    return _linhas_csv(caminho)
+
+
+def linhas_para_notas(linhas: Iterator[List[str]]) -> Iterator[Dict[str, str]]:
+    """Converte as linhas do arquivo (1ª = cabeçalho) nos mesmos dicts col_N do DataScraper
+
+    Cabeçalho sem chave ou status reconhecível gera ValueError: as notas viriam
+    todas sem status, o que não se distingue de um filtro vazio.
+    """
+    posicoes: Optional[List[int]] = None
+    for linha in linhas:
+        if posicoes is None:
+            # O mesmo mapeamento do thead do grid, sem adivinhar rótulos desconhecidos
+            posicoes = mapear_colunas(linha)
+            logger.debug("📑 Cabeçalho da exportação: %s", linha)
+            faltando = [campo for campo in ESSENCIAIS if GRID_HEADERS.index(campo) not in posicoes]
+            if faltando:
+                raise ValueError(f"cabeçalho da exportação sem {', '.join(faltando)} reconhecível: {linha}")
+            continue
+        if not any(linha):
+            continue
+        nota = {f"col_{i}": "" for i in range(len(GRID_HEADERS))}
+        for posicao, valor in zip(posicoes, linha):
+            nota[f"col_{posicao}"] = _texto(valor)
+        yield nota
+
+
+class GridExporter:
+    """Varredura do grid pelo arquivo de exportação, com o scraping paginado como reserva
+
+    A exportação respeita o filtro já aplicado na tela (status, janela de datas,
+    local). Se o monitor não oferece exportação, o download falha ou o arquivo não
+    é legível, as linhas vêm do DataScraper.iter_invoices. Um download que falhou
+    não desliga a exportação: ela volta a ser tentada depois de config.pausa_s.
+    """
+
+    def __init__(self, data_scraper: DataScraper, config):
+        self.data_scraper = data_scraper
+        self.page = data_scraper.page
+        self.config = config
+        self.disponivel: Optional[bool] = None  # há botão de exportação (descoberto na primeira tentativa)
+        self.pausa_ate = 0.0  # time.monotonic() até o qual a exportação não é tentada depois de uma falha
+
+    def _botao_exportar(self):
+        for selector in EXPORT_SELECTORS:
+            botao = self.page.query_selector(selector)
+            if botao and botao.is_visible():
+                return botao
+        return None
+
+    def baixar(self) -> Optional[str]:
+        """Dispara a exportação do filtro atual e salva o arquivo; None se não houver exportação"""
+        botao = self._botao_exportar()
+        if not botao:
+            return None
+
+        inicio = time.perf_counter()
+        with self.page.expect_download(timeout=self.config.timeout_ms) as download_info:
+            botao.click()
+        download = download_info.value
+
+        os.makedirs(self.config.dir, exist_ok=True)
+        nome = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{download.suggested_filename or 'grid'}"
+        caminho = os.path.join(self.config.dir, nome)
+        download.save_as(caminho)
+        logger.info("📥 Exportação do grid baixada em %.2fs: %s (%s bytes)",
+                    time.perf_counter() - inicio, caminho, os.path.getsize(caminho))
+        return caminho
+
+    def iter_invoices(self) -> Iterator[Dict[str, str]]:
+        """Linhas col_N do filtro atual: pelo arquivo exportado ou, na falta dele, pelas páginas do grid"""
+        caminho = None
+        if self.config.enabled and self.disponivel is not False and time.monotonic() >= self.pausa_ate:
+            try:
+                caminho = self.baixar()
+                if self.disponivel is None:
+                    self.disponivel = caminho is not None
+                    if not self.disponivel:
+                        logger.info("📄 Monitor sem exportação disponível: varredura pelas páginas do grid")
+            except Exception as e:
+                # Falha passageira (timeout do download, servidor ocupado): pagina por um tempo e tenta de novo
+                self.pausa_ate = time.monotonic() + self.config.pausa_s
+                logger.warning("⚠️  Exportação do grid falhou, usando as páginas por %.0fs: %s", self.config.pausa_s, e)
+
+        if caminho is None:
+            yield from self.data_scraper.iter_invoices()
+            return
+
+        try:
+            total = 0
+            inicio = time.perf_counter()
+            for nota in linhas_para_notas(ler_linhas(caminho)):
+                total += 1
+                yield nota
+            logger.info("📑 %s linha(s) lidas da exportação em %.2fs", total, time.perf_counter() - inicio)
+        except ValueError as e:
+            if total:
+                # Linhas já entregues voltariam repetidas pelas páginas: quem chamou decide (nova consulta)
+                logger.error("❌ Exportação ilegível depois de %s linha(s): %s", total, e)
+                raise
+            logger.warning("⚠️  Exportação ilegível (%s), usando as páginas do grid", e)
+            yield from self.data_scraper.iter_invoices()
+        finally:
+            if not self.config.keep_files and os.path.exists(caminho):
+                os.remove(caminho)
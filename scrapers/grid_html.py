@@ -0,0 +1,176 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import List, Optional
+
+# Container do grid Telerik; o outerHTML dele é tudo o que o backend html pede ao navegador
+GRID_CONTENT_SELECTOR = "div.t-grid-content"
+
+# outerHTML do grid numa única ida ao navegador ('' quando não há grid na tela)
+JS_HTML_DO_GRID = "s => { const e = document.querySelector(s); return e ? e.outerHTML : ''; }"
+
+# Elementos cujo texto não aparece no innerText
+_SEM_TEXTO = {"script", "style", "template", "noscript"}
+# Elementos de bloco dentro de uma célula: quebram linha no innerText
+_BLOCOS = {"div", "p", "li", "ul", "ol", "table", "tr", "h1", "h2", "h3", "h4", "h5", "h6"}
+_ESPACOS = re.compile(r"[ \t\r\n\f]+")
+
+
+@dataclass
+class LinhaGrid:
+    """Uma linha <tr> do tbody do grid, lida do HTML"""
+    posicao: int  # índice entre as linhas de GRID_ROWS_SELECTOR (para locator(...).nth)
+    celulas: List[str]
+    estilo: str = ""  # atributo style do <tr> (vermelho = rejeitado)
+    checkbox: Optional[str] = None  # value do checkedRecords, se a linha tem checkbox
+    observacao: Optional[str] = None  # texto do td.t-last
+
+
+def _texto(partes: List[str]) -> str:
+    """Aproxima o innerText: espaços colapsados, uma linha por <br>/bloco, sem bordas (como o trim())"""
+    linhas = (_ESPACOS.sub(" ", linha).strip() for linha in "".join(partes).split("\n"))
+    return "\n".join(linha for linha in linhas if linha)
+
+
+class _ParserGrid(HTMLParser):
+    """Linhas do <table> do primeiro div.t-grid-content, ignorando tabelas aninhadas nas células
+
+    O que está fora do div (menus, filtros e outras tabelas de uma página inteira) não é lido.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.linhas: List[LinhaGrid] = []
+        self._grid = 0  # profundidade de <div> dentro do div.t-grid-content (0 = fora dele)
+        self._lido = False  # o grid já foi lido: outros div.t-grid-content são ignorados
+        self._tabelas = 0
+        self._tbody = False
+        self._linha: Optional[LinhaGrid] = None
+        self._celula: Optional[List[str]] = None
+        self._ultima = False
+        self._ignorando = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SEM_TEXTO:
+            self._ignorando += 1
+            return
+        if tag == "div" and not self._lido:
+            if self._grid:
+                self._grid += 1
+            elif "t-grid-content" in (dict(attrs).get("class") or "").split():
+                self._grid = 1
+                return
+        if not self._grid:
+            return
+        if tag == "table":
+            self._tabelas += 1
+        if self._tabelas != 1:
+            if self._celula is not None and tag in _BLOCOS:
+                self._celula.append("\n")
+            return
+        atributos = dict(attrs)
+        if tag == "tbody":
+            self._tbody = True
+        elif tag == "tr" and self._tbody:
+            self._fechar_linha()
+            self._linha = LinhaGrid(posicao=len(self.linhas), celulas=[], estilo=atributos.get("style") or "")
+        elif tag in ("td", "th") and self._linha is not None:
+            self._fechar_celula()
+            self._celula = []
+            self._ultima = "t-last" in (atributos.get("class") or "").split()
+        elif self._celula is not None:
+            if tag == "br" or tag in _BLOCOS:
+                self._celula.append("\n")
+            elif tag == "input" and atributos.get("name") == "checkedRecords" and self._linha.checkbox is None:
+                self._linha.checkbox = atributos.get("value") or ""
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in _SEM_TEXTO:
+            self._ignorando -= 1
+        elif tag == "div" and self._grid:
+            self._grid -= 1
+
+    def handle_endtag(self, tag):
+        if tag in _SEM_TEXTO:
+            self._ignorando = max(0, self._ignorando - 1)
+            return
+        if not self._grid:
+            return
+        if tag == "div":
+            self._grid -= 1
+            if not self._grid:
+                self._fechar_linha()
+                self._lido = True
+                return
+        if tag == "table":
+            if self._tabelas == 1:
+                self._fechar_linha()
+                self._tbody = False
+            self._tabelas -= 1
+        elif self._tabelas != 1:
+            if self._celula is not None and tag in _BLOCOS:
+                self._celula.append("\n")
+        elif tag in ("td", "th"):
+            self._fechar_celula()
+        elif tag == "tr":
+            self._fechar_linha()
+        elif tag == "tbody":
+            self._fechar_linha()
+            self._tbody = False
+        elif self._celula is not None and tag in _BLOCOS:
+            self._celula.append("\n")
+
+    def handle_data(self, data):
+        if self._celula is not None and not self._ignorando:
+            self._celula.append(data)
+
+    def _fechar_celula(self):
+        if self._celula is None:
+            return
+        texto = _texto(self._celula)
+        self._linha.celulas.append(texto)
+        if self._ultima:
+            self._linha.observacao = texto
+        self._celula = None
+        self._ultima = False
+
+    def _fechar_linha(self):
+        if self._linha is None:
+            return
+        self._fechar_celula()
+        self.linhas.append(self._linha)
+        self._linha = None
+
+
+def parse_grid(html: str) -> List[LinhaGrid]:
+    """Linhas do grid a partir do HTML (outerHTML do grid, page.content() ou um snapshot salvo)
+
+    Só a tabela dentro de div.t-grid-content é lida; HTML sem esse div não tem linhas.
+    """
+    parser = _ParserGrid()
+    parser.feed(html)
+    parser.close()
+    parser._fechar_linha()
+    return parser.linhas
+
+
+def ler_snapshot(caminho: str) -> List[LinhaGrid]:
+    """Linhas do grid de uma página salva em disco (page.content(), 'Salvar como' do navegador)"""
+    with open(caminho, "r", encoding="utf-8", errors="replace") as arquivo:
+        return parse_grid(arquivo.read())
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> ThreadPoolExecutor:
+    """Thread de parsing compartilhada: o HTML de uma página é lido enquanto o navegador já vai para a próxima"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grid-html")
+        return _executor
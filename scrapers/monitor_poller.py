@@ -0,0 +1,245 @@
+import os
+import json
+import logging
+from datetime import datetime, timedelta
+from contextlib import closing
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from models.entities import NoteResult
+from scrapers.data_scraper import DataScraper, nomear_colunas
+from utils.helpers import format_search_date, parse_data_monitor
+
+logger = logging.getLogger(__name__)
+
+
+def chave_linha(linha: Dict[str, str]) -> str:
+    """Identifica uma rejeição: o mesmo documento rejeitado de novo gera outra data_processamento"""
+    return "|".join(linha.get(campo, '') for campo in
+                    ('codigo', 'numero_documento', 'chave_acesso', 'id_interno', 'data_processamento'))
+
+
+def nota_da_linha(linha: Dict[str, str]) -> Dict[str, str]:
+    """nota_data (formato do notas_fiscais.json) equivalente a uma linha do grid"""
+    return {
+        "chave": linha.get('chave_acesso', ''),
+        "fiscal_doc_no": linha.get('numero_documento', ''),
+        "series_no": linha.get('codigo', ''),
+        "location_id": "",
+        "protocolo": "",
+        "chave_aux": f"MONITOR-{linha.get('id_interno', '')}",
+    }
+
+
+class WatermarkStore:
+    """Marca d'água (maior data_processamento já tratada) e linhas vistas, persistidas em JSON
+
+    Linhas que falharam ficam em `pendentes` e seguram a marca d'água na data delas:
+    a consulta seguinte começa nelas e as traz de novo, depois de uma espera que dobra
+    a cada falha (espera_s, 2x, 4x...). Na max_tentativas-ésima falha a linha desiste:
+    sai das pendentes, conta como vista e libera a marca d'água.
+    """
+
+    def __init__(self, path: str, max_tentativas: int = 5, espera_s: float = 300.0):
+        self.path = path
+        self.max_tentativas = max_tentativas
+        self.espera_s = espera_s
+        self.watermark: Optional[datetime] = None
+        self.vistos: Dict[str, str] = {}  # chave_linha -> data_processamento ISO
+        # chave_linha -> {"data": data_processamento ISO, "tentativas": falhas, "proxima": ISO da próxima tentativa}
+        self.pendentes: Dict[str, Dict[str, Any]] = {}
+        self.carregar()
+
+    def carregar(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as arquivo:
+                dados = json.load(arquivo)
+            if dados.get('watermark'):
+                self.watermark = datetime.fromisoformat(dados['watermark'])
+            self.vistos = dados.get('vistos', {})
+            # Formato anterior: chave -> data, sem tentativas
+            self.pendentes = {chave: valor if isinstance(valor, dict) else {"data": valor, "tentativas": 1, "proxima": ""}
+                              for chave, valor in dados.get('pendentes', {}).items()}
+        except (OSError, ValueError) as e:
+            logger.error("❌ Estado do monitoramento ilegível (%s), começando do zero: %s", self.path, e)
+
+    def salvar(self):
+        pasta = os.path.dirname(self.path)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        dados = {
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "vistos": self.vistos,
+            "pendentes": self.pendentes,
+            "atualizado_em": datetime.now().isoformat(timespec='seconds'),
+        }
+        # Grava em arquivo temporário e troca: uma queda no meio não corrompe o estado
+        temporario = self.path + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.path)
+
+    def aguardando(self, chave: str) -> bool:
+        """Linha pendente cuja próxima tentativa ainda não chegou"""
+        pendente = self.pendentes.get(chave)
+        return bool(pendente and pendente['proxima'] and pendente['proxima'] > datetime.now().isoformat())
+
+    def avancar(self, linhas: List[Dict[str, str]],
+                falhas: Iterable[Dict[str, str]] = ()) -> List[Dict[str, str]]:
+        """Registra linhas tratadas e falhas, sobe a marca d'água (até a falha mais antiga) e esquece o que ficou para trás
+
+        Devolve as falhas que chegaram a max_tentativas (desistidas: saem das pendentes como vistas).
+        """
+        desistidas = []
+        for linha in falhas:
+            chave = chave_linha(linha)
+            pendente = self.pendentes.get(chave) or {"tentativas": 0}
+            pendente['tentativas'] += 1
+            if pendente['tentativas'] >= self.max_tentativas:
+                self.pendentes.pop(chave, None)
+                desistidas.append(linha)
+                continue
+            data = parse_data_monitor(linha.get('data_processamento', ''))
+            espera = timedelta(seconds=self.espera_s * 2 ** (pendente['tentativas'] - 1))
+            pendente['data'] = data.isoformat() if data else ''
+            pendente['proxima'] = (datetime.now() + espera).isoformat(timespec='seconds')
+            self.pendentes[chave] = pendente
+        if desistidas:
+            logger.warning("🛑 %s linha(s) desistidas depois de %s falha(s) de reprocesso",
+                           len(desistidas), self.max_tentativas)
+
+        for linha in list(linhas) + desistidas:
+            data = parse_data_monitor(linha.get('data_processamento', ''))
+            chave = chave_linha(linha)
+            self.vistos[chave] = data.isoformat() if data else ''
+            self.pendentes.pop(chave, None)
+        # Tratadas depois de uma pendente continuam em vistos: liberada a pendente, a marca sobe até elas
+        datas_vistas = [datetime.fromisoformat(v) for v in self.vistos.values() if v]
+        if datas_vistas and (self.watermark is None or max(datas_vistas) > self.watermark):
+            self.watermark = max(datas_vistas)
+
+        datas_pendentes = [datetime.fromisoformat(p['data']) for p in self.pendentes.values() if p['data']]
+        if datas_pendentes and self.watermark and min(datas_pendentes) < self.watermark:
+            # Não passa de uma linha que ainda não deu certo (o filtro data < marca d'água a pularia)
+            self.watermark = min(datas_pendentes)
+
+        if self.watermark:
+            # A consulta começa no dia da marca d'água: só o que cai nesse dia pode reaparecer
+            inicio_dia = self.watermark.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+            self.vistos = {k: v for k, v in self.vistos.items() if not v or v >= inicio_dia}
+        return desistidas
+
+    def esquecer_pendentes(self, rejeitadas: Set[str]) -> int:
+        """Tira das pendentes as linhas que a consulta não trouxe mais como rejeitadas (resolvidas por fora)"""
+        sumidas = [chave for chave in self.pendentes if chave not in rejeitadas]
+        for chave in sumidas:
+            self.pendentes.pop(chave)
+        return len(sumidas)
+
+
+class RejectionPoller:
+    """Consulta incremental do eFormseMonitor por rejeições novas desde a marca d'água"""
+
+    def __init__(self, auth_manager, data_scraper: DataScraper, config):
+        self.auth_manager = auth_manager
+        self.data_scraper = data_scraper
+        self.page = data_scraper.page
+        self.config = config
+        self.estado = WatermarkStore(config.state_path, config.max_tentativas, config.espera_s)
+
+    def janela_inicial(self) -> datetime:
+        if self.estado.watermark:
+            return self.estado.watermark
+        return datetime.now() - timedelta(days=self.config.initial_days)
+
+    def _consultar(self):
+        self.auth_manager.navigate_to_search_screen()
+        if not self.auth_manager.fill_search_form(format_search_date(self.janela_inicial()), ""):
+            raise RuntimeError("Não consegui preencher a consulta do monitor")
+
+    def poll(self) -> List[Dict[str, str]]:
+        """Uma única consulta (status Rejeitado, sem chave), todas as páginas; retorna as linhas ainda não vistas"""
+        logger.info("🔎 Consultando rejeições desde %s", self.janela_inicial().strftime('%d/%m/%Y %H:%M:%S'))
+        self._consultar()
+
+        total = 0
+        novas = []
+        rejeitadas = set()
+        for nota in self.data_scraper.iter_invoices():
+            total += 1
+            linha = nomear_colunas(nota)
+            if 'Rejeitado' not in linha.get('status', ''):
+                continue  # linha "sem registros" ou fora do filtro
+            rejeitadas.add(chave_linha(linha))
+            data = parse_data_monitor(linha.get('data_processamento', ''))
+            if data and self.estado.watermark and data < self.estado.watermark:
+                continue
+            if chave_linha(linha) in self.estado.vistos or self.estado.aguardando(chave_linha(linha)):
+                continue
+            novas.append(linha)
+
+        # A janela começa na pendente mais antiga: a que não veio deixou de estar rejeitada
+        if self.estado.esquecer_pendentes(rejeitadas):
+            self.estado.avancar([])
+            self.estado.salvar()
+        logger.info("📬 %s linha(s) na janela, %s nova(s)", total, len(novas))
+        return novas
+
+    def _marcar_proxima_pagina(self, pendentes: Dict[str, Dict[str, str]]) -> Optional[Set[str]]:
+        """Para na primeira página com linhas pendentes e marca todas elas
+
+        Devolve as chaves marcadas, ou None se nenhuma pendente está mais no grid.
+        """
+        with closing(self.data_scraper.paginas()) as paginas:
+            for pagina, celulas in paginas:
+                indices = {}
+                for idx, linha in enumerate(celulas):
+                    chave = chave_linha(nomear_colunas({f"col_{i}": v for i, v in enumerate(linha)}))
+                    if chave in pendentes:
+                        indices[chave] = idx
+                if indices:
+                    logger.debug("☑️  Página %s: marcando %s linha(s)", pagina, len(indices))
+                    if not self.data_scraper.marcar_linhas(list(indices.values())):
+                        # Sem checkbox não há o que reprocessar: desiste dessas linhas
+                        for chave in indices:
+                            pendentes.pop(chave)
+                        return set()
+                    return set(indices)
+        return None
+
+    def reprocessar(self, novas: List[Dict[str, str]]) -> List[NoteResult]:
+        """Marca as linhas novas e dispara um Reprocessar por página do grid que as contém
+
+        O poll deixa o grid na última página e o Reprocessar tira o grid da tela, então
+        cada rodada refaz a consulta e volta a paginar do início.
+        """
+        pendentes = {chave_linha(linha): linha for linha in novas}
+        reprocessadas: Set[str] = set()
+        while pendentes:
+            self._consultar()
+            marcadas = self._marcar_proxima_pagina(pendentes)
+            if marcadas is None:
+                logger.warning("⚠️  %s linha(s) não encontradas no grid para reprocessar", len(pendentes))
+                break
+            if marcadas and self.auth_manager.reprocessar_notas_selecionadas():
+                reprocessadas |= marcadas
+            for chave in marcadas:
+                pendentes.pop(chave)
+
+        resultados = []
+        for linha in novas:
+            sucesso = chave_linha(linha) in reprocessadas
+            status = "✅ REPROCESSADO COM SUCESSO" if sucesso else "❌ FALHA NO REPROCESSAMENTO"
+            resultados.append(NoteResult(nota_da_linha(linha), status, linha, sucesso))
+        return resultados
+
+    def confirmar(self, tratadas: List[Dict[str, str]],
+                  falhas: Iterable[Dict[str, str]] = ()) -> List[Dict[str, str]]:
+        """Persiste a marca d'água só depois que as linhas foram tratadas; as falhas voltam numa consulta seguinte
+
+        Devolve as falhas desistidas (max_tentativas), que quem chamou manda para a fila humana.
+        """
+        desistidas = self.estado.avancar(tratadas, falhas)
+        self.estado.salvar()
+        return desistidas
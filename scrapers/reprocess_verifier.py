@@ -0,0 +1,202 @@
+import time
+import logging
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from models.entities import InvoiceStatus, NoteResult, parse_status
+from scrapers.data_scraper import DataScraper, nomear_colunas
+from scrapers.grid_export import GridExporter
+from utils.helpers import format_search_date, parse_data_monitor
+
+logger = logging.getLogger(__name__)
+
+STATUS_CONFIRMADO = "✅ Saiu de Rejeitado"
+STATUS_REJEITADO_NOVAMENTE = "🚫 Rejeitado novamente"
+STATUS_NAO_CONFIRMADO = "⚠️ Reprocesso não confirmado"
+STATUS_NAO_VERIFICADO = "⏳ Não verificado até o fim da execução"
+
+
+def chave_documento(linha: Dict[str, str]) -> tuple:
+    """Número do documento + série, sem zeros à esquerda (o grid mostra 000019412)"""
+    return (linha.get('numero_documento', '').lstrip('0'), linha.get('codigo', '').strip())
+
+
+class _Pendente:
+    __slots__ = ('resultado', 'documento', 'rejeitado_em', 'reprocessado_em', 'tentativas', 'proxima')
+
+    def __init__(self, resultado: NoteResult, documento: tuple, rejeitado_em: Optional[datetime],
+                 reprocessado_em: datetime, proxima: float):
+        self.resultado = resultado
+        self.documento = documento
+        self.rejeitado_em = rejeitado_em
+        self.reprocessado_em = reprocessado_em
+        self.tentativas = 0
+        self.proxima = proxima
+
+
+class ReprocessVerifier:
+    """Confirma em lote se as notas reprocessadas saíram do estado Rejeitado
+
+    As notas reprocessadas ficam numa lista de pendentes. Quando vencem (atrasos de
+    VERIFY_DELAYS, crescentes a cada tentativa), uma única consulta de Rejeitados
+    por grupo resolve todas: a nota que sumiu do grid saiu de Rejeitado, a que
+    aparece com data_processamento posterior ao reprocesso foi rejeitada de novo.
+    Sumir só conta se a consulta provou que leu o grid (linhas com status ou o
+    aviso de "nenhum registro"); senão o grupo volta para o backoff.
+    O status confirmado é gravado no próprio NoteResult.
+
+    acao_limitada (NFScraperApp.acao_limitada) põe cada consulta sob os mesmos
+    limitadores de ritmo das pesquisas; sem ela, a consulta não é limitada.
+    """
+
+    def __init__(self, auth_manager, data_scraper: DataScraper, config, exportador: Optional[GridExporter] = None,
+                 acao_limitada: Optional[Callable] = None):
+        self.auth_manager = auth_manager
+        self.acao_limitada = acao_limitada
+        self.data_scraper = data_scraper
+        self.exportador = exportador
+        self.page = data_scraper.page
+        self.config = config
+        self.pendentes: List[_Pendente] = []
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self.config.delays)
+
+    def registrar(self, resultado: NoteResult):
+        """Agenda a confirmação de um resultado reprocessado"""
+        dados = resultado.dados_completos or {}
+        if not self.ativo or not resultado.reprocessado or not dados.get('numero_documento'):
+            return
+        resultado.status_confirmado = "⏳ Aguardando confirmação"
+        self.pendentes.append(_Pendente(
+            resultado,
+            chave_documento(dados),
+            parse_data_monitor(dados.get('data_processamento', '')),
+            datetime.now(),
+            time.monotonic() + self.config.delays[0],
+        ))
+
+    def proximo_vencimento(self) -> Optional[float]:
+        return min((p.proxima for p in self.pendentes), default=None)
+
+    def verificar_vencidos(self) -> int:
+        """Verifica os pendentes cujo prazo já venceu; retorna quantos foram resolvidos"""
+        agora = time.monotonic()
+        vencidos = [p for p in self.pendentes if p.proxima <= agora]
+        if not vencidos:
+            return 0
+
+        resolvidos = 0
+        for grupo in self._agrupar(vencidos):
+            resolvidos += self._verificar_grupo(grupo)
+        return resolvidos
+
+    def finalizar(self):
+        """Verifica o que vence dentro de config.espera_final_s; o que passaria disso sai como não verificado
+
+        Sem o limite, o fim do lote (e cada sessão do modo paralelo) esperaria todos os
+        VERIFY_DELAYS antes de gravar o CSV.
+        """
+        limite = time.monotonic() + self.config.espera_final_s
+        while self.pendentes and self.proximo_vencimento() <= limite:
+            espera = self.proximo_vencimento() - time.monotonic()
+            if espera > 0:
+                logger.info("⏳ %s reprocesso(s) aguardando confirmação, próxima verificação em %.0fs",
+                            len(self.pendentes), espera)
+                time.sleep(espera)
+            self.verificar_vencidos()
+        if self.pendentes:
+            logger.info("⏳ %s reprocesso(s) sem verificação: a próxima passaria de VERIFY_FINAL_WAIT_S",
+                        len(self.pendentes))
+        for pendente in self.pendentes:
+            pendente.resultado.status_confirmado = STATUS_NAO_VERIFICADO
+        self.pendentes = []
+
+    def _agrupar(self, vencidos: List[_Pendente]) -> List[List[_Pendente]]:
+        """Grupos cuja janela de datas cabe em config.window_days - uma consulta por grupo"""
+        minimo = datetime.now() - timedelta(days=self.config.window_days)
+        ordenados = sorted(vencidos, key=lambda p: p.rejeitado_em or minimo)
+        grupos: List[List[_Pendente]] = []
+        for pendente in ordenados:
+            inicio = pendente.rejeitado_em or minimo
+            if grupos:
+                primeiro = grupos[-1][0].rejeitado_em or minimo
+                if inicio - primeiro <= timedelta(days=self.config.window_days):
+                    grupos[-1].append(pendente)
+                    continue
+            grupos.append([pendente])
+        return grupos
+
+    def _consultar_rejeitados(self, desde: datetime, documentos: set) -> Dict[tuple, datetime]:
+        """Uma consulta de Rejeitados sem chave; devolve documento -> data_processamento mais recente
+
+        Lê o filtro inteiro (exportação do grid ou todas as páginas), guardando só os documentos do grupo.
+        Sem nenhuma linha com status reconhecível e sem o aviso de grid vazio, a consulta
+        não prova nada (grid que não carregou, filtro não aplicado): RuntimeError.
+        """
+        limitador = self.acao_limitada('verificacao', lote=True) if self.acao_limitada else nullcontext()
+        with limitador:
+            self.auth_manager.navigate_to_search_screen()
+            if not self.auth_manager.fill_search_form(format_search_date(desde), ""):
+                raise RuntimeError("Não consegui preencher a consulta de verificação")
+
+            rejeitados: Dict[tuple, datetime] = {}
+            lidas = 0
+            fonte = self.exportador or self.data_scraper
+            for nota in fonte.iter_invoices():
+                linha = nomear_colunas(nota)
+                status = parse_status(linha.get('status', ''))
+                if status is not InvoiceStatus.OUTRO:
+                    lidas += 1
+                if status is not InvoiceStatus.REJEITADO:
+                    continue
+                documento = chave_documento(linha)
+                if documento not in documentos:
+                    continue
+                data = parse_data_monitor(linha.get('data_processamento', '')) or datetime.min
+                if data > rejeitados.get(documento, datetime.min):
+                    rejeitados[documento] = data
+            if not lidas and not self.data_scraper.grid_sem_registros():
+                raise RuntimeError("consulta de verificação sem linhas com status nem aviso de grid vazio")
+        return rejeitados
+
+    def _verificar_grupo(self, grupo: List[_Pendente]) -> int:
+        desde = min((p.rejeitado_em for p in grupo if p.rejeitado_em),
+                    default=datetime.now() - timedelta(days=self.config.window_days))
+        try:
+            rejeitados = self._consultar_rejeitados(desde, {p.documento for p in grupo})
+        except Exception as e:
+            logger.error("❌ Falha na consulta de verificação: %s", e)
+            rejeitados = None
+
+        resolvidos = 0
+        for pendente in grupo:
+            final = None
+            if rejeitados is not None:
+                data = rejeitados.get(pendente.documento)
+                if data is None:
+                    final = STATUS_CONFIRMADO
+                elif data >= pendente.reprocessado_em.replace(microsecond=0):
+                    final = STATUS_REJEITADO_NOVAMENTE
+
+            pendente.tentativas += 1
+            if final is None and pendente.tentativas >= len(self.config.delays):
+                final = STATUS_NAO_CONFIRMADO
+
+            if final is None:
+                # Ainda com a rejeição antiga: tenta de novo mais tarde (backoff)
+                pendente.proxima = time.monotonic() + self.config.delays[pendente.tentativas]
+                continue
+
+            pendente.resultado.status_confirmado = final
+            pendente.resultado.verificado_em = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+            self.pendentes.remove(pendente)
+            resolvidos += 1
+            logger.info("%s: documento %s", final, pendente.documento[0],
+                        extra={"documento": pendente.documento[0], "tentativas": pendente.tentativas})
+
+        logger.info("🔎 Verificação de grupo: %s nota(s), %s resolvida(s), %s pendente(s)",
+                    len(grupo), resolvidos, len(self.pendentes))
+        return resolvidos
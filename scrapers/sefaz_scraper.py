@@ -1,14 +1,20 @@
 import time
 import logging
-from playwright.sync_api import Page, TimeoutError
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, Optional
+
+from utils.helpers import timeout_playwright
+from utils.protocol_cache import FONTE_SEFAZ, ProtocolCache, protocolo_valido
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
 
 logger = logging.getLogger(__name__)
 
 class SefazScraper:
-    def __init__(self, page: Page):
+    def __init__(self, page: "Page", cache: Optional[ProtocolCache] = None):
         self.page = page
         self.timeout = 30000
+        self.cache = cache
     
     def wait_and_click(self, selector: str, description: str = ""):
         """Espera elemento e clica"""
@@ -18,7 +24,7 @@ class SefazScraper:
             self.page.click(selector)
             time.sleep(1)
             return True
-        except TimeoutError:
+        except timeout_playwright():
             logger.error(f"❌ Não encontrei: {description}")
             return False
     
@@ -30,7 +36,7 @@ class SefazScraper:
             self.page.fill(selector, text)
             time.sleep(0.5)
             return True
-        except TimeoutError:
+        except timeout_playwright():
             logger.error(f"❌ Não encontrei campo: {description}")
             return False
     
@@ -200,6 +206,12 @@ class SefazScraper:
     
     def consultar_nota_sefaz(self, nota_fiscal: str) -> Dict:
         """Consulta nota na Sefaz e extrai protocolo"""
+        # Protocolo emitido não muda: se já está no cache, nem abre o portal
+        protocolo = self.cache.get(nota_fiscal) if self.cache else None
+        if protocolo:
+            logger.info(f"🗃️  Protocolo em cache: {nota_fiscal} -> {protocolo}")
+            return {"nota": nota_fiscal, "protocolo": protocolo, "consulta_realizada": False, "cache": True}
+        
         logger.info(f"🌐 Consultando nota na Sefaz: {nota_fiscal}")
         
         try:
@@ -245,6 +257,8 @@ class SefazScraper:
             # 6. Extrair protocolo
             logger.info("6. 📄 Extraindo protocolo...")
             protocolo = self.extrair_protocolo(nota_fiscal)
+            if self.cache and protocolo_valido(protocolo):
+                self.cache.put(nota_fiscal, protocolo, FONTE_SEFAZ)
             
             return {
                 "nota": nota_fiscal,
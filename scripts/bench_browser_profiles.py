@@ -0,0 +1,148 @@
+"""Benchmark dos perfis de lançamento do Chromium: tempo de launch, latência por nota e memória (RSS)
+
+Para cada perfil de utils.browser_launch.PERFIS, lança o navegador várias vezes e,
+em cada lançamento, simula N "notas" sobre uma página sintética no formato do grid
+do eFormseMonitor (com ícones em imagem, como o grid real): carrega a página e lê as
+células com a mesma consulta do DataScraper. Ao final mede o RSS somado de todos os
+processos do Chromium (precisa do psutil, já listado no requirements.txt).
+
+Com --url, cada nota passa a ser uma navegação real para a URL (ex.: a tela de login
+do eFormseMonitor pelo proxy), em vez da página sintética.
+
+Uso:
+    python scripts/bench_browser_profiles.py --runs 3 --notas 50
+    python scripts/bench_browser_profiles.py --url http://nfecd-gpa.unisys.com.br/eFormseMonitor/ --proxy 10.141.6.12:80
+"""
+import os
+import sys
+import time
+import zlib
+import base64
+import struct
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from playwright.sync_api import sync_playwright
+
+from scrapers.data_scraper import GRID_ROWS_SELECTOR, _JS_CELULAS
+from utils.browser_launch import PERFIS, lancar_chromium
+
+try:
+    import psutil
+except ImportError:  # RSS fica de fora, o resto do benchmark roda igual
+    psutil = None
+
+
+def _png(tom: int, lado: int = 16) -> str:
+    """PNG RGBA lado x lado em base64 (ícone do grid); tons diferentes = imagens diferentes para decodificar"""
+    def bloco(tipo: bytes, dados: bytes) -> bytes:
+        return struct.pack(">I", len(dados)) + tipo + dados + struct.pack(">I", zlib.crc32(tipo + dados))
+    pixels = b"".join(b"\x00" + bytes((tom, 0x20, 0x20, 0xff)) * lado for _ in range(lado))
+    png = (b"\x89PNG\r\n\x1a\n" + bloco(b"IHDR", struct.pack(">IIBBBBB", lado, lado, 8, 6, 0, 0, 0))
+           + bloco(b"IDAT", zlib.compress(pixels)) + bloco(b"IEND", b""))
+    return base64.b64encode(png).decode()
+
+
+def pagina_grid(linhas: int) -> str:
+    corpo = []
+    for i in range(linhas):
+        icones = "".join(f'<td><img src="data:image/png;base64,{_png((i * 5 + k) % 256)}"></td>' for k in range(5))
+        corpo.append(f"<tr><td><input type='checkbox' name='checkedRecords' value='{i}'></td>"
+                     f"<td>{i}</td><td>{100000 + i}</td><td>3525{i:040d}</td><td></td><td>NF-e</td>"
+                     f"<td>01/01/2025</td><td>Rejeitado</td>{icones}<td>R$ 1.234,56</td><td></td>"
+                     f"<td>01/01/2025</td><td>{i}</td><td>Empresa {i}</td><td></td>"
+                     f"<td class='t-last'>Rejeicao: Data de Emissao muito atrasada</td></tr>")
+    return ("<html><body><div class='t-grid'><div class='t-grid-content'><table><tbody>"
+            + "".join(corpo) + "</tbody></table></div></div></body></html>")
+
+
+def rss_chromium_mb():
+    """RSS somado dos processos do Chromium abertos por este processo (via driver do Playwright)"""
+    if psutil is None:
+        return None
+    total = 0
+    for filho in psutil.Process().children(recursive=True):
+        try:
+            if 'chrom' in filho.name().lower() or 'headless_shell' in filho.name().lower():
+                total += filho.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / 2**20
+
+
+def medir_perfil(playwright, perfil: str, args) -> dict:
+    launches, notas, rss = [], [], []
+    for _ in range(args.runs):
+        inicio = time.perf_counter()
+        browser = lancar_chromium(playwright, perfil, headless=True, cache_dir=args.cache_dir)
+        contexto = browser.new_context(proxy={"server": f"http://{args.proxy}"} if args.proxy else None,
+                                       ignore_https_errors=True)
+        page = contexto.new_page()
+        launches.append(time.perf_counter() - inicio)
+
+        for _ in range(args.notas):
+            inicio = time.perf_counter()
+            if args.url:
+                page.goto(args.url, wait_until="load")
+            else:
+                page.goto(args.arquivo)
+                page.eval_on_selector_all(GRID_ROWS_SELECTOR, _JS_CELULAS)
+            notas.append(time.perf_counter() - inicio)
+
+        memoria = rss_chromium_mb()
+        if memoria is not None:
+            rss.append(memoria)
+        browser.close()
+    return {"launch": launches, "nota": notas, "rss": rss}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="lançamentos por perfil")
+    parser.add_argument("--notas", type=int, default=30, help="notas simuladas por lançamento")
+    parser.add_argument("--linhas", type=int, default=200, help="linhas do grid sintético")
+    parser.add_argument("--perfis", default=",".join(PERFIS))
+    parser.add_argument("--url", help="navegar para esta URL em cada nota em vez da página sintética")
+    parser.add_argument("--proxy", help="host:porta")
+    parser.add_argument("--cache-dir", default=os.path.join("state", "bench-chromium-cache"))
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False, encoding="utf-8") as arquivo:
+        arquivo.write(pagina_grid(args.linhas))
+    args.arquivo = Path(arquivo.name).resolve().as_uri()
+
+    print("🚀 BENCHMARK DE PERFIS DO CHROMIUM")
+    print(f"   {args.runs} lançamento(s) x {args.notas} nota(s) | "
+          f"{args.url or f'grid sintético de {args.linhas} linhas'}")
+    print("=" * 60)
+    resultados = {}
+    try:
+        with sync_playwright() as playwright:
+            for perfil in args.perfis.split(","):
+                resultados[perfil] = medir_perfil(playwright, perfil.strip(), args)
+                r = resultados[perfil]
+                rss = f"{statistics.median(r['rss']):.0f}MB" if r['rss'] else "n/d (sem psutil)"
+                print(f"📊 {perfil}: launch mediana {statistics.median(r['launch']):.2f}s | "
+                      f"nota mediana {statistics.median(r['nota']) * 1000:.0f}ms "
+                      f"(p95 {sorted(r['nota'])[int(len(r['nota']) * 0.95) - 1] * 1000:.0f}ms) | RSS {rss}")
+    finally:
+        os.remove(arquivo.name)
+
+    if {"padrao", "enxuto"} <= resultados.keys():
+        base, enxuto = resultados["padrao"], resultados["enxuto"]
+        print("=" * 60)
+        print(f"⚡ enxuto vs padrao: launch {statistics.median(enxuto['launch']) / statistics.median(base['launch']):.2f}x | "
+              f"nota {statistics.median(enxuto['nota']) / statistics.median(base['nota']):.2f}x")
+        if base['rss'] and enxuto['rss']:
+            economia = statistics.median(base['rss']) - statistics.median(enxuto['rss'])
+            print(f"💾 RSS: {economia:.0f}MB a menos por navegador "
+                  f"({statistics.median(base['rss']) / statistics.median(enxuto['rss']):.2f} sessões enxutas "
+                  f"no espaço de uma padrão)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Benchmark do pipeline do DataScraper: linhas col_N + regex vs. colunas + status_code
+
+Gera N linhas sintéticas no formato do grid e compara, para o mesmo conteúdo:
+  - antes: lista de dicts -> lista de listas -> DataFrame; filtro e contagens com
+    str.contains na coluna de status a cada chamada
+  - agora: colunas direto da extração (linhas_para_colunas) -> DataFrame com
+    status_code int8; filtro e contagens com máscaras inteiras e bincount
+
+Uso:
+    python scripts/bench_data_scraper.py --rows 100000 --repeat 5
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from scrapers.data_scraper import DataScraper, linhas_para_colunas
+
+STATUS = [
+    "Aprovado", "Autorizado o uso da NF-e",
+    "Rejeitado Clique aqui para ajuda", "Pendente de retorno", "Cancelado",
+]
+
+
+def gerar_linhas(n: int):
+    random.seed(42)
+    linhas = []
+    for i in range(n):
+        linha = [f"valor_{i}_{c}" for c in range(20)]
+        linha[7] = random.choice(STATUS)
+        linhas.append(linha)
+    return linhas
+
+
+def pipeline_antigo(notas, consultas: int):
+    linhas_normalizadas = [[nota.get(f"col_{i}", "") for i in range(20)] for nota in notas]
+    df = pd.DataFrame(linhas_normalizadas, columns=[f"col_{i}" for i in range(20)])
+    for _ in range(consultas):
+        filtrado = df[df['col_7'].str.contains("Rejeitado|Pendente", na=False)]
+        contagem = {
+            "REJEITADO": int(df['col_7'].str.contains("Rejeitado", na=False).sum()),
+            "PENDENTE": int(df['col_7'].str.contains("Pendente", na=False).sum()),
+        }
+    return len(filtrado), contagem
+
+
+def pipeline_novo(linhas, consultas: int):
+    scraper = DataScraper(page=None)
+    df = scraper.normalize_dataframe(linhas_para_colunas(linhas))
+    for _ in range(consultas):
+        filtrado = scraper.filter_rejected_invoices(df)
+        contagem = scraper.count_by_status(df)
+    return len(filtrado), contagem
+
+
+def cronometrar(funcao, *args, repeat: int):
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--consultas", type=int, default=10, help="filtros/contagens por DataFrame")
+    args = parser.parse_args()
+
+    linhas = gerar_linhas(args.rows)
+    # O caminho antigo recebia dicts col_N do scrape_invoices
+    notas = [{f"col_{i}": v for i, v in enumerate(linha)} for linha in linhas]
+
+    print(f"📊 BENCHMARK DataScraper - {args.rows} linhas, {args.consultas} consultas, melhor de {args.repeat}")
+    antigo, (n_antigo, _) = cronometrar(pipeline_antigo, notas, args.consultas, repeat=args.repeat)
+    novo, (n_novo, contagem) = cronometrar(pipeline_novo, linhas, args.consultas, repeat=args.repeat)
+
+    assert n_antigo == n_novo, "os dois pipelines precisam filtrar as mesmas linhas"
+    print(f"   antes: {antigo * 1000:8.1f} ms")
+    print(f"   agora: {novo * 1000:8.1f} ms  ({antigo / novo:.1f}x mais rápido)")
+    print(f"   rejeitadas/pendentes: {n_novo} | contagem: {contagem}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark da extração do grid: ElementHandles (backend handles) vs. outerHTML + parser Python (backend html)
+
+Monta uma página sintética no formato do grid do eFormseMonitor (checkbox, status com
+link de ajuda, linha vermelha, td.t-last) e, para cada nota sorteada, roda o
+AuthManager.extract_invoice_data com os dois backends sobre a mesma página. As esperas
+fixas do AuthManager (time.sleep) são zeradas para medir só a extração; os dados
+devolvidos pelos dois backends são comparados nota a nota.
+
+Sem navegador (--sem-navegador), mede só o parser sobre o HTML sintético ou sobre
+um snapshot salvo (--snapshot pagina.html).
+
+Uso:
+    python scripts/bench_grid_html.py --linhas 200 --notas 50
+    python scripts/bench_grid_html.py --sem-navegador --snapshot grid_salvo.html
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import tempfile
+import types
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auth.authentication as authentication
+from auth.authentication import AuthManager
+from scrapers.grid_html import parse_grid
+from utils.browser_launch import lancar_chromium
+
+
+def pagina_grid(linhas: int) -> str:
+    corpo = []
+    for i in range(linhas):
+        rejeitada = i % 3 == 0
+        status = ("Rejeitado <a href='#'>Clique aqui</a> para ver o motivo" if rejeitada else "Autorizado o uso da NF-e")
+        estilo = " style='color: rgb(255, 0, 0);'" if rejeitada else ""
+        corpo.append(f"<tr{estilo}><td><input type='checkbox' name='checkedRecords' value='{9000 + i}'></td>"
+                     f"<td>{i}</td><td>{100000 + i}</td><td>3525{i:040d}</td><td></td><td>NF-e</td>"
+                     f"<td>01/01/2025 10:00:{i % 60:02d}</td><td>{status}</td>"
+                     + "<td><img src='#'></td>" * 5 +
+                     f"<td>R$ 1.234,56</td><td style='display:none'>x</td>"
+                     f"<td>01/01/2025</td><td>{i}</td><td>Empresa&nbsp;{i} &amp; Cia</td><td></td>"
+                     f"<td class='t-last'>Rejeicao: Data de Emissao<br>muito atrasada</td></tr>")
+    return ("<html><body><div class='t-grid'><div class='t-grid-content'><table><tbody>"
+            + "".join(corpo) + "</tbody></table></div></div></body></html>")
+
+
+def medir_parser(html: str, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        parse_grid(html)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def medir_backend(page, backend: str, chaves, arquivo: str):
+    auth = AuthManager(page, timeout=10000, backend_grid=backend)
+    tempos, resultados = [], []
+    for chave in chaves:
+        page.goto(arquivo)  # checkboxes desmarcadas para cada nota
+        inicio = time.perf_counter()
+        resultados.append(auth.extract_invoice_data(chave))
+        tempos.append(time.perf_counter() - inicio)
+    return tempos, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--linhas", type=int, default=200, help="linhas do grid sintético")
+    parser.add_argument("--notas", type=int, default=30, help="notas extraídas por backend")
+    parser.add_argument("--snapshot", help="HTML salvo de uma página do monitor (só para o parser)")
+    parser.add_argument("--sem-navegador", action="store_true", help="mede só o parser")
+    args = parser.parse_args()
+
+    html = Path(args.snapshot).read_text(encoding="utf-8", errors="replace") if args.snapshot else pagina_grid(args.linhas)
+    linhas = parse_grid(html)
+    print("🚀 BENCHMARK DA EXTRAÇÃO DO GRID")
+    print(f"   {len(linhas)} linha(s) | {args.snapshot or 'grid sintético'}")
+    print("=" * 60)
+    print(f"🐍 Parser: {medir_parser(html, 20) * 1000:.1f}ms por página ({len(html) / 1024:.0f}KB de HTML)")
+    if args.sem_navegador or args.snapshot:
+        return
+
+    # Só a extração interessa: as pausas fixas do AuthManager ficam de fora
+    authentication.time = types.SimpleNamespace(sleep=lambda _: None, time=time.time)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False, encoding="utf-8") as arquivo:
+        arquivo.write(html)
+    uri = Path(arquivo.name).resolve().as_uri()
+    random.seed(42)
+    chaves = [f"3525{random.randrange(args.linhas):040d}" for _ in range(args.notas)]
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as playwright:
+            browser = lancar_chromium(playwright, "enxuto", headless=True, cache_dir=None)
+            page = browser.new_page()
+            medidos = {backend: medir_backend(page, backend, chaves, uri) for backend in ("handles", "html")}
+            browser.close()
+    finally:
+        os.remove(arquivo.name)
+
+    for backend, (tempos, _) in medidos.items():
+        print(f"📊 {backend}: mediana {statistics.median(tempos) * 1000:.0f}ms | "
+              f"p95 {sorted(tempos)[int(len(tempos) * 0.95) - 1] * 1000:.0f}ms por nota")
+    handles, html_ = medidos["handles"], medidos["html"]
+    print(f"⚡ html vs handles: {statistics.median(html_[0]) / statistics.median(handles[0]):.2f}x")
+    divergentes = [a["nota_fiscal"] for a, b in zip(handles[1], html_[1]) if a != b]
+    if divergentes:
+        print(f"⚠️  {len(divergentes)} nota(s) com dados diferentes entre os backends: {divergentes[:5]}")
+    else:
+        print("✅ Mesmos dados nos dois backends para todas as notas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark da leitura de XMLs de NF-e: ET.parse arquivo a arquivo vs. utils.nfe_xml + processos
+
+Gera N XMLs nfeProc sintéticos (com --itens produtos cada) numa pasta temporária e
+compara, para os mesmos arquivos:
+  - antes: ET.parse da árvore inteira + find do nProt, um arquivo por vez
+  - agora: utils.nfe_xml.ler_varios (interpreta só os blocos ide/emit/ICMSTot/infProt,
+    distribuído entre processos), extraindo também cStat, datas, total e emitente
+
+Uso:
+    python scripts/bench_nfe_xml.py --arquivos 5000 --itens 30
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.nfe_xml import ler_varios
+
+ITEM = ("<det nItem=\"{n}\"><prod><cProd>{n}</cProd><xProd>PRODUTO {n}</xProd><qCom>1.0000</qCom>"
+        "<vUnCom>10.00</vUnCom><vProd>10.00</vProd></prod><imposto><ICMS><ICMS00><orig>0</orig>"
+        "<CST>00</CST><vBC>10.00</vBC><pICMS>18.00</pICMS><vICMS>1.80</vICMS></ICMS00></ICMS></imposto></det>")
+
+MODELO = """<?xml version="1.0" encoding="UTF-8"?>
+<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00"><NFe><infNFe Id="NFe{chave}" versao="4.00">
+<ide><cUF>35</cUF><nNF>{i}</nNF><dhEmi>2025-10-21T10:00:00-03:00</dhEmi></ide>
+<emit><CNPJ>47508411000156</CNPJ><xNome>EMPRESA TESTE LTDA</xNome><enderEmit><xMun>SAO PAULO</xMun></enderEmit></emit>
+<dest><CNPJ>11111111000191</CNPJ><xNome>CLIENTE</xNome></dest>
+{itens}
+<total><ICMSTot><vProd>{total}</vProd><vNF>{total}</vNF></ICMSTot></total></infNFe>
+<Signature xmlns="http://www.w3.org/2000/09/xmldsig#"><SignatureValue>{assinatura}</SignatureValue></Signature></NFe>
+<protNFe versao="4.00"><infProt><tpAmb>1</tpAmb><chNFe>{chave}</chNFe><dhRecbto>2025-10-21T10:00:05-03:00</dhRecbto>
+<nProt>1352529{i:08d}</nProt><cStat>100</cStat><xMotivo>Autorizado o uso da NF-e</xMotivo></infProt></protNFe></nfeProc>
+"""
+
+
+def gerar_xmls(pasta: str, n: int, itens: int):
+    caminhos = []
+    corpo_itens = "".join(ITEM.format(n=k) for k in range(1, itens + 1))
+    for i in range(n):
+        chave = f"3525104750841109403755110000{i:016d}"
+        caminho = os.path.join(pasta, f"{chave}.xml")
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(MODELO.format(chave=chave, i=i, itens=corpo_itens, total=f"{itens * 10:.2f}",
+                                        assinatura="A" * 344))
+        caminhos.append(caminho)
+    return caminhos
+
+
+def leitura_antiga(caminhos):
+    ns = {'nfe': 'http://www.portalfiscal.inf.br/nfe'}
+    protocolos = []
+    for caminho in caminhos:
+        raiz = ET.parse(caminho).getroot()
+        protocolos.append(raiz.find('.//nfe:protNFe/nfe:infProt/nfe:nProt', ns).text)
+    return protocolos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--arquivos", type=int, default=5000)
+    parser.add_argument("--itens", type=int, default=30, help="produtos (det) por nota")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    pasta = tempfile.mkdtemp(prefix="bench_nfe_")
+    try:
+        caminhos = gerar_xmls(pasta, args.arquivos, args.itens)
+        print(f"📑 BENCHMARK XMLs - {args.arquivos} arquivos, {args.itens} itens cada, workers={args.workers or os.cpu_count()}")
+
+        inicio = time.perf_counter()
+        antigos = leitura_antiga(caminhos)
+        antes = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        sequencial = list(ler_varios(caminhos, workers=1))
+        um_processo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        novos = list(ler_varios(caminhos, workers=args.workers))
+        agora = time.perf_counter() - inicio
+
+        assert antigos == [r.protocolo for r in novos] == [r.protocolo for r in sequencial]
+        print(f"   antes (ET.parse, 1 processo): {antes:7.2f} s")
+        print(f"   blocos, 1 processo:           {um_processo:7.2f} s  ({antes / um_processo:.1f}x)")
+        print(f"   blocos + processos:           {agora:7.2f} s  ({antes / agora:.1f}x)")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
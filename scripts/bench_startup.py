@@ -0,0 +1,84 @@
+"""Benchmark de inicialização: tempo até a primeira navegação do navegador
+
+Executa `main.py --first-nav` (fonte) e, se existir, o executável do PyInstaller
+(`dist/main.exe` ou `dist/main`) várias vezes e mede o tempo de parede entre o
+disparo do processo e o marcador FIRST_NAV impresso pelo app.
+
+Uso:
+    python scripts/bench_startup.py --runs 5
+    python scripts/bench_startup.py --exe dist/main.exe
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(comando, timeout: float):
+    """Retorna (tempo de parede, tempo informado pelo app) até o marcador FIRST_NAV"""
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        comando + ["--first-nav"],
+        cwd=RAIZ,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    try:
+        for linha in processo.stdout:
+            if linha.startswith("FIRST_NAV"):
+                parede = time.perf_counter() - inicio
+                return parede, float(linha.split()[1])
+            if time.perf_counter() - inicio > timeout:
+                break
+        return None, None
+    finally:
+        processo.kill()
+        processo.wait()
+
+
+def executar(nome, comando, runs: int, timeout: float):
+    paredes, internos = [], []
+    for i in range(runs):
+        parede, interno = medir(comando, timeout)
+        if parede is None:
+            print(f"   ❌ {nome} execução {i + 1}: marcador FIRST_NAV não apareceu")
+            continue
+        paredes.append(parede)
+        internos.append(interno)
+        print(f"   {nome} execução {i + 1}: {parede:.2f}s (app: {interno:.2f}s)")
+
+    if paredes:
+        print(f"📊 {nome}: mediana {statistics.median(paredes):.2f}s | "
+              f"mín {min(paredes):.2f}s | máx {max(paredes):.2f}s | "
+              f"antes do app {statistics.median(paredes) - statistics.median(internos):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--exe", help="executável congelado (padrão: dist/main.exe ou dist/main)")
+    args = parser.parse_args()
+
+    print("🚀 BENCHMARK DE INICIALIZAÇÃO (tempo até a primeira navegação)")
+    print("=" * 60)
+    executar("fonte", [sys.executable, os.path.join(RAIZ, "main.py")], args.runs, args.timeout)
+
+    candidatos = [args.exe] if args.exe else [os.path.join(RAIZ, "dist", "main.exe"),
+                                               os.path.join(RAIZ, "dist", "main")]
+    exe = next((c for c in candidatos if c and os.path.exists(c)), None)
+    if exe:
+        executar("congelado", [exe], args.runs, args.timeout)
+    else:
+        print("⚠️  Executável congelado não encontrado - gere com: pyinstaller main.spec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os testes importam os pacotes do projeto (utils, scrapers...) a partir da raiz
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,48 @@
+import pytest
+
+from config.settings import AccountPoolConfig, MonitorAccount, RateConfig
+from utils.account_pool import AccountPool, SemContaDisponivel
+
+
+def _pool(**campos):
+    contas = [MonitorAccount("a", "1"), MonitorAccount("b", "2")]
+    return AccountPool(contas, AccountPoolConfig(**campos), RateConfig())
+
+
+def test_login_pendente_poe_em_espera_sem_tirar_do_pool():
+    pool = _pool(espera_s=600)
+    conta = pool.atribuir()
+    pool.esperar(conta)
+    assert conta.ativa
+    outra = pool.atribuir()
+    assert outra is not conta
+
+
+def test_todas_em_espera_aguarda_a_primeira_voltar():
+    pool = _pool(espera_s=0.05)
+    pool.contas[1].ativa = False
+    conta = pool.atribuir()
+    pool.esperar(conta)
+    assert pool.atribuir() is conta
+
+
+def test_esperas_seguidas_tiram_a_conta_do_pool():
+    pool = _pool(espera_s=0, max_esperas=2)
+    conta = pool.contas[0]
+    pool.contas[1].ativa = False
+    for _ in range(2):
+        assert pool.atribuir() is conta
+        pool.esperar(conta)
+    assert not conta.ativa
+    with pytest.raises(SemContaDisponivel):
+        pool.atribuir()
+
+
+def test_nota_ok_zera_as_esperas():
+    pool = _pool(espera_s=0, max_esperas=2)
+    conta = pool.atribuir()
+    pool.esperar(conta)
+    pool.atribuir()
+    pool.registrar_nota(conta, True)
+    pool.esperar(conta)
+    assert conta.ativa
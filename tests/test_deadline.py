@@ -0,0 +1,35 @@
+import time
+
+import pytest
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from auth.authentication import AuthManager
+from utils.deadline import Prazo, PrazoEsgotado, limitar
+
+
+class PaginaLenta:
+    """Nenhum seletor aparece: cada espera dura o timeout pedido (até 0,2s) e estoura como no Playwright"""
+
+    def wait_for_selector(self, selector, timeout=None):
+        time.sleep(min(timeout / 1000, 0.2))
+        raise PlaywrightTimeoutError(f"Timeout {timeout}ms exceeded")
+
+
+def test_espera_encurtada_pelo_prazo_vira_prazo_esgotado():
+    auth = AuthManager(PaginaLenta(), timeout=10000)
+    with limitar(auth, Prazo("extracao", 0.05)):
+        with pytest.raises(PrazoEsgotado):
+            auth.extract_invoice_data("35250000000000000000000000000000000000000000")
+
+
+def test_clique_encurtado_pelo_prazo_vira_prazo_esgotado():
+    auth = AuthManager(PaginaLenta(), timeout=10000)
+    with limitar(auth, Prazo("reprocesso", 0.05)):
+        with pytest.raises(PrazoEsgotado):
+            auth.wait_and_click("div.div-action-act.Reprocess", "botão Reprocessar")
+
+
+def test_sem_prazo_a_tabela_ausente_continua_sendo_nota_inexistente():
+    auth = AuthManager(PaginaLenta(), timeout=10)
+    resultado = auth.extract_invoice_data("35250000000000000000000000000000000000000000")
+    assert resultado["status"] == "Não tem nota"
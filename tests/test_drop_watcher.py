@@ -0,0 +1,23 @@
+import json
+import threading
+
+from daemon.watcher import DropFolderWatcher
+
+
+def test_arquivo_so_e_consumido_depois_de_parar_de_mudar(tmp_path):
+    watcher = DropFolderWatcher(str(tmp_path), registry=None, intervalo=0.1, parar=threading.Event())
+    arquivo = tmp_path / "notas.json"
+    arquivo.write_text('["3525', encoding="utf-8")
+
+    assert watcher._estaveis() == []
+    arquivo.write_text(json.dumps(["35250000000000000000000000000000000000000001"]), encoding="utf-8")
+    assert watcher._estaveis() == []
+    assert watcher._estaveis() == ["notas.json"]
+
+
+def test_temporario_e_ignorado(tmp_path):
+    watcher = DropFolderWatcher(str(tmp_path), registry=None, intervalo=0.1, parar=threading.Event())
+    (tmp_path / "notas.json.tmp").write_text("[]", encoding="utf-8")
+
+    watcher._estaveis()
+    assert watcher._estaveis() == []
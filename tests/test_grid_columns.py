@@ -0,0 +1,33 @@
+import logging
+
+from scrapers.grid_columns import GRID_HEADERS, MAPA_PADRAO, mapear_colunas, registrar_mapa
+from scrapers.data_scraper import dados_da_linha
+
+THEAD_PADRAO = ['', 'Código', 'Número', 'Chave de Acesso', 'Chave de Consulta', 'Tipo', 'Data de Processamento',
+                'Status', '', '', '', '', '', 'Valor', '', 'Data de Emissão', 'Id', 'Empresa', '', 'Observação']
+
+
+def test_thead_na_ordem_padrao_e_identidade():
+    assert mapear_colunas(THEAD_PADRAO) == list(range(len(GRID_HEADERS)))
+
+
+def test_colunas_trocadas_voltam_para_a_ordem_canonica():
+    thead = list(THEAD_PADRAO)
+    thead[3], thead[7] = thead[7], thead[3]
+    posicoes = mapear_colunas(thead)
+    assert posicoes[3] == GRID_HEADERS.index('status')
+    assert posicoes[7] == GRID_HEADERS.index('chave_acesso')
+
+
+def test_rotulo_desconhecido_vira_coluna_extra_sem_ocupar_campo(caplog):
+    thead = [rotulo for rotulo in THEAD_PADRAO if rotulo != 'Empresa'] + ['Filial']
+    with caplog.at_level(logging.WARNING):
+        mapa = registrar_mapa("teste-filial", thead)
+
+    assert mapa is not MAPA_PADRAO
+    assert not mapa.tem('nome_empresa')
+    assert "Filial" in caplog.text
+    celulas = mapa.reordenar([f"v{i}" for i in range(len(thead))])
+    dados = dados_da_linha(celulas, mapa=mapa)
+    assert 'nome_empresa' not in dados
+    assert dados[f"coluna_extra_{len(GRID_HEADERS)}"] == f"v{len(thead) - 1}"
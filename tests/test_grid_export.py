@@ -0,0 +1,81 @@
+import pytest
+
+from config.settings import ExportConfig
+from scrapers.grid_export import GridExporter
+
+PAGINAS = [{"col_0": "pagina"}]
+
+
+class _Scraper:
+    page = None
+
+    def iter_invoices(self):
+        yield from PAGINAS
+
+
+def _exportador(tmp_path, **campos):
+    return GridExporter(_Scraper(), ExportConfig(dir=str(tmp_path), **campos))
+
+
+def _falhando(exportador, monkeypatch):
+    tentativas = []
+
+    def falha():
+        tentativas.append(1)
+        raise TimeoutError("download")
+
+    monkeypatch.setattr(exportador, "baixar", falha)
+    return tentativas
+
+
+def test_falha_no_download_pausa_e_tenta_de_novo(tmp_path, monkeypatch):
+    exportador = _exportador(tmp_path, pausa_s=0.0)
+    tentativas = _falhando(exportador, monkeypatch)
+    assert list(exportador.iter_invoices()) == PAGINAS
+    assert list(exportador.iter_invoices()) == PAGINAS
+    assert len(tentativas) == 2
+    assert exportador.disponivel is not False
+
+
+def test_falha_no_download_respeita_a_pausa(tmp_path, monkeypatch):
+    exportador = _exportador(tmp_path, pausa_s=600.0)
+    tentativas = _falhando(exportador, monkeypatch)
+    list(exportador.iter_invoices())
+    list(exportador.iter_invoices())
+    assert len(tentativas) == 1
+
+
+def test_arquivo_que_quebra_no_meio_nao_repete_linhas(tmp_path, monkeypatch):
+    exportador = _exportador(tmp_path, keep_files=True)
+    arquivo = tmp_path / "grid.csv"
+    arquivo.write_text("Chave;Status\n3525;Rejeitado\n", encoding="utf-8")
+    monkeypatch.setattr(exportador, "baixar", lambda: str(arquivo))
+
+    def quebra(linhas):
+        yield {"col_3": "3525"}
+        raise ValueError("linha truncada")
+
+    monkeypatch.setattr("scrapers.grid_export.linhas_para_notas", quebra)
+    entregues = []
+    with pytest.raises(ValueError):
+        for nota in exportador.iter_invoices():
+            entregues.append(nota)
+    assert entregues == [{"col_3": "3525"}]
+
+
+def test_cabecalho_sem_status_usa_as_paginas(tmp_path, monkeypatch):
+    exportador = _exportador(tmp_path, keep_files=True)
+    arquivo = tmp_path / "grid.csv"
+    arquivo.write_text("Chave;Filial\n3525;Matriz\n", encoding="utf-8")
+    monkeypatch.setattr(exportador, "baixar", lambda: str(arquivo))
+    assert list(exportador.iter_invoices()) == PAGINAS
+
+
+def test_cabecalho_reconhecido_vira_col_n(tmp_path, monkeypatch):
+    exportador = _exportador(tmp_path, keep_files=True)
+    arquivo = tmp_path / "grid.csv"
+    arquivo.write_text("Chave;Situação\n3525;Rejeitado\n", encoding="utf-8")
+    monkeypatch.setattr(exportador, "baixar", lambda: str(arquivo))
+    notas = list(exportador.iter_invoices())
+    assert len(notas) == 1
+    assert notas[0]["col_3"] == "3525" and notas[0]["col_7"] == "Rejeitado"
@@ -0,0 +1,78 @@
+from scrapers.data_scraper import dados_da_linha
+from scrapers.grid_html import parse_grid
+
+CHAVE_0 = f"3525{0:040d}"
+
+
+def pagina_grid(linhas: int) -> str:
+    """Página inteira no formato do eFormseMonitor: filtros numa tabela antes do grid, pager depois"""
+    corpo = []
+    for i in range(linhas):
+        rejeitada = i % 3 == 0
+        status = ("Rejeitado <a href='#'>Clique aqui</a> para ver o motivo" if rejeitada else "Autorizado o uso da NF-e")
+        estilo = " style='color: rgb(255, 0, 0);'" if rejeitada else ""
+        corpo.append(f"<tr{estilo}><td><input type='checkbox' name='checkedRecords' value='{9000 + i}'></td>"
+                     f"<td>{i}</td><td>{100000 + i}</td><td>3525{i:040d}</td><td></td><td>NF-e</td>"
+                     f"<td>01/01/2025 10:00:{i % 60:02d}</td><td>{status}</td>"
+                     + "<td><img src='#'></td>" * 5 +
+                     f"<td>R$ 1.234,56</td><td style='display:none'>x</td>"
+                     f"<td>01/01/2025</td><td>{i}</td><td>Empresa&nbsp;{i} &amp; Cia</td><td></td>"
+                     f"<td class='t-last'>Rejeicao: Data de Emissao<br>muito atrasada</td></tr>")
+    return ("<html><body><form><table><tbody><tr><td>Status</td><td><input name='StatusId-input'></td></tr>"
+            "</tbody></table></form><div class='t-grid'><div class='t-grid-header'><table><thead><tr><th>Cód</th>"
+            "</tr></thead></table></div><div class='t-grid-content'><table><tbody>"
+            + "".join(corpo) + "</tbody></table></div><div class='t-grid-pager'><table><tbody><tr><td>1</td>"
+            "</tr></tbody></table></div></div></body></html>")
+
+
+def test_linha_rejeitada_da_pagina_sintetica():
+    linhas = parse_grid(pagina_grid(3))
+
+    assert [linha.posicao for linha in linhas] == [0, 1, 2]
+    linha = linhas[0]
+    dados = dados_da_linha(linha.celulas, linha.estilo, linha.checkbox, linha.observacao)
+
+    assert dados == {
+        'checkbox': '',
+        'codigo': '0',
+        'numero_documento': '100000',
+        'chave_acesso': CHAVE_0,
+        'chave_consulta': '',
+        'tipo_documento': 'NF-e',
+        'data_processamento': '01/01/2025 10:00:00',
+        'status': 'Rejeitado Clique aqui para ver o motivo',
+        'icone1': '', 'icone2': '', 'icone3': '', 'icone4': '', 'icone5': '',
+        'valor_total': 'R$ 1.234,56',
+        'valor_oculto': 'x',  # td com display:none: o innerText dela é o próprio texto
+        'data_emissao': '01/01/2025',
+        'id_interno': '0',
+        'nome_empresa': 'Empresa\xa00 & Cia',  # &nbsp; vira U+00A0, como no innerText
+        'oculto': '',
+        'observacao': 'Rejeicao: Data de Emissao\nmuito atrasada',  # <br> quebra a linha
+        'status_limpo': 'Rejeitado',
+        'observacao_completa': 'Rejeicao: Data de Emissao\nmuito atrasada',
+        'cor_status': 'VERMELHO-REJEITADO',
+        'checkbox_value': '9000',
+    }
+
+
+def test_linha_autorizada_sem_cor():
+    linha = parse_grid(pagina_grid(3))[1]
+    dados = dados_da_linha(linha.celulas, linha.estilo, linha.checkbox, linha.observacao)
+
+    assert dados['status_limpo'] == 'Autorizado o uso da NF-e'
+    assert 'cor_status' not in dados
+
+
+def test_tabela_aninhada_nao_conta_como_linha():
+    html = ("<div class='t-grid-content'><table><tbody>"
+            "<tr><td>a</td><td><table><tbody><tr><td>x</td></tr><tr><td>y</td></tr></tbody></table></td></tr>"
+            "<tr><td>b</td><td>c</td></tr></tbody></table></div>")
+    linhas = parse_grid(html)
+
+    assert [(linha.posicao, linha.celulas) for linha in linhas] == [(0, ['a', 'x\ny']), (1, ['b', 'c'])]
+
+
+def test_tabelas_fora_do_grid_sao_ignoradas():
+    assert [linha.celulas[1] for linha in parse_grid(pagina_grid(2))] == ['0', '1']
+    assert parse_grid("<table><tbody><tr><td>menu</td></tr></tbody></table>") == []
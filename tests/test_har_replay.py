@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+from urllib.parse import quote, quote_plus
+
+import pytest
+
+from utils.har_replay import SENHA_REPLAY, USUARIO_REPLAY, higienizar_har, proximo_arquivo, segredos
+
+SENHA = "Se nh@*2024!"
+USUARIO = "fiscal@empresa.com.br"
+
+
+def _credenciais():
+    return SimpleNamespace(email=None, password=None, monitor_user=USUARIO,
+                           monitor_password=SENHA, monitor_accounts=[])
+
+
+def _codificar_como_navegador(valor: str) -> str:
+    """application/x-www-form-urlencoded do Chromium: '*' fica cru, espaço vira '+'"""
+    return quote_plus(valor, safe="*-._")
+
+
+def _gravar(tmp_path, corpo: str, url: str = "https://unisys.exemplo/Account/Login"):
+    caminho = tmp_path / "unisys.har"
+    har = {"log": {"entries": [{
+        "request": {"method": "POST", "url": url, "headers": [], "cookies": [], "queryString": [],
+                    "postData": {"mimeType": "application/x-www-form-urlencoded", "text": corpo}},
+        "response": {"status": 302, "headers": [], "cookies": [], "content": {"text": ""},
+                     "redirectURL": ""},
+    }]}}
+    caminho.write_text(json.dumps(har), encoding="utf-8")
+    return caminho
+
+
+@pytest.mark.parametrize("codificar", [_codificar_como_navegador, quote_plus, lambda v: quote(v, safe="")])
+def test_senha_some_do_formulario(tmp_path, codificar):
+    corpo = f"UserName={codificar(USUARIO)}&pass={codificar(SENHA)}&RememberMe=false"
+    caminho = _gravar(tmp_path, corpo)
+
+    assert higienizar_har(str(caminho), segredos(_credenciais())) == 1
+
+    texto = caminho.read_text(encoding="utf-8")
+    for segredo in (SENHA, USUARIO, "2024", "Se+nh", "Se%20nh"):
+        assert segredo not in texto
+    enviado = json.loads(texto)["log"]["entries"][0]["request"]["postData"]["text"]
+    assert enviado == f"UserName={USUARIO_REPLAY}&pass={SENHA_REPLAY}&RememberMe=false"
+
+
+def test_senha_some_da_query(tmp_path):
+    url = f"https://unisys.exemplo/Login?user={_codificar_como_navegador(USUARIO)}&pass={_codificar_como_navegador(SENHA)}"
+    caminho = _gravar(tmp_path, "", url=url)
+
+    higienizar_har(str(caminho), segredos(_credenciais()))
+
+    requisicao = json.loads(caminho.read_text(encoding="utf-8"))["log"]["entries"][0]["request"]
+    assert requisicao["url"] == f"https://unisys.exemplo/Login?user={USUARIO_REPLAY}&pass={SENHA_REPLAY}"
+
+
+def test_gravacao_nova_apaga_hars_antigos(tmp_path, monkeypatch):
+    base = tmp_path / "unisys.har"
+    for nome in ("unisys.har", "unisys-2.har", "unisys-7.har"):
+        (tmp_path / nome).write_text("{}", encoding="utf-8")
+    monkeypatch.setattr("utils.har_replay._contador", 0)
+
+    assert proximo_arquivo(str(base)) == str(base)
+    assert not list(tmp_path.glob("unisys*.har"))
+    assert proximo_arquivo(str(base)) == str(tmp_path / "unisys-2.har")
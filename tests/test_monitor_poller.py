@@ -0,0 +1,72 @@
+from scrapers.monitor_poller import WatermarkStore, chave_linha
+
+
+def _linha(numero: str, data: str):
+    return {'codigo': '1', 'numero_documento': numero, 'chave_acesso': f'3525{numero}',
+            'id_interno': numero, 'data_processamento': data, 'status': 'Rejeitado'}
+
+
+def test_falha_segura_a_marca_dagua_e_volta_na_consulta(tmp_path):
+    estado = WatermarkStore(str(tmp_path / "monitor.json"))
+    falhou = _linha('100', '01/03/2025 08:00:00')
+    ok = _linha('200', '03/03/2025 17:30:00')
+
+    estado.avancar([ok], [falhou])
+    estado.salvar()
+
+    recarregado = WatermarkStore(str(tmp_path / "monitor.json"))
+    assert recarregado.watermark.isoformat() == '2025-03-01T08:00:00'
+    assert chave_linha(falhou) in recarregado.pendentes
+    assert chave_linha(falhou) not in recarregado.vistos
+    assert chave_linha(ok) in recarregado.vistos
+
+
+def test_pendente_tratada_libera_a_marca_dagua(tmp_path):
+    estado = WatermarkStore(str(tmp_path / "monitor.json"))
+    falhou = _linha('100', '01/03/2025 08:00:00')
+    estado.avancar([_linha('200', '03/03/2025 17:30:00')], [falhou])
+
+    estado.avancar([falhou])
+
+    assert not estado.pendentes
+    assert estado.watermark.isoformat() == '2025-03-03T17:30:00'
+
+
+def test_pendente_que_sumiu_da_consulta_e_esquecida(tmp_path):
+    estado = WatermarkStore(str(tmp_path / "monitor.json"))
+    falhou = _linha('100', '01/03/2025 08:00:00')
+    estado.avancar([], [falhou])
+
+    assert estado.esquecer_pendentes({chave_linha(_linha('300', '02/03/2025 09:00:00'))}) == 1
+    assert not estado.pendentes
+
+
+def test_falha_espera_antes_de_voltar(tmp_path):
+    estado = WatermarkStore(str(tmp_path / "monitor.json"), espera_s=600)
+    falhou = _linha('100', '01/03/2025 08:00:00')
+    estado.avancar([], [falhou])
+
+    assert estado.aguardando(chave_linha(falhou))
+    assert estado.pendentes[chave_linha(falhou)]['tentativas'] == 1
+
+
+def test_falhas_seguidas_desistem_e_liberam_a_marca_dagua(tmp_path):
+    estado = WatermarkStore(str(tmp_path / "monitor.json"), max_tentativas=2, espera_s=0)
+    falhou = _linha('100', '01/03/2025 08:00:00')
+    estado.avancar([_linha('200', '03/03/2025 17:30:00')], [falhou])
+    assert estado.watermark.isoformat() == '2025-03-01T08:00:00'
+
+    assert estado.avancar([], [falhou]) == [falhou]
+
+    assert not estado.pendentes
+    # Abaixo da marca d'água: a consulta seguinte não traz mais a linha
+    assert estado.watermark.isoformat() == '2025-03-03T17:30:00'
+
+
+def test_pendentes_do_formato_anterior_sao_lidas(tmp_path):
+    caminho = tmp_path / "monitor.json"
+    caminho.write_text('{"watermark": null, "vistos": {}, "pendentes": {"x": "2025-03-01T08:00:00"}}',
+                       encoding="utf-8")
+    estado = WatermarkStore(str(caminho))
+    assert estado.pendentes["x"]["data"] == "2025-03-01T08:00:00"
+    assert not estado.aguardando("x")
@@ -0,0 +1,16 @@
+from config.settings import ProxyConfig, ProxyPoolConfig
+from utils.proxy_pool import ProxyPool
+
+
+def test_desfazer_troca_devolve_a_sessao_e_conta_a_falha():
+    antigo, novo = ProxyConfig("10.0.0.1", 80), ProxyConfig("10.0.0.2", 80)
+    pool = ProxyPool([antigo, novo], ProxyPoolConfig())
+    assert pool.atribuir() is antigo
+    pool._estado(antigo).latencias.append(30.0)  # degradado: a sessão vai para o outro
+    assert pool.atribuir(anterior=antigo) is novo
+
+    pool.desfazer_troca(novo, antigo)
+
+    sessoes = {m["proxy"]: m["sessoes"] for m in pool.metricas()}
+    assert sessoes == {"http://10.0.0.1:80": 1, "http://10.0.0.2:80": 0}
+    assert pool._estado(novo).resultados[-1] is False
@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from config.settings import RateConfig
+from utils.rate_control import RateController
+
+
+def _controlador():
+    return RateController(RateConfig(taxa_inicial=100.0, taxa_max=100.0, concorrencia_inicial=2,
+                                     latencia_alvo_s=0.05, intervalo_reducao_s=0.0))
+
+
+def test_falha_logica_nao_reduz_os_limites():
+    controlador = _controlador()
+    with controlador.acao('pesquisa') as acao:
+        acao.falhou("pesquisa não concluída")
+    assert controlador.limite == 2.0
+    assert controlador.metricas()['falhas'] == 1
+
+
+@pytest.mark.parametrize("erro, contador", [
+    (TimeoutError("Timeout 30000ms exceeded"), 'timeouts'),
+    (RuntimeError("page.goto: net::ERR_CONNECTION_RESET"), 'erros'),
+])
+def test_timeout_e_erro_de_rede_reduzem_os_limites(erro, contador):
+    controlador = _controlador()
+    with pytest.raises(type(erro)):
+        with controlador.acao('pesquisa'):
+            raise erro
+    assert controlador.limite == 1.0
+    assert controlador.metricas()[contador] == 1
+
+
+def test_acao_de_lote_usa_o_proprio_alvo():
+    controlador = _controlador()
+    with controlador.acao('reprocesso_lote', alvo_s=300.0):
+        time.sleep(0.1)  # acima do alvo de uma ação só (0,05s)
+    assert controlador.metricas()['lentas'] == 0
+    assert controlador.metricas()['reducoes'] == 0
@@ -0,0 +1,57 @@
+import csv
+import logging
+
+from config.settings import RejectionConfig
+from utils.rejection_policy import AcaoRejeicao, RejectionPolicy
+
+ATRASADA = "Rejeicao: Data de Emissao muito atrasada"
+NOTA = {"chave": "35250000000000000000000000000000000000000001", "fiscal_doc_no": "123", "location_id": "10"}
+
+
+def _politica(tmp_path, **campos):
+    config = RejectionConfig(aprender=False, fila_path=str(tmp_path / "fila_humana.csv"), **campos)
+    return RejectionPolicy(config, taxas={"EMISSAO_ATRASADA": (50, 0.0)})
+
+
+def _fila(tmp_path):
+    with open(tmp_path / "fila_humana.csv", newline='', encoding='utf-8-sig') as arquivo:
+        return list(csv.DictReader(arquivo))
+
+
+def test_acao_futil_desconhecida_cai_na_fila(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING):
+        politica = _politica(tmp_path, acao_futil="ignorar")
+    assert politica.acao_para("EMISSAO_ATRASADA") is AcaoRejeicao.FILA_HUMANA
+    assert "ignorar" in caplog.text
+
+
+def test_mesma_rejeicao_entra_uma_vez_na_fila_entre_execucoes(tmp_path):
+    for _ in range(2):
+        politica = _politica(tmp_path)
+        assert politica.decidir(NOTA, ATRASADA, "1|123|3525|9|01/03/2025 08:00:00")[1] is AcaoRejeicao.FILA_HUMANA
+        politica.decidir(NOTA, ATRASADA, "1|123|3525|9|01/03/2025 08:00:00")
+    politica.decidir(NOTA, ATRASADA, "1|123|3525|9|02/03/2025 08:00:00")
+
+    assert [registro['linha'] for registro in _fila(tmp_path)] == [
+        "1|123|3525|9|01/03/2025 08:00:00", "1|123|3525|9|02/03/2025 08:00:00"]
+
+
+def test_fila_do_formato_anterior_ganha_a_coluna_linha(tmp_path):
+    with open(tmp_path / "fila_humana.csv", 'w', newline='', encoding='utf-8-sig') as arquivo:
+        writer = csv.writer(arquivo)
+        writer.writerow(['data', 'chave', 'fiscal_doc_no', 'location_id', 'codigo', 'observacao'])
+        writer.writerow(['01/03/2025 08:00:00', NOTA['chave'], '123', '10', 'EMISSAO_ATRASADA', ATRASADA])
+
+    _politica(tmp_path).decidir(NOTA, ATRASADA, "1|123|3525|9|01/03/2025 08:00:00")
+
+    registros = _fila(tmp_path)
+    assert len(registros) == 2
+    assert registros[0]['linha'] == '' and registros[1]['linha'] == "1|123|3525|9|01/03/2025 08:00:00"
+
+
+def test_enfileirar_reprocesso_que_nao_pega(tmp_path):
+    politica = _politica(tmp_path)
+    politica.enfileirar(NOTA, "OUTRO", "Rejeicao: Duplicidade", "1|123|3525|9|01/03/2025 08:00:00")
+
+    assert [registro['codigo'] for registro in _fila(tmp_path)] == ["OUTRO"]
+    assert politica.contagem[AcaoRejeicao.FILA_HUMANA] == 1
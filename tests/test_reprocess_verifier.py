@@ -0,0 +1,89 @@
+import time
+from types import SimpleNamespace
+
+from config.settings import VerifyConfig
+from models.entities import NoteResult
+from scrapers.reprocess_verifier import STATUS_CONFIRMADO, STATUS_NAO_VERIFICADO, ReprocessVerifier
+
+
+def _reprocessado():
+    linha = {'numero_documento': '000019412', 'codigo': '1', 'data_processamento': '01/03/2025 08:00:00'}
+    return NoteResult({'chave': '3525', 'fiscal_doc_no': '19412'}, "✅ REPROCESSADO COM SUCESSO", linha, True)
+
+
+def test_finalizar_nao_espera_alem_do_limite():
+    verificador = ReprocessVerifier(None, SimpleNamespace(page=None), VerifyConfig(delays=[600], espera_final_s=0.1))
+    resultado = _reprocessado()
+    verificador.registrar(resultado)
+
+    inicio = time.monotonic()
+    verificador.finalizar()
+
+    assert time.monotonic() - inicio < 1
+    assert resultado.status_confirmado == STATUS_NAO_VERIFICADO
+    assert not verificador.pendentes
+
+
+class _Auth:
+    def navigate_to_search_screen(self):
+        pass
+
+    def fill_search_form(self, data, chave):
+        return True
+
+
+class _Grid:
+    page = None
+
+    def __init__(self, linhas, vazio=False):
+        self.linhas = linhas
+        self.vazio = vazio
+
+    def iter_invoices(self):
+        yield from self.linhas
+
+    def grid_sem_registros(self):
+        return self.vazio
+
+
+def _verificar(grid):
+    verificador = ReprocessVerifier(_Auth(), grid, VerifyConfig(delays=[0, 600]))
+    resultado = _reprocessado()
+    verificador.registrar(resultado)
+    verificador.verificar_vencidos()
+    return verificador, resultado
+
+
+def test_consulta_que_nao_leu_o_grid_nao_confirma():
+    verificador, resultado = _verificar(_Grid([{"col_0": "Nenhum registro"}]))
+    assert resultado.status_confirmado != STATUS_CONFIRMADO
+    assert len(verificador.pendentes) == 1
+
+
+def test_grid_vazio_explicito_confirma():
+    verificador, resultado = _verificar(_Grid([], vazio=True))
+    assert resultado.status_confirmado == STATUS_CONFIRMADO
+    assert not verificador.pendentes
+
+
+def test_outras_notas_rejeitadas_provam_a_leitura():
+    outra = {"col_2": "000055555", "col_1": "1", "col_7": "Rejeitado"}
+    verificador, resultado = _verificar(_Grid([outra]))
+    assert resultado.status_confirmado == STATUS_CONFIRMADO
+
+
+def test_consulta_passa_pelo_limitador():
+    from contextlib import contextmanager
+
+    acoes = []
+
+    @contextmanager
+    def acao_limitada(nome, lote=False):
+        acoes.append((nome, lote))
+        yield
+
+    verificador = ReprocessVerifier(_Auth(), _Grid([], vazio=True), VerifyConfig(delays=[0]),
+                                    acao_limitada=acao_limitada)
+    verificador.registrar(_reprocessado())
+    verificador.verificar_vencidos()
+    assert acoes == [("verificacao", True)]
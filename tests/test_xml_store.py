@@ -0,0 +1,28 @@
+import os
+
+from utils.xml_store import XmlStore
+
+CHAVE = "35250000000000000000000000000000000000000001"
+
+
+def _objetos(store):
+    return [arquivo for _, _, arquivos in os.walk(store.objetos) for arquivo in arquivos]
+
+
+def test_chave_regravada_apaga_o_objeto_antigo(tmp_path):
+    store = XmlStore(str(tmp_path))
+    store.guardar(CHAVE, b"<nfeProc>v1</nfeProc>")
+    store.guardar(CHAVE, b"<nfeProc>v2</nfeProc>")
+
+    assert len(_objetos(store)) == 1
+    assert store.ler(CHAVE) == b"<nfeProc>v2</nfeProc>"
+
+
+def test_objeto_antigo_ainda_usado_por_outra_chave_fica(tmp_path):
+    store = XmlStore(str(tmp_path))
+    store.guardar(CHAVE, b"<nfeProc>v1</nfeProc>")
+    store.guardar("outra", b"<nfeProc>v1</nfeProc>")
+    store.guardar(CHAVE, b"<nfeProc>v2</nfeProc>")
+
+    assert len(_objetos(store)) == 2
+    assert store.ler("outra") == b"<nfeProc>v1</nfeProc>"
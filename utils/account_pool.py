@@ -0,0 +1,138 @@
+import time
+import logging
+import threading
+from dataclasses import replace
+from typing import Dict, List, Optional
+
+from config.settings import MonitorAccount
+from utils.rate_control import RateController
+
+logger = logging.getLogger(__name__)
+
+
+class SemContaDisponivel(RuntimeError):
+    """Todas as contas do monitor estão ocupadas (sessoes_por_conta) ou foram recusadas"""
+
+
+class ContaRecusada(RuntimeError):
+    """O login da conta no monitor não passou: recusada sai do pool, em espera volta depois de espera_s"""
+
+
+class ContaMonitor:
+    """Uma conta de serviço do monitor: sessões abertas, notas atendidas e limitador próprio"""
+
+    def __init__(self, conta, limitador: RateController):
+        self.usuario = conta.user
+        self.senha = conta.password
+        self.limitador = limitador
+        self.ativa = True
+        self.em_espera_ate = 0.0  # time.monotonic() até o qual a conta não é atribuída
+        self.esperas = 0  # esperas seguidas sem nenhuma nota ok
+        self.sessoes = 0
+        self.notas = 0
+        self.notas_erro = 0
+
+
+class AccountPool:
+    """Contas do monitor repartidas entre os contextos do navegador
+
+    Cada contexto faz login com a própria conta (no máximo config.sessoes_por_conta
+    por conta) e as ações dele passam também pelo limitador da conta, além do global.
+    Conta recusada explicitamente pelo monitor é desativada e não volta a ser atribuída;
+    login que só não passou da tela deixa a conta em espera por config.espera_s.
+    """
+
+    def __init__(self, contas: List, config, rate_config):
+        self.config = config
+        taxa_conta = replace(rate_config, taxa_inicial=config.taxa_inicial, taxa_max=config.taxa_max,
+                             concorrencia_inicial=1, concorrencia_max=config.sessoes_por_conta)
+        self.contas = [ContaMonitor(conta, RateController(taxa_conta)) for conta in contas]
+        self._lock = threading.Lock()
+
+    @property
+    def capacidade(self) -> int:
+        """Sessões simultâneas que as contas ativas comportam"""
+        return sum(conta.ativa for conta in self.contas) * self.config.sessoes_por_conta
+
+    def atribuir(self) -> ContaMonitor:
+        """Conta livre com menos sessões; se as livres estão todas em espera, aguarda a primeira voltar"""
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                livres = [c for c in self.contas if c.ativa and c.sessoes < self.config.sessoes_por_conta]
+                if not livres:
+                    raise SemContaDisponivel(f"nenhuma conta do monitor livre ({self.capacidade} sessão(ões) no total)")
+                prontas = [c for c in livres if c.em_espera_ate <= agora]
+                if prontas:
+                    conta = min(prontas, key=lambda c: (c.sessoes, c.notas))
+                    conta.sessoes += 1
+                    return conta
+                espera = min(c.em_espera_ate for c in livres) - agora
+            logger.info("⏳ Contas do monitor em espera, próxima livre em %.0fs", espera)
+            time.sleep(espera)
+
+    def liberar(self, conta: ContaMonitor):
+        with self._lock:
+            conta.sessoes = max(0, conta.sessoes - 1)
+
+    def recusar(self, conta: ContaMonitor, liberar: bool = True):
+        with self._lock:
+            conta.ativa = False
+            if liberar:
+                conta.sessoes = max(0, conta.sessoes - 1)
+            restantes = sum(c.ativa for c in self.contas)
+        logger.error("🔐 Conta %s recusada pelo monitor, removida do pool (%s ativa(s))", conta.usuario, restantes)
+
+    def esperar(self, conta: ContaMonitor):
+        """Login que não passou da tela sem recusa explícita: a conta descansa em vez de sair do pool"""
+        with self._lock:
+            conta.esperas += 1
+            conta.sessoes = max(0, conta.sessoes - 1)
+            if conta.esperas < self.config.max_esperas:
+                conta.em_espera_ate = time.monotonic() + self.config.espera_s
+                logger.warning("⏳ Login da conta %s não passou da tela, em espera por %.0fs (%s/%s)",
+                               conta.usuario, self.config.espera_s, conta.esperas, self.config.max_esperas)
+                return
+        self.recusar(conta, liberar=False)
+
+    def registrar_nota(self, conta: ContaMonitor, ok: bool):
+        with self._lock:
+            conta.notas += 1
+            conta.notas_erro += not ok
+            if ok:
+                conta.esperas = 0
+
+    def metricas(self) -> List[Dict]:
+        with self._lock:
+            return [{
+                "usuario": conta.usuario,
+                "ativa": conta.ativa,
+                "em_espera": conta.em_espera_ate > time.monotonic(),
+                "sessoes": conta.sessoes,
+                "notas": conta.notas,
+                "notas_erro": conta.notas_erro,
+                "taxa_por_s": conta.limitador.metricas()["taxa_por_s"],
+            } for conta in self.contas]
+
+    def resumo(self) -> str:
+        linhas = []
+        for m in self.metricas():
+            marca = ("⏳" if m['em_espera'] else "✅") if m['ativa'] else "🚫"
+            linhas.append(f"   {marca} {m['usuario']}: {m['notas']} nota(s), {m['notas_erro']} erro(s), "
+                          f"{m['taxa_por_s']}/s")
+        return "\n".join(linhas)
+
+
+_compartilhado: Optional[AccountPool] = None
+_compartilhado_lock = threading.Lock()
+
+
+def contas_compartilhadas(config) -> AccountPool:
+    """O mesmo pool de contas para todas as sessões do processo"""
+    global _compartilhado
+    with _compartilhado_lock:
+        if _compartilhado is None:
+            credenciais = config.credentials
+            contas = credenciais.monitor_accounts or [MonitorAccount(credenciais.monitor_user, credenciais.monitor_password)]
+            _compartilhado = AccountPool(contas, config.accounts, config.rate)
+        return _compartilhado
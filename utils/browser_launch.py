@@ -0,0 +1,53 @@
+import os
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_PADRAO = os.path.join("state", "chromium-cache")
+
+# Perfis de lançamento do Chromium (BROWSER_PROFILE no .env)
+PERFIS: Dict[str, List[str]] = {
+    # Como o Playwright lança por padrão
+    "padrao": [],
+    # Execução desassistida: sem GPU, extensões, tráfego de fundo, atualização de componentes
+    # nem decodificação de imagens (o eFormseMonitor é só texto e grid)
+    "enxuto": [
+        "--disable-gpu",
+        "--disable-extensions",
+        "--disable-component-extensions-with-background-pages",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-default-apps",
+        "--disable-sync",
+        "--no-first-run",
+        "--mute-audio",
+        "--blink-settings=imagesEnabled=false",
+    ],
+}
+
+# Perfis que reaproveitam o cache de disco entre execuções
+_COM_CACHE = {"enxuto"}
+
+
+def argumentos(perfil: str, cache_dir: Optional[str] = CACHE_PADRAO) -> List[str]:
+    """Argumentos do Chromium para o perfil; cada thread tem a própria pasta de cache (sessao-1, sessao-2...)"""
+    if perfil not in PERFIS:
+        logger.warning("⚠️  Perfil de navegador '%s' desconhecido, usando 'padrao' (opções: %s)",
+                       perfil, ", ".join(PERFIS))
+        perfil = "padrao"
+    args = list(PERFIS[perfil])
+    if perfil in _COM_CACHE and cache_dir:
+        # Duas instâncias do Chromium não podem dividir o mesmo cache de disco
+        pasta = os.path.abspath(os.path.join(cache_dir, threading.current_thread().name))
+        os.makedirs(pasta, exist_ok=True)
+        args.append(f"--disk-cache-dir={pasta}")
+    return args
+
+
+def lancar_chromium(playwright, perfil: Optional[str] = None, headless: bool = True, slow_mo: int = 0,
+                    cache_dir: Optional[str] = CACHE_PADRAO):
+    """chromium.launch com o perfil escolhido (padrão: BROWSER_PROFILE do ambiente, ou 'padrao')"""
+    perfil = perfil or os.getenv('BROWSER_PROFILE', 'padrao')
+    return playwright.chromium.launch(headless=headless, slow_mo=slow_mo, args=argumentos(perfil, cache_dir))
@@ -0,0 +1,88 @@
+import math
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PrazoEsgotado(TimeoutError):
+    """O orçamento de tempo de uma fase (ou o que restava da nota) acabou"""
+
+    def __init__(self, fase: str, orcamento_s: float):
+        super().__init__(f"prazo de {orcamento_s:.0f}s esgotado na fase {fase}")
+        self.fase = fase
+        self.orcamento_s = orcamento_s
+
+
+class Prazo:
+    """Instante limite de uma fase; timeout_ms() dá a cada espera do Playwright só o que sobrou"""
+
+    def __init__(self, fase: str, segundos: float):
+        self.fase = fase
+        self.segundos = segundos
+        self.fim = time.monotonic() + segundos
+
+    def restante(self) -> float:
+        return self.fim - time.monotonic()
+
+    def conferir(self):
+        """PrazoEsgotado se a fase já passou do limite (ex.: espera encurtada pelo prazo que estourou)"""
+        if self.restante() <= 0:
+            raise PrazoEsgotado(self.fase, self.segundos)
+
+    def timeout_ms(self, teto_ms: float) -> int:
+        self.conferir()
+        # Arredonda para cima: a espera encurtada só estoura depois do fim, e conferir() reconhece
+        return max(1, math.ceil(min(teto_ms, self.restante() * 1000)))
+
+
+@contextmanager
+def limitar(alvo, prazo: Optional[Prazo]):
+    """Coloca `prazo` em alvo.prazo (ex.: AuthManager) durante o bloco e restaura o anterior"""
+    anterior = alvo.prazo
+    alvo.prazo = prazo
+    try:
+        yield prazo
+    finally:
+        alvo.prazo = anterior
+
+
+class OrcamentoNota:
+    """Orçamento total de uma nota, repartido entre as fases (config.<fase>_s)
+
+    Cada fase recebe o menor entre o seu orçamento e o que ainda resta da nota.
+    Fases que estouram (PrazoEsgotado ou duração acima do orçamento) ficam em `estouros`.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.fim = time.monotonic() + config.nota_s
+        self.estouros: Dict[str, float] = {}
+
+    def restante(self) -> float:
+        return self.fim - time.monotonic()
+
+    @contextmanager
+    def fase(self, nome: str, alvo):
+        if not self.config.enabled:
+            yield None
+            return
+        orcamento = getattr(self.config, f"{nome}_s")
+        segundos = min(orcamento, self.restante())
+        if segundos <= 0:
+            self.estouros[nome] = 0.0
+            raise PrazoEsgotado(nome, self.config.nota_s)
+        inicio = time.monotonic()
+        try:
+            with limitar(alvo, Prazo(nome, segundos)) as prazo:
+                yield prazo
+        except PrazoEsgotado:
+            self.estouros[nome] = round(time.monotonic() - inicio, 3)
+            raise
+        decorrido = time.monotonic() - inicio
+        if decorrido > orcamento:
+            # Esperas fixas (time.sleep) não são interrompidas: a fase termina, mas conta como estouro
+            self.estouros[nome] = round(decorrido, 3)
+            logger.warning("⏱️  Fase %s levou %.1fs (orçamento %.0fs)", nome, decorrido, orcamento)
@@ -0,0 +1,264 @@
+import os
+import json
+import base64
+import logging
+import threading
+from collections import deque
+from dataclasses import replace
+from pathlib import Path
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote, quote_plus, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+HAR_PADRAO = os.path.join("state", "har", "unisys.har")
+
+# Credenciais usadas no replay; a gravação troca as reais por estas antes de salvar o HAR
+EMAIL_REPLAY = "usuario@replay.local"
+SENHA_REPLAY = "replay"
+USUARIO_REPLAY = "replay"
+
+# Campos de formulário/query que mudam de uma execução para outra e não entram na comparação
+IGNORAR_PADRAO = ("_", "StartDate", "EndDate", "__RequestVerificationToken")
+
+# Cabeçalhos com sessão ou autenticação; o valor some do HAR gravado
+_CABECALHOS_SENSIVEIS = {"authorization", "proxy-authorization"}
+# O corpo do HAR já está decodificado e com tamanho próprio
+_CABECALHOS_DESCARTADOS = {"content-encoding", "content-length", "transfer-encoding"}
+
+_contador = 0
+_contador_lock = threading.Lock()
+
+
+def proximo_arquivo(base: str) -> str:
+    """Arquivo para o próximo contexto gravado: unisys.har, unisys-2.har, unisys-3.har...
+
+    O primeiro do processo apaga a gravação anterior com o mesmo nome base.
+    """
+    global _contador
+    caminho = Path(base)
+    with _contador_lock:
+        _contador += 1
+        n = _contador
+        if n == 1:
+            # Gravação nova: sobras de uma gravação anterior (unisys-7.har...) não podem entrar no replay
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            for antigo in arquivos_gravados(base):
+                os.remove(antigo)
+    return str(caminho if n == 1 else caminho.with_name(f"{caminho.stem}-{n}{caminho.suffix}"))
+
+
+def arquivos_gravados(base: str) -> List[str]:
+    """Todos os HARs de uma gravação, na ordem em que os contextos foram abertos"""
+    caminho = Path(base)
+    partes = [p for p in caminho.parent.glob(f"{caminho.stem}-*{caminho.suffix}")
+              if p.stem.rsplit("-", 1)[-1].isdigit()]
+    partes.sort(key=lambda p: int(p.stem.rsplit("-", 1)[-1]))
+    return [str(p) for p in [caminho] + partes if p.exists()]
+
+
+def segredos(credenciais) -> Dict[str, str]:
+    """Credencial real -> substituto do replay (e-mail, senhas e usuários do monitor)"""
+    trocas = {}
+    for valor, substituto in [(credenciais.email, EMAIL_REPLAY), (credenciais.password, SENHA_REPLAY),
+                              (credenciais.monitor_user, USUARIO_REPLAY),
+                              (credenciais.monitor_password, SENHA_REPLAY)]:
+        if valor:
+            trocas[valor] = substituto
+    for conta in credenciais.monitor_accounts or []:
+        if conta.user:
+            trocas[conta.user] = USUARIO_REPLAY
+        if conta.password:
+            trocas[conta.password] = SENHA_REPLAY
+    return trocas
+
+
+def credenciais_replay(credenciais):
+    """As credenciais com que o HAR higienizado foi gravado (para o login do replay casar)"""
+    from config.settings import MonitorAccount
+    return replace(credenciais, email=EMAIL_REPLAY, password=SENHA_REPLAY, monitor_user=USUARIO_REPLAY,
+                   monitor_password=SENHA_REPLAY, monitor_accounts=[MonitorAccount(USUARIO_REPLAY, SENHA_REPLAY)])
+
+
+def _variantes(trocas: Dict[str, str]) -> List[Tuple[str, str]]:
+    """Cada segredo cru e codificado para URL/formulário; os mais longos primeiro"""
+    pares = {}
+    for valor, substituto in trocas.items():
+        pares[valor] = substituto
+        pares[quote_plus(valor)] = quote_plus(substituto)
+        pares[quote(valor, safe="")] = quote(substituto, safe="")
+    return sorted(pares.items(), key=lambda par: len(par[0]), reverse=True)
+
+
+def _trocar(texto: Optional[str], pares: List[Tuple[str, str]]) -> Optional[str]:
+    if not texto:
+        return texto
+    for valor, substituto in pares:
+        texto = texto.replace(valor, substituto)
+    return texto
+
+
+def _e_formulario(texto: str) -> bool:
+    """Corpo/query no formato a=1&b=2 (JSON, XML e texto livre ficam de fora)"""
+    return "=" in texto and not texto.lstrip().startswith(("{", "[", "<"))
+
+
+def _trocar_formulario(texto: Optional[str], pares: List[Tuple[str, str]]) -> Optional[str]:
+    """Formulário urlencoded: troca nos valores decodificados e codifica de novo
+
+    O navegador codifica diferente do quote/quote_plus ('*' fica cru, espaço vira '+'),
+    então procurar o segredo já codificado no texto não basta.
+    """
+    if not texto or not _e_formulario(texto):
+        return _trocar(texto, pares)
+    campos = parse_qsl(texto, keep_blank_values=True)
+    return urlencode([(_trocar(nome, pares), _trocar(valor, pares)) for nome, valor in campos])
+
+
+def _trocar_url(url: Optional[str], pares: List[Tuple[str, str]]) -> Optional[str]:
+    if not url:
+        return url
+    partes = urlsplit(url)
+    return urlunsplit((partes.scheme, partes.netloc, _trocar(partes.path, pares),
+                       _trocar_formulario(partes.query, pares), _trocar(partes.fragment, pares)))
+
+
+def _mascarar_cookie(par: str) -> str:
+    nome, igual, _ = par.partition("=")
+    return f"{nome}=redacted" if igual else par
+
+
+def _mascarar_cookies(valor: str) -> str:
+    """Cookie: 'a=1; b=2' -> 'a=redacted; b=redacted'"""
+    return "; ".join(_mascarar_cookie(par.strip()) for par in valor.split(";"))
+
+
+def _mascarar_set_cookie(valor: str) -> str:
+    """Set-Cookie (uma linha por cookie): só o primeiro par é o cookie, o resto são atributos"""
+    linhas = []
+    for linha in valor.split("\n"):
+        par, separador, atributos = linha.partition(";")
+        linhas.append(_mascarar_cookie(par.strip()) + separador + atributos)
+    return "\n".join(linhas)
+
+
+def _higienizar_cabecalhos(cabecalhos: List[Dict], pares: List[Tuple[str, str]]):
+    for cabecalho in cabecalhos:
+        nome = cabecalho.get("name", "").lower()
+        if nome in _CABECALHOS_SENSIVEIS:
+            cabecalho["value"] = "redacted"
+        elif nome == "cookie":
+            cabecalho["value"] = _mascarar_cookies(cabecalho["value"])
+        elif nome == "set-cookie":
+            cabecalho["value"] = _mascarar_set_cookie(cabecalho["value"])
+        else:
+            cabecalho["value"] = _trocar(cabecalho.get("value"), pares)
+
+
+def higienizar_har(caminho: str, trocas: Dict[str, str]) -> int:
+    """Remove credenciais e cookies de sessão do HAR gravado (no próprio arquivo); devolve as entradas"""
+    pares = _variantes(trocas)
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        har = json.load(arquivo)
+    entradas = har.get("log", {}).get("entries", [])
+    for entrada in entradas:
+        requisicao, resposta = entrada.get("request", {}), entrada.get("response", {})
+        requisicao["url"] = _trocar_url(requisicao.get("url"), pares)
+        for item in requisicao.get("queryString", []):
+            item["value"] = _trocar(item.get("value"), pares)
+        corpo = requisicao.get("postData")
+        if corpo:
+            corpo["text"] = _trocar_formulario(corpo.get("text"), pares)
+            for item in corpo.get("params", []):
+                item["value"] = _trocar(item.get("value"), pares)
+        for lado in (requisicao, resposta):
+            _higienizar_cabecalhos(lado.get("headers", []), pares)
+            for cookie in lado.get("cookies", []):
+                cookie["value"] = "redacted"
+        conteudo = resposta.get("content", {})
+        if conteudo.get("text") and conteudo.get("encoding") != "base64":
+            # Páginas que repetem o usuário logado (cabeçalho do monitor, campos preenchidos)
+            conteudo["text"] = _trocar(conteudo["text"], pares)
+        resposta["redirectURL"] = _trocar_url(resposta.get("redirectURL"), pares)
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(har, arquivo, ensure_ascii=False)
+    os.replace(temporario, caminho)
+    return len(entradas)
+
+
+def _sem_campos(pares: Iterable[Tuple[str, str]], ignorar: frozenset) -> str:
+    return urlencode(sorted((k, v) for k, v in pares if k not in ignorar))
+
+
+class HarReplay:
+    """Responde as requisições do contexto a partir de HARs gravados, sem rede
+
+    A comparação é por método, URL e corpo, tirando os campos de `ignorar` (datas da
+    pesquisa, cache-busting). Requisições idênticas recebem as respostas na ordem em
+    que foram gravadas (o mesmo grid antes e depois do reprocesso); esgotadas, a
+    última se repete. Sem correspondência (outra chave de nota, página não visitada)
+    a requisição é abortada e contada em `faltando`.
+    """
+
+    def __init__(self, arquivos: List[str], ignorar: Iterable[str] = IGNORAR_PADRAO):
+        self.ignorar = frozenset(ignorar)
+        self._gravadas: Dict[Tuple, Deque[Dict]] = {}
+        self._ultimas: Dict[Tuple, Dict] = {}
+        self.atendidas = 0
+        self.faltando: List[str] = []
+        for caminho in arquivos:
+            with open(caminho, "r", encoding="utf-8") as arquivo:
+                for entrada in json.load(arquivo).get("log", {}).get("entries", []):
+                    requisicao = entrada["request"]
+                    corpo = (requisicao.get("postData") or {}).get("text", "")
+                    chave = self._chave(requisicao["method"], requisicao["url"], corpo)
+                    self._gravadas.setdefault(chave, deque()).append(entrada["response"])
+        if not self._gravadas:
+            raise FileNotFoundError(f"nenhuma requisição gravada em {arquivos or 'nenhum arquivo'}")
+        logger.info("📼 Replay de %s requisição(ões) de %s arquivo(s) HAR",
+                    sum(len(fila) for fila in self._gravadas.values()), len(arquivos))
+
+    def _chave(self, metodo: str, url: str, corpo: Optional[str]) -> Tuple[str, str, str]:
+        partes = urlsplit(url)
+        url = urlunsplit((partes.scheme, partes.netloc, partes.path,
+                          _sem_campos(parse_qsl(partes.query, keep_blank_values=True), self.ignorar), ""))
+        corpo = corpo or ""
+        if _e_formulario(corpo):
+            corpo = _sem_campos(parse_qsl(corpo, keep_blank_values=True), self.ignorar)
+        return metodo, url, corpo
+
+    def _resposta(self, metodo: str, url: str, corpo: Optional[str]) -> Optional[Dict]:
+        chave = self._chave(metodo, url, corpo)
+        fila = self._gravadas.get(chave)
+        if fila:
+            self._ultimas[chave] = fila.popleft()
+        return self._ultimas.get(chave)
+
+    def instalar(self, context):
+        """Intercepta todas as requisições do contexto"""
+        context.route("**/*", self._atender)
+
+    def _atender(self, route):
+        requisicao = route.request
+        resposta = self._resposta(requisicao.method, requisicao.url, requisicao.post_data)
+        if resposta is None:
+            self.faltando.append(f"{requisicao.method} {requisicao.url}")
+            logger.warning("📼 Sem gravação para %s %s", requisicao.method, requisicao.url)
+            route.abort("internetdisconnected")
+            return
+        self.atendidas += 1
+        conteudo = resposta.get("content", {})
+        texto = conteudo.get("text") or ""
+        corpo = base64.b64decode(texto) if conteudo.get("encoding") == "base64" else texto.encode("utf-8")
+        cabecalhos: Dict[str, str] = {}
+        for cabecalho in resposta.get("headers", []):
+            nome = cabecalho["name"].lower()
+            if nome in _CABECALHOS_DESCARTADOS:
+                continue
+            # Vários Set-Cookie vão juntos, um por linha, como o Playwright espera
+            cabecalhos[nome] = f"{cabecalhos[nome]}\n{cabecalho['value']}" if nome in cabecalhos else cabecalho["value"]
+        route.fulfill(status=resposta.get("status") or 200, headers=cabecalhos, body=corpo)
+
+    def resumo(self) -> str:
+        return f"{self.atendidas} respondida(s) do HAR, {len(self.faltando)} sem gravação"
@@ -1,10 +1,30 @@
 import time
 from datetime import datetime, timedelta
+from typing import Optional
 
 def get_date_30_days_ago() -> str:
     """Retorna a data de 30 dias atrás no formato DDMMYYYY"""
     date_30_days_ago = datetime.today() - timedelta(days=30)
-    return date_30_days_ago.strftime("%d/%m/%Y").replace('/', '')
+    return format_search_date(date_30_days_ago)
+
+def format_search_date(data: datetime) -> str:
+    """Formata uma data para o campo StartDate do monitor (DDMMYYYY)"""
+    return data.strftime("%d%m%Y")
+
+def parse_data_monitor(texto: str) -> Optional[datetime]:
+    """Converte 'DD/MM/YYYY HH:MM:SS' (ou só a data) do grid em datetime"""
+    texto = (texto or '').strip()
+    for formato in ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+    return None
+
+def timeout_playwright() -> type:
+    """TimeoutError do Playwright, importado só quando uma espera falha (uso: except timeout_playwright():)"""
+    from playwright.sync_api import TimeoutError as PlaywrightTimeout
+    return PlaywrightTimeout
 
 def safe_wait(seconds: int):
     """Wait com tratamento de erro"""
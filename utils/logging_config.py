@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+# Atributos padrão de LogRecord - tudo que não estiver aqui vem de `extra=` e vira campo estruturado
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class NDJSONFormatter(logging.Formatter):
+    """Formata cada registro como uma linha JSON (NDJSON)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        evento = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO:
+                evento[chave] = valor
+        if record.exc_info:
+            evento["exc"] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que não formata na thread que loga - a formatação fica para o listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Fila em memória (mesmo processo): não precisa serializar o registro
+        return record
+
+
+def parse_levels(texto: str) -> Dict[str, str]:
+    """Converte 'auth=DEBUG,scrapers=WARNING' em {'auth': 'DEBUG', 'scrapers': 'WARNING'}"""
+    niveis = {}
+    for item in texto.split(','):
+        if '=' not in item:
+            continue
+        nome, nivel = item.split('=', 1)
+        if nome.strip():
+            niveis[nome.strip()] = nivel.strip().upper()
+    return niveis
+
+
+def setup_logging(config) -> logging.handlers.QueueListener:
+    """Configura o logging da aplicação com escrita em background
+
+    Os loggers só empilham registros numa fila; uma thread (QueueListener) formata
+    e escreve no console e no arquivo NDJSON rotativo.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(config.console_level.upper())
+    console.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    handlers = [console]
+
+    if config.file_path:
+        pasta = os.path.dirname(config.file_path)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        arquivo = logging.handlers.RotatingFileHandler(
+            config.file_path,
+            maxBytes=config.file_max_bytes,
+            backupCount=config.file_backups,
+            encoding="utf-8",
+        )
+        arquivo.setFormatter(NDJSONFormatter())
+        handlers.append(arquivo)
+
+    fila = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(LazyQueueHandler(fila))
+    root.setLevel(config.level.upper())
+
+    for nome, nivel in config.levels.items():
+        logging.getLogger(nome).setLevel(nivel)
+
+    _listener = logging.handlers.QueueListener(fila, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Esvazia a fila e para a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class ProgressLine:
+    """Linha única de progresso no console, reescrita no lugar a cada nota"""
+
+    def __init__(self, total: int, stream=None, min_interval: float = 0.25, eta: Optional[Callable[[], float]] = None):
+        self.total = total
+        self.eta = eta  # estimativa externa do tempo restante (ex.: analytics.planner.EstimativaAoVivo)
+        self.stream = stream or sys.stdout
+        self.min_interval = min_interval
+        self.inicio = time.perf_counter()
+        self.ultimo_desenho = 0.0
+        self.feitas = 0
+        self.contadores: Dict[str, int] = {}
+
+    def update(self, icone: str, chave: str = ""):
+        """Conta uma nota concluída e redesenha a linha (no máximo a cada min_interval)"""
+        self.feitas += 1
+        self.contadores[icone] = self.contadores.get(icone, 0) + 1
+
+        agora = time.perf_counter()
+        if self.feitas < self.total and agora - self.ultimo_desenho < self.min_interval:
+            return
+        self.ultimo_desenho = agora
+        self._desenhar(agora, chave)
+
+    def _desenhar(self, agora: float, chave: str):
+        decorrido = agora - self.inicio
+        por_nota = decorrido / self.feitas if self.feitas else 0.0
+        restante = self.eta() if self.eta else por_nota * (self.total - self.feitas)
+        contagem = " ".join(f"{icone}{qtd}" for icone, qtd in self.contadores.items())
+        linha = (f"[{self.feitas}/{self.total}] {contagem} | {por_nota:.1f}s/nota | "
+                 f"ETA {int(restante // 60):02d}:{int(restante % 60):02d} {chave[-12:]}")
+        self.stream.write("\r" + linha.ljust(100))
+        self.stream.flush()
+
+    def finish(self):
+        """Fecha a linha de progresso"""
+        self.stream.write("\n")
+        self.stream.flush()
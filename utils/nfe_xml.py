@@ -0,0 +1,193 @@
+import io
+import os
+import re
+import csv
+import glob
+import argparse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, astuple
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_BLOCOS = ('ide', 'emit', 'ICMSTot', 'infProt')
+
+_ID_NFE = re.compile(rb'<(?:\w+:)?infNFe[^>]*\bId="NFe(\d{44})"')
+
+# Abaixo disso o custo de subir os processos é maior que o ganho
+_MINIMO_PARALELO = 200
+
+
+@dataclass(slots=True)
+class NFeXmlRecord:
+    """Campos de um XML de NF-e (nfeProc) usados pelos relatórios e pelo cache de protocolos"""
+    arquivo: str
+    chave: Optional[str] = None
+    protocolo: Optional[str] = None
+    cstat: Optional[int] = None
+    motivo: Optional[str] = None
+    data_emissao: Optional[str] = None
+    data_autorizacao: Optional[str] = None
+    valor_total: Optional[float] = None
+    emitente_cnpj: Optional[str] = None
+    emitente_nome: Optional[str] = None
+    erro: Optional[str] = None
+
+    @property
+    def autorizada(self) -> bool:
+        return self.cstat in (100, 150)
+
+
+def _local(tag: str) -> str:
+    return tag[tag.index('}') + 1:] if tag.startswith('{') else tag
+
+
+def _filho(elemento: ET.Element, nome: str) -> Optional[str]:
+    for filho in elemento:
+        if _local(filho.tag) == nome:
+            return filho.text
+    return None
+
+
+def _preencher(registro: NFeXmlRecord, tag: str, elemento: ET.Element):
+    """Copia para o registro os campos de um dos blocos de interesse"""
+    if tag == 'ide':
+        registro.data_emissao = _filho(elemento, 'dhEmi') or _filho(elemento, 'dEmi')
+    elif tag == 'emit':
+        registro.emitente_cnpj = _filho(elemento, 'CNPJ') or _filho(elemento, 'CPF')
+        registro.emitente_nome = _filho(elemento, 'xNome')
+    elif tag == 'ICMSTot':
+        valor = _filho(elemento, 'vNF')
+        registro.valor_total = float(valor) if valor else None
+    elif tag == 'infProt':
+        registro.chave = _filho(elemento, 'chNFe') or registro.chave
+        registro.protocolo = _filho(elemento, 'nProt')
+        cstat = _filho(elemento, 'cStat')
+        registro.cstat = int(cstat) if cstat else None
+        registro.motivo = _filho(elemento, 'xMotivo')
+        registro.data_autorizacao = _filho(elemento, 'dhRecbto')
+
+
+def _bloco(dados: bytes, tag: str, reverso: bool = False) -> Optional[ET.Element]:
+    """Recorta <tag ...>...</tag> dos bytes e interpreta só esse pedaço"""
+    procurar = dados.rfind if reverso else dados.find
+    abre = -1
+    for inicio in (b'<' + tag.encode() + b'>', b'<' + tag.encode() + b' '):
+        posicao = procurar(inicio)
+        if posicao != -1 and (abre == -1 or (posicao > abre if reverso else posicao < abre)):
+            abre = posicao
+    if abre == -1:
+        return None
+    fecha = dados.find(b'</' + tag.encode() + b'>', abre)
+    if fecha == -1:
+        raise ValueError(f"<{tag}> sem fechamento")
+    return ET.fromstring(dados[abre:fecha + len(tag) + 3])
+
+
+def _ler_blocos(dados: bytes, registro: NFeXmlRecord) -> bool:
+    """Caminho rápido: só ide, emit, ICMSTot e infProt são interpretados; os itens nem passam pelo parser"""
+    if b'<infNFe' not in dados:
+        return False  # prefixo de namespace (<nfe:infNFe>) ou outro layout: fica com o iterparse
+    for tag in ('ide', 'emit', 'ICMSTot'):
+        elemento = _bloco(dados, tag)
+        if elemento is not None:
+            _preencher(registro, tag, elemento)
+    # O protocolo fica no fim do arquivo, depois da assinatura
+    elemento = _bloco(dados, 'infProt', reverso=True)
+    if elemento is not None:
+        _preencher(registro, 'infProt', elemento)
+    return True
+
+
+def _ler_iterparse(dados: bytes, registro: NFeXmlRecord):
+    """Caminho geral: iterparse descartando os itens e parando no fim do infProt"""
+    for _, elemento in ET.iterparse(io.BytesIO(dados)):
+        tag = _local(elemento.tag)
+        if tag in _BLOCOS:
+            _preencher(registro, tag, elemento)
+            if tag == 'infProt':
+                break  # nada que interessa depois do protocolo
+        elif tag in ('det', 'Signature'):
+            elemento.clear()
+
+
+def ler_nfe_dados(dados: bytes, arquivo: str = "") -> NFeXmlRecord:
+    """Extrai protocolo, cStat, datas, total e emitente do conteúdo de um XML de NF-e sem montar a árvore inteira"""
+    registro = NFeXmlRecord(arquivo=arquivo)
+    try:
+        if not _ler_blocos(dados, registro):
+            _ler_iterparse(dados, registro)
+        if registro.chave is None:
+            # NF-e sem protocolo (só a nota assinada): a chave está no Id do infNFe
+            achado = _ID_NFE.search(dados)
+            registro.chave = achado.group(1).decode() if achado else None
+            if registro.chave is None:
+                registro.erro = "chave não encontrada no XML"
+    except (ET.ParseError, ValueError) as e:
+        registro.erro = str(e)
+    return registro
+
+
+def ler_nfe_xml(caminho: str) -> NFeXmlRecord:
+    """Como ler_nfe_dados, a partir de um arquivo"""
+    try:
+        with open(caminho, 'rb') as arquivo:
+            dados = arquivo.read()
+    except OSError as e:
+        return NFeXmlRecord(arquivo=os.path.basename(caminho), erro=str(e))
+    return ler_nfe_dados(dados, os.path.basename(caminho))
+
+
+def ler_varios(caminhos: Iterable[str], workers: Optional[int] = None, chunksize: int = 64) -> Iterator[NFeXmlRecord]:
+    """Lê muitos XMLs distribuindo os arquivos entre processos; a ordem de entrada é mantida"""
+    caminhos = list(caminhos)
+    if len(caminhos) < _MINIMO_PARALELO or workers == 1:
+        yield from map(ler_nfe_xml, caminhos)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(ler_nfe_xml, caminhos, chunksize=chunksize)
+
+
+def ler_pasta(pasta: str, workers: Optional[int] = None) -> Iterator[NFeXmlRecord]:
+    return ler_varios(sorted(glob.glob(os.path.join(pasta, "*.xml"))), workers)
+
+
+def salvar_csv(registros: Iterable[NFeXmlRecord], caminho: str) -> int:
+    """Grava a tabela (uma linha por XML) em CSV; retorna quantas linhas"""
+    total = 0
+    with open(caminho, 'w', newline='', encoding='utf-8-sig') as arquivo:
+        writer = csv.writer(arquivo)
+        writer.writerow([campo.name for campo in fields(NFeXmlRecord)])
+        for registro in registros:
+            writer.writerow(astuple(registro))
+            total += 1
+    return total
+
+
+def para_dataframe(registros: Iterable[NFeXmlRecord]) -> "pd.DataFrame":
+    """Tabela tipada: datas como datetime, cStat inteiro, valor float"""
+    import pandas as pd
+
+    df = pd.DataFrame([astuple(r) for r in registros], columns=[campo.name for campo in fields(NFeXmlRecord)])
+    df['cstat'] = df['cstat'].astype('Int16')
+    df['valor_total'] = df['valor_total'].astype('float64')
+    for coluna in ('data_emissao', 'data_autorizacao'):
+        df[coluna] = pd.to_datetime(df[coluna], errors='coerce', utc=True)
+    return df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extrai protocolo e campos principais de uma pasta de XMLs de NF-e")
+    parser.add_argument('pasta', nargs='?', default='xmls')
+    parser.add_argument('--saida', default=os.path.join('sheets', 'xmls_extraidos.csv'))
+    parser.add_argument('--workers', type=int, default=None, help="processos (padrão: núcleos da máquina)")
+    args = parser.parse_args(argv)
+
+    total = salvar_csv(ler_pasta(args.pasta, args.workers), args.saida)
+    print(f"📑 {total} XML(s) lidos de {args.pasta} -> {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Métricas do CDP Performance.getMetrics acompanhadas por nota
+METRICAS = ('JSHeapUsedSize', 'Nodes', 'Documents', 'JSEventListeners')
+
+
+class PageTelemetry:
+    """Amostras de memória da página via CDP (Performance.getMetrics); só Chromium
+
+    Fora do Chromium (ou se o CDP falhar) fica desativada e amostra() devolve None.
+    """
+
+    def __init__(self, page):
+        self.sessao = None
+        try:
+            self.sessao = page.context.new_cdp_session(page)
+            self.sessao.send("Performance.enable")
+        except Exception as e:
+            logger.warning("⚠️  Telemetria CDP indisponível: %s", e)
+            self.sessao = None
+
+    def amostra(self) -> Optional[Dict[str, float]]:
+        if not self.sessao:
+            return None
+        try:
+            metricas = {m['name']: m['value'] for m in self.sessao.send("Performance.getMetrics")['metrics']}
+        except Exception as e:
+            logger.debug("Falha ao ler métricas CDP: %s", e)
+            return None
+        amostra = {nome: metricas.get(nome, 0) for nome in METRICAS}
+        amostra['heap_mb'] = round(amostra.pop('JSHeapUsedSize') / 2**20, 1)
+        return amostra
+
+    def fechar(self):
+        if self.sessao:
+            try:
+                self.sessao.detach()
+            except Exception:
+                pass
+            self.sessao = None
+
+
+class PoliticaReciclagem:
+    """Decide quando trocar a página (ou o contexto): a cada N notas ou acima de um limite de memória"""
+
+    def __init__(self, config):
+        self.config = config
+        self.amostras: List[Dict[str, float]] = []
+        self.reciclagens: Dict[str, int] = {}
+
+    def motivo(self, notas_na_pagina: int, amostra: Optional[Dict[str, float]]) -> Optional[str]:
+        """None enquanto a página atual pode continuar; senão o motivo da reciclagem"""
+        if amostra:
+            self.amostras.append(amostra)
+        if not self.config.enabled:
+            return None
+        if self.config.max_notas and notas_na_pagina >= self.config.max_notas:
+            return "notas"
+        if amostra and amostra['heap_mb'] > self.config.heap_max_mb:
+            return "heap"
+        if amostra and amostra['Nodes'] > self.config.nos_max:
+            return "nos"
+        return None
+
+    def registrar(self, motivo: str):
+        self.reciclagens[motivo] = self.reciclagens.get(motivo, 0) + 1
+
+    def resumo(self) -> str:
+        partes = []
+        if self.amostras:
+            primeira, ultima = self.amostras[0], self.amostras[-1]
+            partes.append(f"heap {primeira['heap_mb']}→{ultima['heap_mb']}MB "
+                          f"(máx {max(a['heap_mb'] for a in self.amostras)})")
+            partes.append(f"nós {int(primeira['Nodes'])}→{int(ultima['Nodes'])} "
+                          f"(máx {int(max(a['Nodes'] for a in self.amostras))})")
+        total = sum(self.reciclagens.values())
+        detalhe = ", ".join(f"{motivo}: {n}" for motivo, n in self.reciclagens.items())
+        partes.append(f"{total} reciclagem(ns)" + (f" ({detalhe})" if detalhe else ""))
+        return " | ".join(partes)
@@ -0,0 +1,193 @@
+import os
+import csv
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.nfe_xml import ler_nfe_dados, ler_pasta
+from utils.xml_store import XmlStore
+
+logger = logging.getLogger(__name__)
+
+CACHE_PADRAO = os.path.join("state", "protocolos.sqlite3")
+
+FONTE_SEFAZ = "sefaz"
+FONTE_CONSULTADANFE = "consultadanfe"
+FONTE_XML = "xml"
+FONTE_HISTORICO = "historico_csv"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS protocolos (
+    chave      TEXT PRIMARY KEY,
+    protocolo  TEXT NOT NULL,
+    fonte      TEXT NOT NULL,
+    obtido_em  TEXT NOT NULL,
+    xml_sha256 TEXT
+)
+"""
+
+
+def protocolo_valido(protocolo) -> bool:
+    """nProt é numérico (15 dígitos); '0', vazio e mensagens de erro não contam"""
+    texto = str(protocolo or '').strip()
+    return texto.isdigit() and len(texto) >= 10 and int(texto) != 0
+
+
+def hash_arquivo(caminho: str) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(64 * 1024), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+class ProtocolCache:
+    """Cache persistente chave -> protocolo de autorização (nProt), com procedência
+
+    Um protocolo emitido nunca muda, então a consulta no portal só acontece uma vez
+    por chave. Guarda de onde veio (portal, XML ou histórico), quando e o SHA-256 do XML.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        pasta = os.path.dirname(path)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(path, check_same_thread=False)
+        self._conexao.execute(_SCHEMA)
+        self._conexao.commit()
+        # Tudo em memória: repetir a consulta não toca no disco
+        self._memoria: Dict[str, str] = dict(self._conexao.execute("SELECT chave, protocolo FROM protocolos"))
+
+    def __len__(self) -> int:
+        return len(self._memoria)
+
+    def __contains__(self, chave: str) -> bool:
+        return chave in self._memoria
+
+    def get(self, chave: str) -> Optional[str]:
+        return self._memoria.get(chave)
+
+    def procedencia(self, chave: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT protocolo, fonte, obtido_em, xml_sha256 FROM protocolos WHERE chave = ?", (chave,)
+            ).fetchone()
+        if not linha:
+            return None
+        return {"protocolo": linha[0], "fonte": linha[1], "obtido_em": linha[2], "xml_sha256": linha[3]}
+
+    def pendentes(self, chaves: Iterable[str]) -> List[str]:
+        """Chaves que ainda precisam de consulta no portal (na ordem recebida)"""
+        return [chave for chave in chaves if chave not in self._memoria]
+
+    def put(self, chave: str, protocolo: str, fonte: str, xml_path: Optional[str] = None,
+            obtido_em: Optional[str] = None, xml_sha256: Optional[str] = None) -> bool:
+        """Grava um protocolo válido; retorna False se o valor não é um protocolo"""
+        return self.put_many([(chave, protocolo, fonte, xml_path, obtido_em, xml_sha256)]) == 1
+
+    def put_many(self, registros: Iterable[Tuple]) -> int:
+        """Grava vários (chave, protocolo, fonte, xml_path, obtido_em, xml_sha256) numa única transação
+
+        Sem xml_sha256, o hash é calculado a partir de xml_path (se o arquivo existir).
+        """
+        linhas = []
+        for chave, protocolo, fonte, xml_path, obtido_em, sha in registros:
+            protocolo = str(protocolo or '').strip()
+            if not chave or not protocolo_valido(protocolo):
+                continue
+            if sha is None and xml_path and os.path.exists(xml_path):
+                sha = hash_arquivo(xml_path)
+            linhas.append((chave, protocolo, fonte, obtido_em or datetime.now().isoformat(timespec='seconds'), sha))
+        if not linhas:
+            return 0
+
+        with self._lock:
+            with self._conexao:
+                self._conexao.executemany(
+                    "INSERT OR REPLACE INTO protocolos (chave, protocolo, fonte, obtido_em, xml_sha256) "
+                    "VALUES (?, ?, ?, ?, ?)", linhas)
+            self._memoria.update((linha[0], linha[1]) for linha in linhas)
+        return len(linhas)
+
+    def aquecer_csv(self, csv_path: str, pasta_xmls: Optional[str] = None) -> int:
+        """Importa o histórico do ConsultaDanfeScraper (Nota_Fiscal, Protocolo, Data_Consulta, Arquivo_XML)"""
+        if not os.path.exists(csv_path):
+            return 0
+        registros = []
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as arquivo:
+            for linha in csv.DictReader(arquivo):
+                chave = (linha.get('Nota_Fiscal') or '').strip()
+                if chave in self._memoria:
+                    continue
+                xml = linha.get('Arquivo_XML') or ''
+                xml_path = os.path.join(pasta_xmls, xml) if pasta_xmls and xml and xml != 'N/A' else None
+                try:
+                    obtido_em = datetime.strptime(linha.get('Data_Consulta', ''), '%d/%m/%Y %H:%M:%S').isoformat()
+                except ValueError:
+                    obtido_em = None
+                registros.append((chave, linha.get('Protocolo'), FONTE_HISTORICO, xml_path, obtido_em, None))
+        novos = self.put_many(registros)
+        logger.info("🗃️  Histórico %s: %s protocolo(s) novo(s) no cache", csv_path, novos)
+        return novos
+
+    def aquecer_xmls(self, pasta: str) -> int:
+        """Importa os protocolos dos XMLs baixados (chNFe/nProt do protNFe), lidos em paralelo"""
+        registros = []
+        for xml in ler_pasta(pasta):
+            if xml.erro:
+                logger.warning("⚠️  XML ilegível %s: %s", xml.arquivo, xml.erro)
+                continue
+            if xml.chave and xml.chave not in self._memoria:
+                registros.append((xml.chave, xml.protocolo, FONTE_XML, os.path.join(pasta, xml.arquivo), None, None))
+        novos = self.put_many(registros)
+        logger.info("🗃️  XMLs em %s: %s protocolo(s) novo(s) no cache", pasta, novos)
+        return novos
+
+    def aquecer_store(self, store: XmlStore) -> int:
+        """Importa os protocolos dos XMLs do depósito que ainda não estão no cache"""
+        registros = []
+        for chave, entrada in list(store.index.items()):
+            if chave in self._memoria:
+                continue
+            dados = store.ler(chave)
+            if dados is None:
+                continue
+            xml = ler_nfe_dados(dados, chave)
+            registros.append((chave, xml.protocolo, FONTE_XML, None, entrada.get('salvo_em'), entrada['sha256']))
+        novos = self.put_many(registros)
+        logger.info("🗃️  Depósito de XMLs: %s protocolo(s) novo(s) no cache", novos)
+        return novos
+
+    def preencher_notas(self, notas: List[Dict]) -> int:
+        """Completa o campo protocolo das notas ('0' ou vazio) com o que está no cache"""
+        preenchidas = 0
+        for nota in notas:
+            if protocolo_valido(nota.get('protocolo')):
+                continue
+            protocolo = self._memoria.get(nota.get('chave', ''))
+            if protocolo:
+                nota['protocolo'] = protocolo
+                preenchidas += 1
+        return preenchidas
+
+    def preencher_json(self, json_path: str) -> int:
+        """Atualiza o notas_fiscais.json no lugar (uma nota por linha, como o arquivo original)"""
+        with open(json_path, 'r', encoding='utf-8') as arquivo:
+            notas = json.load(arquivo)
+        preenchidas = self.preencher_notas(notas)
+        if preenchidas:
+            temporario = json_path + ".tmp"
+            with open(temporario, 'w', encoding='utf-8') as arquivo:
+                arquivo.write("[\n" + ",\n".join("  " + json.dumps(nota, ensure_ascii=False) for nota in notas) + "\n]")
+            os.replace(temporario, json_path)
+        return preenchidas
+
+    def close(self):
+        with self._lock:
+            self._conexao.close()
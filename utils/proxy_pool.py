@@ -0,0 +1,184 @@
+import time
+import logging
+import threading
+import urllib.error
+import urllib.request
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EstadoProxy:
+    """Saúde de um proxy: latência das sondagens, erros recentes e notas atendidas"""
+
+    def __init__(self, proxy, janela: int):
+        self.proxy = proxy
+        self.latencias: Deque[float] = deque(maxlen=janela)
+        self.resultados: Deque[bool] = deque(maxlen=janela)  # sondagens e notas: True = ok
+        self.sessoes = 0
+        self.notas = 0
+        self.notas_erro = 0
+        self.segundos_notas = 0.0
+
+    @property
+    def server(self) -> str:
+        return f"http://{self.proxy.host}:{self.proxy.port}"
+
+    @property
+    def latencia(self) -> Optional[float]:
+        return sum(self.latencias) / len(self.latencias) if self.latencias else None
+
+    @property
+    def taxa_erro(self) -> float:
+        return self.resultados.count(False) / len(self.resultados) if self.resultados else 0.0
+
+    def notas_por_minuto(self) -> float:
+        return self.notas * 60 / self.segundos_notas if self.segundos_notas else 0.0
+
+
+class ProxyPool:
+    """Vários proxies com sondagem periódica em segundo plano
+
+    Cada sessão (contexto do navegador) recebe o proxy saudável de menor custo
+    (latência média, penalizada pela taxa de erro e pelas sessões que já usam o
+    proxy). Um proxy fica degradado quando a taxa de erro ou a latência passa do
+    limite; a sessão que o usa troca de proxy entre uma nota e outra.
+    """
+
+    def __init__(self, proxies: List, config):
+        self.config = config
+        self.estados = [EstadoProxy(proxy, config.janela) for proxy in proxies]
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _estado(self, proxy) -> EstadoProxy:
+        return next(estado for estado in self.estados if estado.proxy is proxy)
+
+    def _degradado(self, estado: EstadoProxy) -> bool:
+        if len(self.estados) == 1:
+            return False
+        if len(estado.resultados) >= 3 and estado.taxa_erro > self.config.taxa_erro_max:
+            return True
+        return estado.latencia is not None and estado.latencia > self.config.latencia_max_s
+
+    def _custo(self, estado: EstadoProxy) -> float:
+        latencia = estado.latencia if estado.latencia is not None else self.config.timeout_s / 2
+        return latencia * (1 + 4 * estado.taxa_erro) * (1 + estado.sessoes)
+
+    def sondar(self, estado: EstadoProxy):
+        """Uma requisição ao site pelo proxy; qualquer resposta HTTP conta como proxy funcionando"""
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({'http': estado.server, 'https': estado.server}))
+        inicio = time.perf_counter()
+        try:
+            with opener.open(self.config.url_teste, timeout=self.config.timeout_s) as resposta:
+                resposta.read(1)
+            ok = True
+        except urllib.error.HTTPError:
+            ok = True
+        except Exception as e:
+            logger.debug("🌐 Sondagem de %s falhou: %s", estado.server, e)
+            ok = False
+        decorrido = time.perf_counter() - inicio
+        with self._lock:
+            estado.resultados.append(ok)
+            estado.latencias.append(decorrido if ok else self.config.timeout_s)
+
+    def sondar_todos(self):
+        for estado in self.estados:
+            self.sondar(estado)
+
+    def iniciar(self):
+        """Sonda todos uma vez (para a primeira atribuição já ter dados) e segue em segundo plano"""
+        if len(self.estados) < 2 or self._thread:
+            return
+        self.sondar_todos()
+
+        def laco():
+            while not self._parar.wait(self.config.intervalo_s):
+                self.sondar_todos()
+
+        self._thread = threading.Thread(target=laco, name="proxy-health", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def atribuir(self, anterior=None):
+        """Proxy para uma sessão nova (ou que está deixando `anterior`): o saudável de menor custo"""
+        with self._lock:
+            if anterior is not None:
+                self._estado(anterior).sessoes -= 1
+            candidatos = [e for e in self.estados if not self._degradado(e)] or self.estados
+            escolhido = min(candidatos, key=self._custo)
+            escolhido.sessoes += 1
+        if anterior is not None and escolhido.proxy is not anterior:
+            logger.warning("🌐 Proxy %s degradado, sessão movida para %s", self._estado(anterior).server,
+                           escolhido.server)
+        return escolhido.proxy
+
+    def desfazer_troca(self, novo, anterior):
+        """A sessão não conseguiu entrar pelo proxy `novo` e continua em `anterior`; a falha conta contra o novo"""
+        with self._lock:
+            estado = self._estado(novo)
+            estado.sessoes -= 1
+            estado.resultados.append(False)
+            self._estado(anterior).sessoes += 1
+        logger.warning("🌐 Sessão não entrou pelo proxy %s, mantida em %s", self._estado(novo).server,
+                       self._estado(anterior).server)
+
+    def liberar(self, proxy):
+        with self._lock:
+            self._estado(proxy).sessoes -= 1
+
+    def registrar_nota(self, proxy, segundos: float, ok: bool):
+        with self._lock:
+            estado = self._estado(proxy)
+            estado.notas += 1
+            estado.notas_erro += not ok
+            estado.segundos_notas += segundos
+            estado.resultados.append(ok)
+
+    def degradado(self, proxy) -> bool:
+        """Vale trocar: o proxy está degradado e há outro saudável"""
+        with self._lock:
+            if not self._degradado(self._estado(proxy)):
+                return False
+            return any(not self._degradado(e) for e in self.estados if e.proxy is not proxy)
+
+    def metricas(self) -> List[Dict]:
+        with self._lock:
+            return [{
+                "proxy": estado.server,
+                "saudavel": not self._degradado(estado),
+                "latencia_s": round(estado.latencia, 3) if estado.latencia is not None else None,
+                "taxa_erro": round(estado.taxa_erro, 3),
+                "sessoes": estado.sessoes,
+                "notas": estado.notas,
+                "notas_erro": estado.notas_erro,
+                "notas_por_min": round(estado.notas_por_minuto(), 2),
+            } for estado in self.estados]
+
+    def resumo(self) -> str:
+        linhas = []
+        for m in self.metricas():
+            marca = "✅" if m['saudavel'] else "⚠️ "
+            latencia = f"{m['latencia_s']}s" if m['latencia_s'] is not None else "-"
+            linhas.append(f"   {marca} {m['proxy']}: {m['notas']} nota(s), {m['notas_por_min']}/min por sessão, "
+                          f"latência {latencia}, erro {m['taxa_erro']:.0%}")
+        return "\n".join(linhas)
+
+
+_compartilhado: Optional[ProxyPool] = None
+_compartilhado_lock = threading.Lock()
+
+
+def pool_compartilhado(config) -> ProxyPool:
+    """O mesmo pool (e a mesma sondagem) para todas as sessões do processo"""
+    global _compartilhado
+    with _compartilhado_lock:
+        if _compartilhado is None:
+            _compartilhado = ProxyPool(config.proxies or [config.proxy], config.proxy_pool)
+            _compartilhado.iniciar()
+        return _compartilhado
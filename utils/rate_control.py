@@ -0,0 +1,187 @@
+import time
+import logging
+import threading
+from contextlib import ExitStack, contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Erros de rede do Chromium/Playwright (net::ERR_CONNECTION_RESET, ERR_TIMED_OUT...): o servidor não respondeu
+_ERROS_DE_TRANSPORTE = ("net::ERR_", "NS_ERROR_", "Target closed", "Connection closed")
+
+
+class _Acao:
+    """Registro de uma ação em andamento
+
+    falhou() sem timeout/transporte marca erro lógico (ex.: formulário não preenchido):
+    conta nas métricas, mas não é sinal de sobrecarga do servidor.
+    """
+    __slots__ = ('nome', 'alvo_s', 'erro', 'timeout', 'transporte')
+
+    def __init__(self, nome: str, alvo_s: float):
+        self.nome = nome
+        self.alvo_s = alvo_s
+        self.erro: Optional[str] = None
+        self.timeout = False
+        self.transporte = False
+
+    def falhou(self, motivo: str = "falha", timeout: bool = False, transporte: bool = False):
+        self.erro = motivo
+        self.timeout = timeout
+        self.transporte = transporte
+
+    @property
+    def congestao(self) -> bool:
+        return self.timeout or self.transporte
+
+
+class RateController:
+    """Controle central de ritmo das ações no Unisys: token bucket + limite de concorrência AIMD
+
+    Toda pesquisa/reprocesso de qualquer sessão passa por acao(): espera uma vaga
+    (em_uso < limite) e um token (taxa em ações/s). Ação rápida e sem erro aumenta
+    a taxa e o limite aos poucos (aditivo); timeout, erro de rede ou latência acima do
+    alvo da ação corta os dois pela metade (multiplicativo), no máximo uma vez a cada
+    intervalo_reducao_s. Falha lógica não mexe nos limites.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.taxa = config.taxa_inicial
+        self.limite = float(config.concorrencia_inicial)
+        self.tokens = 1.0
+        self.em_uso = 0
+        self._lock = threading.Lock()
+        self._vaga = threading.Condition(self._lock)
+        self._ultimo_abastecimento = time.monotonic()
+        self._ultima_reducao = 0.0
+        self.latencia_media: Optional[float] = None
+        self.espera_total = 0.0
+        self.contadores: Dict[str, int] = {'acoes': 0, 'erros': 0, 'timeouts': 0, 'falhas': 0, 'lentas': 0,
+                                           'reducoes': 0}
+        self.por_acao: Dict[str, int] = {}
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        # Capacidade de 1 token por ação simultânea permitida: rajada curta, nunca acima do limite
+        capacidade = max(1.0, float(int(self.limite)))
+        self.tokens = min(capacidade, self.tokens + (agora - self._ultimo_abastecimento) * self.taxa)
+        self._ultimo_abastecimento = agora
+
+    def _entrar(self):
+        with self._vaga:
+            while self.em_uso >= int(self.limite):
+                self._vaga.wait()
+            self.em_uso += 1
+        while True:
+            with self._lock:
+                self._reabastecer()
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                espera = (1.0 - self.tokens) / self.taxa
+                self.espera_total += espera
+            time.sleep(espera)
+
+    def _sair(self, acao: _Acao, latencia: float):
+        cfg = self.config
+        with self._vaga:
+            self.em_uso -= 1
+            self.contadores['acoes'] += 1
+            self.por_acao[acao.nome] = self.por_acao.get(acao.nome, 0) + 1
+            self.latencia_media = latencia if self.latencia_media is None else 0.8 * self.latencia_media + 0.2 * latencia
+
+            lenta = latencia > acao.alvo_s
+            if acao.timeout:
+                self.contadores['timeouts'] += 1
+            elif acao.transporte:
+                self.contadores['erros'] += 1
+            elif acao.erro:
+                self.contadores['falhas'] += 1
+            elif lenta:
+                self.contadores['lentas'] += 1
+
+            agora = time.monotonic()
+            if acao.congestao or lenta:
+                if agora - self._ultima_reducao >= cfg.intervalo_reducao_s:
+                    self._ultima_reducao = agora
+                    self.limite = max(1.0, self.limite * cfg.beta)
+                    self.taxa = max(cfg.taxa_min, self.taxa * cfg.beta)
+                    self.contadores['reducoes'] += 1
+                    logger.warning("🚦 %s em %s (%.1fs): limite %.1f, taxa %.2f/s", acao.erro or "lentidão",
+                                   acao.nome, latencia, self.limite, self.taxa)
+            elif not acao.erro:
+                # +1 no limite a cada ~limite ações bem-sucedidas
+                self.limite = min(float(cfg.concorrencia_max), self.limite + 1.0 / self.limite)
+                self.taxa = min(cfg.taxa_max, self.taxa + cfg.incremento_taxa)
+            self._vaga.notify_all()
+
+    @contextmanager
+    def acao(self, nome: str, alvo_s: Optional[float] = None):
+        """Envolve uma ação no servidor: espera vaga e token, mede a latência e ajusta os limites
+
+        alvo_s: latência acima da qual a ação conta como lenta (padrão config.latencia_alvo_s, de uma ação só).
+        """
+        registro = _Acao(nome, self.config.latencia_alvo_s if alvo_s is None else alvo_s)
+        self._entrar()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except Exception as e:
+            # Playwright e utils.deadline: TimeoutError (o do Playwright não herda do builtin)
+            registro.falhou(f"{type(e).__name__}: {e}", isinstance(e, TimeoutError) or 'Timeout' in type(e).__name__,
+                            any(marca in str(e) for marca in _ERROS_DE_TRANSPORTE) or isinstance(e, ConnectionError))
+            raise
+        finally:
+            self._sair(registro, time.perf_counter() - inicio)
+
+    def metricas(self) -> Dict:
+        with self._lock:
+            return {
+                "limite_concorrencia": round(self.limite, 2),
+                "em_uso": self.em_uso,
+                "taxa_por_s": round(self.taxa, 3),
+                "latencia_media_s": round(self.latencia_media, 2) if self.latencia_media is not None else None,
+                "espera_total_s": round(self.espera_total, 1),
+                **self.contadores,
+                "por_acao": dict(self.por_acao),
+            }
+
+    def resumo(self) -> str:
+        m = self.metricas()
+        return (f"limite {m['limite_concorrencia']} | {m['taxa_por_s']}/s | latência {m['latencia_media_s']}s | "
+                f"{m['acoes']} ações, {m['erros']} erro(s) de rede, {m['timeouts']} timeout(s), "
+                f"{m['falhas']} falha(s), {m['reducoes']} redução(ões)")
+
+
+class _AcaoConjunta:
+    """Os registros da mesma ação em vários controladores; falhou() vale para todos"""
+    __slots__ = ('registros',)
+
+    def __init__(self, registros: List[_Acao]):
+        self.registros = registros
+
+    def falhou(self, motivo: str = "falha", timeout: bool = False, transporte: bool = False):
+        for registro in self.registros:
+            registro.falhou(motivo, timeout, transporte)
+
+
+@contextmanager
+def acao_conjunta(controladores: List[RateController], nome: str, alvo_s: Optional[float] = None):
+    """A mesma ação sob vários controladores (ex.: o da conta do monitor e o global), na ordem dada"""
+    with ExitStack() as pilha:
+        yield _AcaoConjunta([pilha.enter_context(controlador.acao(nome, alvo_s)) for controlador in controladores])
+
+
+_compartilhado: Optional[RateController] = None
+_compartilhado_lock = threading.Lock()
+
+
+def controlador_compartilhado(config) -> RateController:
+    """O mesmo controlador para todas as sessões do processo (daemon, modo paralelo, monitor)"""
+    global _compartilhado
+    with _compartilhado_lock:
+        if _compartilhado is None:
+            _compartilhado = RateController(config)
+        return _compartilhado
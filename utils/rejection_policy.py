@@ -0,0 +1,202 @@
+import os
+import re
+import csv
+import logging
+import threading
+import unicodedata
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SEM_MOTIVO = "SEM_MOTIVO"
+OUTRO = "OUTRO"
+
+# Código -> padrão sobre o texto normalizado (sem acento, minúsculo). A ordem importa:
+# o primeiro que casar vence, então os mais específicos vêm antes.
+PADROES_REJEICAO = [
+    ("EMISSAO_ATRASADA", r"data de emissao muito atrasada"),
+    ("EMISSAO_FUTURA", r"data de emissao posterior|emissao .*futur"),
+    ("DUPLICIDADE", r"duplicidade"),
+    ("JA_CANCELADA", r"ja (?:esta )?cancelad|nf-?e (?:esta )?cancelada"),
+    ("DENEGADA", r"denegad|uso denegado"),
+    ("IE_DESTINATARIO", r"ie do destinatario|inscricao estadual do destinatario"),
+    ("IE_EMITENTE", r"ie do emitente|inscricao estadual do emitente"),
+    ("CNPJ_INVALIDO", r"cnpj .*invalido|cnpj .*nao cadastrado"),
+    ("NCM", r"\bncm\b"),
+    ("CFOP", r"\bcfop\b"),
+    ("SCHEMA", r"falha no schema|schema xml"),
+    ("ASSINATURA", r"assinatura|certificado"),
+    ("SERVICO_INDISPONIVEL", r"servico paralisado|indisponivel|timeout|tempo limite|erro de comunicacao"),
+    ("EPEC", r"\bepec\b|\bdpec\b"),
+]
+
+# Um único regex com um grupo nomeado por código: uma passada por texto, qualquer que seja o número de padrões
+_MATCHER = re.compile("|".join(f"(?P<{codigo}>{padrao})" for codigo, padrao in PADROES_REJEICAO))
+_CSTAT = re.compile(r"rejeicao\s*(\d{3})")
+
+# Colunas da fila humana; 'linha' identifica a rejeição (scrapers.monitor_poller.chave_linha)
+CAMPOS_FILA = ['data', 'chave', 'fiscal_doc_no', 'location_id', 'codigo', 'observacao', 'linha']
+
+
+class AcaoRejeicao(Enum):
+    """O que fazer com uma nota rejeitada antes de abrir o diálogo de Reprocessar"""
+    REPROCESSAR = "reprocessar"
+    PULAR = "pular"
+    FILA_HUMANA = "fila"
+
+
+def normalizar_motivo(texto: str) -> str:
+    sem_acento = unicodedata.normalize('NFKD', str(texto or '')).encode('ascii', 'ignore').decode()
+    return ' '.join(sem_acento.lower().split())
+
+
+def classificar_rejeicao(texto: str) -> str:
+    """'Rejeicao: Data de Emissao muito atrasada' -> 'EMISSAO_ATRASADA'"""
+    normalizado = normalizar_motivo(texto)
+    if not normalizado:
+        return SEM_MOTIVO
+    achado = _MATCHER.search(normalizado)
+    if achado:
+        return achado.lastgroup
+    # Motivo sem padrão conhecido mas com cStat ('Rejeicao 539: ...'): o código numérico já agrupa
+    cstat = _CSTAT.search(normalizado)
+    return f"CSTAT_{cstat.group(1)}" if cstat else OUTRO
+
+
+def parse_regras(texto: str) -> Dict[str, AcaoRejeicao]:
+    """Converte 'EMISSAO_ATRASADA=pular,DUPLICIDADE=fila' em {código: ação}"""
+    regras = {}
+    for item in texto.split(','):
+        if '=' not in item:
+            continue
+        codigo, acao = item.split('=', 1)
+        try:
+            regras[codigo.strip().upper()] = AcaoRejeicao(acao.strip().lower())
+        except ValueError:
+            logger.warning("⚠️  Ação desconhecida na regra '%s' (use reprocessar, pular ou fila)", item.strip())
+    return regras
+
+
+def parse_acao(texto: str, padrao: AcaoRejeicao = AcaoRejeicao.FILA_HUMANA) -> AcaoRejeicao:
+    """'pular' -> AcaoRejeicao.PULAR; valor desconhecido cai no padrão com aviso"""
+    try:
+        return AcaoRejeicao(str(texto or '').strip().lower())
+    except ValueError:
+        logger.warning("⚠️  Ação desconhecida para códigos inúteis '%s' (use pular ou fila), usando '%s'",
+                       texto, padrao.value)
+        return padrao
+
+
+class RejectionPolicy:
+    """Decide, pelo motivo da rejeição, se vale abrir o Reprocessar
+
+    Regras explícitas (config.regras) valem primeiro. Sem regra, um código com pelo menos
+    config.min_amostras reprocessos de desfecho conhecido no histórico e taxa de sucesso
+    abaixo de config.taxa_minima recebe config.acao_futil; o resto é reprocessado.
+    """
+
+    def __init__(self, config, taxas: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.config = config
+        self.regras = parse_regras(config.regras)
+        self.acao_futil = parse_acao(config.acao_futil)
+        self.taxas: Dict[str, Tuple[int, float]] = taxas if taxas is not None else {}
+        self.contagem: Dict[AcaoRejeicao, int] = dict.fromkeys(AcaoRejeicao, 0)
+        self._na_fila: Optional[Set[str]] = None  # linhas já gravadas na fila humana (lidas na primeira)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def com_historico(cls, config) -> "RejectionPolicy":
+        """Política com as taxas aprendidas de sheets/ (via cache do analytics)"""
+        taxas = {}
+        if config.enabled and config.aprender:
+            try:
+                taxas = taxas_por_codigo()
+            except Exception as e:
+                logger.warning("⚠️  Histórico de reprocessos indisponível, sem aprendizado: %s", e)
+        politica = cls(config, taxas)
+        for codigo, (amostras, taxa) in sorted(taxas.items()):
+            logger.info("📈 %s: %s reprocesso(s) com desfecho, %.0f%% de sucesso -> %s",
+                        codigo, amostras, taxa * 100, politica.acao_para(codigo).value)
+        return politica
+
+    def acao_para(self, codigo: str) -> AcaoRejeicao:
+        if not self.config.enabled:
+            return AcaoRejeicao.REPROCESSAR
+        if codigo in self.regras:
+            return self.regras[codigo]
+        amostras, taxa = self.taxas.get(codigo, (0, 1.0))
+        if amostras >= self.config.min_amostras and taxa < self.config.taxa_minima:
+            return self.acao_futil
+        return AcaoRejeicao.REPROCESSAR
+
+    def decidir(self, nota_data: Dict, observacao: str, linha: str = "") -> Tuple[str, AcaoRejeicao]:
+        """(código, ação) para a nota; as que vão para a fila humana já são gravadas no arquivo
+
+        `linha` (chave_linha da linha do grid) evita gravar de novo a mesma rejeição a cada execução.
+        """
+        codigo = classificar_rejeicao(observacao)
+        acao = self.acao_para(codigo)
+        with self._lock:
+            self.contagem[acao] += 1
+            if acao is AcaoRejeicao.FILA_HUMANA:
+                self._enfileirar(nota_data, codigo, observacao, linha or f"{nota_data.get('chave', '')}|{observacao}")
+        return codigo, acao
+
+    def enfileirar(self, nota_data: Dict, codigo: str, observacao: str, linha: str = ""):
+        """Manda para a fila humana uma nota que a política mandaria reprocessar (ex.: reprocesso que não pega)"""
+        with self._lock:
+            self.contagem[AcaoRejeicao.FILA_HUMANA] += 1
+            self._enfileirar(nota_data, codigo, observacao, linha or f"{nota_data.get('chave', '')}|{observacao}")
+
+    def _carregar_fila(self) -> Set[str]:
+        """Linhas já na fila humana; um arquivo do formato anterior (sem 'linha') ganha a coluna"""
+        if not os.path.exists(self.config.fila_path):
+            return set()
+        with open(self.config.fila_path, 'r', newline='', encoding='utf-8-sig') as arquivo:
+            leitor = csv.DictReader(arquivo)
+            registros = list(leitor)
+            campos = leitor.fieldnames or []
+        if 'linha' not in campos:
+            with open(self.config.fila_path, 'w', newline='', encoding='utf-8-sig') as arquivo:
+                writer = csv.DictWriter(arquivo, CAMPOS_FILA, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(registros)
+        return {registro['linha'] for registro in registros if registro.get('linha')}
+
+    def _enfileirar(self, nota_data: Dict, codigo: str, observacao: str, linha: str):
+        if self._na_fila is None:
+            self._na_fila = self._carregar_fila()
+        if linha in self._na_fila:
+            logger.debug("📋 Rejeição já está na fila humana: %s", linha)
+            return
+        pasta = os.path.dirname(self.config.fila_path)
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+        novo = not os.path.exists(self.config.fila_path)
+        with open(self.config.fila_path, 'a', newline='', encoding='utf-8-sig') as arquivo:
+            writer = csv.writer(arquivo)
+            if novo:
+                writer.writerow(CAMPOS_FILA)
+            writer.writerow([datetime.now().strftime('%d/%m/%Y %H:%M:%S'), nota_data.get('chave', ''),
+                             nota_data.get('fiscal_doc_no', ''), nota_data.get('location_id', ''),
+                             codigo, observacao, linha])
+        self._na_fila.add(linha)
+
+    def resumo(self) -> str:
+        return " | ".join(f"{acao.value}: {total}" for acao, total in self.contagem.items())
+
+
+def taxas_por_codigo() -> Dict[str, Tuple[int, float]]:
+    """Código -> (reprocessos com desfecho conhecido, taxa de sucesso), a partir do histórico em sheets/"""
+    from analytics.history import carregar_historico
+    from analytics.reports import sucesso_reprocesso_por_motivo
+
+    por_motivo = sucesso_reprocesso_por_motivo(carregar_historico().resultados)
+    if por_motivo.empty:
+        return {}
+    codigos = por_motivo.index.astype(str).map(classificar_rejeicao)
+    agrupado = por_motivo.groupby(codigos)[['com_desfecho', 'sucessos']].sum()
+    return {codigo: (int(linha.com_desfecho), float(linha.sucessos / linha.com_desfecho))
+            for codigo, linha in agrupado.iterrows() if linha.com_desfecho > 0}
@@ -0,0 +1,97 @@
+import sys
+import time
+from typing import Dict, List
+
+
+class _TimingLoader:
+    """Envolve o loader original medindo create_module + exec_module"""
+
+    def __init__(self, loader, profiler: "ImportProfiler", name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        create = getattr(self._loader, "create_module", None)
+        if create is None:
+            return None
+        # Extensões nativas (.pyd/.so) fazem o trabalho pesado aqui
+        with self._profiler.medir(self._name):
+            return create(spec)
+
+    def exec_module(self, module):
+        with self._profiler.medir(self._name):
+            self._loader.exec_module(module)
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+
+class _Medicao:
+    def __init__(self, profiler: "ImportProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        self.profiler._pilha.append(0.0)
+
+    def __exit__(self, *exc):
+        total = time.perf_counter() - self.inicio
+        filhos = self.profiler._pilha.pop()
+        if self.profiler._pilha:
+            self.profiler._pilha[-1] += total
+        else:
+            self.profiler.total += total
+        acumulado, proprio = self.profiler.tempos.get(self.name, (0.0, 0.0))
+        self.profiler.tempos[self.name] = (acumulado + total, proprio + total - filhos)
+        return False
+
+
+class ImportProfiler:
+    """Mede o custo de importação de cada módulo (tempo acumulado e próprio)
+
+    Funciona como finder em sys.meta_path delegando aos finders existentes,
+    então vale também para o executável do PyInstaller.
+    """
+
+    def __init__(self):
+        self.tempos: Dict[str, tuple] = {}
+        self.total = 0.0
+        self._pilha: List[float] = []
+        self._inicio = time.perf_counter()
+
+    def medir(self, name: str) -> _Medicao:
+        return _Medicao(self, name)
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimingLoader(spec.loader, self, fullname)
+                return spec
+        return None
+
+    def install(self) -> "ImportProfiler":
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def report(self, top: int = 25) -> str:
+        """Tabela com os módulos mais caros, ordenados pelo tempo acumulado"""
+        linhas = [
+            f"⏱️  PERFIL DE IMPORTAÇÃO - {len(self.tempos)} módulos, "
+            f"{(time.perf_counter() - self._inicio) * 1000:.0f} ms desde o início",
+            f"{'acumulado':>10} {'próprio':>10}  módulo",
+        ]
+        ordenados = sorted(self.tempos.items(), key=lambda item: item[1][0], reverse=True)
+        for nome, (acumulado, proprio) in ordenados[:top]:
+            linhas.append(f"{acumulado * 1000:>8.1f}ms {proprio * 1000:>8.1f}ms  {nome}")
+        linhas.append(f"📦 Total gasto importando: {self.total * 1000:.0f} ms")
+        return "\n".join(linhas)
@@ -0,0 +1,205 @@
+import os
+import gzip
+import glob
+import json
+import hashlib
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.nfe_xml import ler_nfe_xml
+
+logger = logging.getLogger(__name__)
+
+LIMITE_PADRAO_MB = 1024
+
+
+class XmlStore:
+    """Depósito permanente de XMLs de NF-e, endereçado por conteúdo e indexado por chave
+
+    xmls/objetos/ab/ab12...ef.xml.gz  <- um arquivo por SHA-256 do XML (sem duplicatas)
+    xmls/index.json                    <- chave -> sha256, tamanhos, datas de gravação/acesso
+
+    Ao passar de limite_bytes, os XMLs acessados há mais tempo são descartados.
+    """
+
+    def __init__(self, raiz: str, comprimir: bool = True, limite_mb: int = LIMITE_PADRAO_MB):
+        self.raiz = raiz
+        self.objetos = os.path.join(raiz, "objetos")
+        self.index_path = os.path.join(raiz, "index.json")
+        self.comprimir = comprimir
+        self.limite_bytes = limite_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        os.makedirs(self.objetos, exist_ok=True)
+        self.index: Dict[str, Dict] = self._carregar_index()
+
+    def _carregar_index(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as arquivo:
+                return json.load(arquivo)
+        except (OSError, ValueError) as e:
+            logger.error("❌ Índice do depósito ilegível (%s), reconstruindo pela verificação: %s", self.index_path, e)
+            return {}
+
+    def _salvar_index(self):
+        temporario = self.index_path + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.index, arquivo, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.index_path)
+
+    def _caminho_objeto(self, sha: str, comprimido: bool) -> str:
+        return os.path.join(self.objetos, sha[:2], sha + (".xml.gz" if comprimido else ".xml"))
+
+    def __contains__(self, chave: str) -> bool:
+        return chave in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def tamanho_total(self) -> int:
+        # Objetos compartilhados por várias chaves ocupam o disco uma vez só
+        return sum({e['sha256']: e['tamanho_disco'] for e in self.index.values()}.values())
+
+    def guardar(self, chave: str, dados: bytes, persistir: bool = True) -> str:
+        """Grava o XML (se o conteúdo ainda não existe) e aponta a chave para ele; retorna o sha256
+
+        Em importações grandes, persistir=False adia a gravação do índice para quem chama.
+        """
+        sha = hashlib.sha256(dados).hexdigest()
+        caminho = self._caminho_objeto(sha, self.comprimir)
+        with self._lock:
+            if not os.path.exists(caminho):
+                os.makedirs(os.path.dirname(caminho), exist_ok=True)
+                conteudo = gzip.compress(dados) if self.comprimir else dados
+                temporario = caminho + ".tmp"
+                with open(temporario, 'wb') as arquivo:
+                    arquivo.write(conteudo)
+                os.replace(temporario, caminho)
+            agora = datetime.now().isoformat(timespec='seconds')
+            anterior = self.index.get(chave)
+            self.index[chave] = {
+                "sha256": sha,
+                "tamanho": len(dados),
+                "tamanho_disco": os.path.getsize(caminho),
+                "comprimido": self.comprimir,
+                "salvo_em": agora,
+                "acessado_em": agora,
+            }
+            if anterior:
+                self._apagar_orfao(anterior)
+            self._despejar()
+            if persistir:
+                self._salvar_index()
+        return sha
+
+    def guardar_arquivo(self, chave: str, caminho: str, remover: bool = True, persistir: bool = True) -> str:
+        """Guarda um XML recém-baixado e, por padrão, apaga o arquivo solto"""
+        with open(caminho, 'rb') as arquivo:
+            sha = self.guardar(chave, arquivo.read(), persistir)
+        if remover:
+            os.remove(caminho)
+        return sha
+
+    def ler(self, chave: str) -> Optional[bytes]:
+        """Conteúdo do XML da chave, conferido contra o sha256; None se ausente ou corrompido"""
+        entrada = self.index.get(chave)
+        if not entrada:
+            return None
+        caminho = self._caminho_objeto(entrada['sha256'], entrada['comprimido'])
+        try:
+            with open(caminho, 'rb') as arquivo:
+                dados = arquivo.read()
+            if entrada['comprimido']:
+                dados = gzip.decompress(dados)
+        except (OSError, EOFError, gzip.BadGzipFile) as e:
+            logger.warning("⚠️  XML da chave %s ilegível no depósito: %s", chave, e)
+            with self._lock:
+                self._descartar([chave])
+            return None
+        if hashlib.sha256(dados).hexdigest() != entrada['sha256']:
+            logger.warning("⚠️  XML da chave %s não confere com o hash, descartado", chave)
+            with self._lock:
+                self._descartar([chave])
+            return None
+        entrada['acessado_em'] = datetime.now().isoformat(timespec='seconds')
+        return dados
+
+    def itens(self) -> Iterator[Tuple[str, bytes]]:
+        """(chave, conteúdo) de todo o depósito, já conferido"""
+        for chave in list(self.index):
+            dados = self.ler(chave)
+            if dados is not None:
+                yield chave, dados
+
+    def verificar(self) -> List[str]:
+        """Confere todos os objetos contra o índice; remove e devolve as chaves corrompidas"""
+        corrompidas = [chave for chave in list(self.index) if self.ler(chave) is None]
+        with self._lock:
+            self._salvar_index()
+        if corrompidas:
+            logger.warning("⚠️  %s XML(s) corrompidos removidos do depósito", len(corrompidas))
+        return corrompidas
+
+    def importar_soltos(self) -> int:
+        """Move para o depósito os .xml soltos na raiz (o que antes era apagado a cada execução)"""
+        importados = 0
+        for caminho in glob.glob(os.path.join(self.raiz, "*.xml")):
+            registro = ler_nfe_xml(caminho)
+            chave = registro.chave or os.path.splitext(os.path.basename(caminho))[0]
+            if registro.erro:
+                logger.warning("⚠️  XML solto ilegível, mantido fora do depósito: %s (%s)", caminho, registro.erro)
+                continue
+            self.guardar_arquivo(chave, caminho, persistir=False)
+            importados += 1
+        if importados:
+            self.fechar()
+            logger.info("📦 %s XML(s) soltos movidos para o depósito", importados)
+        return importados
+
+    def _em_uso(self) -> set:
+        return {(entrada['sha256'], entrada['comprimido']) for entrada in self.index.values()}
+
+    def _apagar_orfao(self, entrada: Dict, em_uso: Optional[set] = None):
+        """Apaga o objeto de uma entrada que saiu do índice (ou foi trocada) se nenhuma chave o usa mais"""
+        if (entrada['sha256'], entrada['comprimido']) in (self._em_uso() if em_uso is None else em_uso):
+            return
+        try:
+            os.remove(self._caminho_objeto(entrada['sha256'], entrada['comprimido']))
+        except OSError:
+            pass
+
+    def _descartar(self, chaves: List[str]):
+        """Tira as chaves do índice e apaga os objetos que ficaram sem nenhuma chave"""
+        removidas = [self.index.pop(chave) for chave in chaves if chave in self.index]
+        em_uso = self._em_uso()
+        for entrada in removidas:
+            self._apagar_orfao(entrada, em_uso)
+
+    def _despejar(self):
+        """Descarta os XMLs acessados há mais tempo até caber no limite"""
+        total = self.tamanho_total
+        if total <= self.limite_bytes:
+            return
+        referencias = Counter(entrada['sha256'] for entrada in self.index.values())
+        descartadas = []
+        for chave in sorted(self.index, key=lambda c: self.index[c]['acessado_em']):
+            if total <= self.limite_bytes:
+                break
+            entrada = self.index[chave]
+            referencias[entrada['sha256']] -= 1
+            if not referencias[entrada['sha256']]:
+                total -= entrada['tamanho_disco']
+            descartadas.append(chave)
+        self._descartar(descartadas)
+        logger.info("🧹 Depósito acima de %s MB: %s XML(s) antigos descartados",
+                    self.limite_bytes // (1024 * 1024), len(descartadas))
+
+    def fechar(self):
+        """Grava as datas de acesso atualizadas pelas leituras"""
+        with self._lock:
+            self._salvar_index()